@@ -13,5 +13,35 @@ function! Bench(bang)
     call writefile(l:output, "bench_output_" . l:label . ".txt")
 endfunction
 
-call Bench(0)
+" Time `count` runs of each of `motions`, and write the times of the i-th
+" motion to bench_output_motion<i>.txt. Backward motions start from the end
+" of the buffer, and the others from the start.
+function! BenchMotions(motions, count)
+    let l:i = 0
+    for l:motion in a:motions
+        if index(["b", "B", "ge", "gE"], l:motion) >= 0
+            normal! G$
+        else
+            normal! gg0
+        endif
+        let l:mycount = a:count
+        let l:output = []
+        let l:cmd = "normal " . l:motion
+        while l:mycount > 0
+            let l:mycount -= 1
+            let l:start = reltime()
+            execute l:cmd
+            let l:tm = reltimestr(reltime(l:start))
+            call add(l:output, l:tm)
+        endwhile
+        call writefile(l:output, "bench_output_motion" . l:i . ".txt")
+        let l:i += 1
+    endfor
+endfunction
+
+if exists("g:bench_motions")
+    call BenchMotions(g:bench_motions, get(g:, "bench_count", 50000))
+else
+    call Bench(0)
+endif
 quit
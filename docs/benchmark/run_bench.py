@@ -1,5 +1,9 @@
+import argparse
 from contextlib import suppress
+import json
 import os
+from pathlib import Path
+import shutil
 import subprocess
 
 import matplotlib
@@ -8,36 +12,350 @@ matplotlib.use("Agg")
 from matplotlib import pyplot as plt
 import numpy as np
 
+# Where the plugin managers in vimrc and init.lua install the extension.
+EXTENSION_PATHS = {
+    "vim": Path(".vim_bundle/jieba.vim/pythonx/jieba_vim/jieba_vim_rs.so"),
+    "nvim": Path(".nvim_bundle/jieba.vim/lua/jieba_vim/jieba_vim_rs.so"),
+}
+# Commands that make the plugin managers in vimrc and init.lua install
+# jieba.vim, along with its extension.
+INSTALL_CMDS = {
+    "vim": ["vim", "-es", "-u", "vimrc", "+PlugInstall --sync", "+qa"],
+    "nvim": ["nvim", "--headless", "-u", "init.lua", "+Lazy! install", "+qa"],
+}
+MOTIONS = ["w", "W", "e", "E", "b", "B", "ge", "gE"]
+
+
+def editor_cmd(vim, extra_cmds=()):
+    if vim == "vim":
+        cmd = [vim, "-es", "-u", "vimrc"]
+    else:
+        cmd = [vim, "--headless", "-u", "init.lua"]
+    for extra_cmd in extra_cmds:
+        cmd += ["--cmd", extra_cmd]
+    return cmd + ["-S", "bench.vim", "data_zh.txt"]
+
 
 def run_bench(vim):
     with suppress(FileNotFoundError):
         os.remove("bench_output_std.txt")
     with suppress(FileNotFoundError):
         os.remove("bench_output_custom.txt")
-    if vim == "vim":
-        cmd = f"{vim} -es -u vimrc -S bench.vim data_zh.txt"
-    else:
-        cmd = f"{vim} --headless -u init.lua -S bench.vim data_zh.txt"
-    subprocess.run(cmd.split(), check=True)
+    subprocess.run(editor_cmd(vim), check=True)
     return np.loadtxt("bench_output_custom.txt")
 
 
-subprocess.run("bash download_dataset.sh".split(), check=True)
-vim_bench_zh = run_bench("vim")
-nvim_bench_zh = run_bench("nvim")
-
-fig, ax = plt.subplots()
-ax.hist(nvim_bench_zh[1:], bins=50, density=True, label="nvim", alpha=0.7)
-ax.hist(vim_bench_zh[1:], bins=50, density=True, label="vim", alpha=0.7)
-ax.set_title("warm start wall time histogram")
-ax.legend()
-ax.set_xlabel("sec")
-fig.savefig("bench_output_hist.jpg")
-plt.close(fig)
-
-fig, ax = plt.subplots()
-ax.bar(["vim", "nvim"], [vim_bench_zh[0], nvim_bench_zh[0]], width=0.3)
-ax.set_title("warmup wall time")
-ax.set_ylabel("sec")
-fig.savefig("bench_output_warmup.jpg")
-plt.close(fig)
+def plot():
+    vim_bench_zh = run_bench("vim")
+    nvim_bench_zh = run_bench("nvim")
+
+    fig, ax = plt.subplots()
+    ax.hist(nvim_bench_zh[1:], bins=50, density=True, label="nvim", alpha=0.7)
+    ax.hist(vim_bench_zh[1:], bins=50, density=True, label="vim", alpha=0.7)
+    ax.set_title("warm start wall time histogram")
+    ax.legend()
+    ax.set_xlabel("sec")
+    fig.savefig("bench_output_hist.jpg")
+    plt.close(fig)
+
+    fig, ax = plt.subplots()
+    ax.bar(["vim", "nvim"], [vim_bench_zh[0], nvim_bench_zh[0]], width=0.3)
+    ax.set_title("warmup wall time")
+    ax.set_ylabel("sec")
+    fig.savefig("bench_output_warmup.jpg")
+    plt.close(fig)
+
+
+def run_motions(vim, motions, count):
+    """Return the wall times of each motion in one editor session, leaving
+    out the first, which includes the warmup."""
+    for i in range(len(motions)):
+        with suppress(FileNotFoundError):
+            os.remove(f"bench_output_motion{i}.txt")
+    extra_cmds = [
+        f"let g:bench_motions = {json.dumps(motions)}",
+        f"let g:bench_count = {count}",
+    ]
+    subprocess.run(editor_cmd(vim, extra_cmds), check=True)
+    return {
+        motion: np.loadtxt(f"bench_output_motion{i}.txt", ndmin=1)[1:]
+        for i, motion in enumerate(motions)
+    }
+
+
+def ensure_installed(vim):
+    """Install jieba.vim with the plugin manager unless its extension is in
+    place, and fail if it is still not."""
+    dest = EXTENSION_PATHS[vim]
+    if not dest.exists():
+        subprocess.run(INSTALL_CMDS[vim], check=True)
+    if not dest.exists():
+        raise SystemExit(
+            f"the jieba.vim extension is not at {dest} even after "
+            f"`{' '.join(INSTALL_CMDS[vim])}`; install the plugin first"
+        )
+    return dest
+
+
+def run_interleaved(vim, builds, motions, count, rounds):
+    """Run the builds of the extension alternately, in order ABBA, so that
+    drifts in machine load hit both builds alike. Return the wall times of
+    each build and motion, as a list with the times of each round."""
+    dest = ensure_installed(vim)
+    backup = dest.with_name(dest.name + ".orig")
+    shutil.copy2(dest, backup)
+    times = [{motion: [] for motion in motions} for _ in builds]
+    try:
+        for r in range(rounds):
+            order = [0, 1] if r % 2 == 0 else [1, 0]
+            for b in order:
+                shutil.copy2(builds[b], dest)
+                for motion, t in run_motions(vim, motions, count).items():
+                    times[b][motion].append(t)
+    finally:
+        shutil.move(backup, dest)
+    return times
+
+
+def bootstrap_ci(rng, rounds, stat, n_resamples, alpha):
+    """Return the percentile bootstrap confidence interval of `stat`, a
+    function of one or more sample arrays, each pooled over rounds. `rounds`
+    holds a tuple of the sample arrays of each round. Whole rounds are
+    resampled, since the samples within a round are serially correlated."""
+    n = len(rounds)
+    estimates = []
+    for _ in range(n_resamples):
+        picked = [rounds[i] for i in rng.integers(0, n, n)]
+        estimates.append(stat(*(np.concatenate(xs) for xs in zip(*picked))))
+    lo, hi = np.quantile(estimates, [alpha / 2, 1 - alpha / 2])
+    return float(lo), float(hi)
+
+
+def wilcoxon_signed_rank(d):
+    """Return the two-sided p-value of the Wilcoxon signed-rank test that the
+    paired differences `d` are symmetric about zero, by the exact null
+    distribution. Zero differences are left out, and tied absolute
+    differences get their average rank."""
+    d = np.asarray(d, dtype=float)
+    d = d[d != 0]
+    if len(d) == 0:
+        return 1.0
+    _, inverse, counts = np.unique(
+        np.abs(d), return_inverse=True, return_counts=True
+    )
+    # The average ranks, doubled so that they are integers even with ties.
+    ranks = (2 * np.cumsum(counts) - counts + 1)[inverse]
+    w = int(ranks[d > 0].sum())
+    # `dist[s]` is the probability that the ranks given a positive sign sum
+    # to `s`, if each sign is equally likely.
+    dist = np.zeros(int(ranks.sum()) + 1)
+    dist[0] = 1.0
+    for r in ranks:
+        dist = (dist + np.concatenate([np.zeros(r), dist[:-r]])) / 2
+    return min(1.0, 2 * min(dist[: w + 1].sum(), dist[w:].sum()))
+
+
+def p99(x):
+    return np.percentile(x, 99)
+
+
+def compare_motion(rng, a, b, n_resamples, alpha):
+    """Compare the wall times `a` and `b` of the two builds, given as lists
+    of the times of each round."""
+
+    def summarize(x):
+        return {
+            "samples": sum(len(xr) for xr in x),
+            "median": float(np.median(np.concatenate(x))),
+            "median_ci": bootstrap_ci(
+                rng, [(xr,) for xr in x], np.median, n_resamples, alpha
+            ),
+            "p99": float(p99(np.concatenate(x))),
+            "p99_ci": bootstrap_ci(
+                rng, [(xr,) for xr in x], p99, n_resamples, alpha
+            ),
+        }
+
+    def ratio(stat):
+        return {
+            "estimate": float(
+                stat(np.concatenate(b)) / stat(np.concatenate(a))
+            ),
+            "ci": bootstrap_ci(
+                rng,
+                list(zip(a, b)),
+                lambda a, b: stat(b) / stat(a),
+                n_resamples,
+                alpha,
+            ),
+        }
+
+    # Each round times both builds under about the same machine load, so
+    # the rounds are compared in pairs.
+    round_ratios = [
+        float(np.median(br) / np.median(ar)) for ar, br in zip(a, b)
+    ]
+    return {
+        "a": summarize(a),
+        "b": summarize(b),
+        "median_ratio": ratio(np.median),
+        "p99_ratio": ratio(p99),
+        "round_median_ratios": round_ratios,
+        "p_value": wilcoxon_signed_rank(np.log(round_ratios)),
+    }
+
+
+def markdown_report(report):
+    meta = report["meta"]
+    confidence = f"{1 - meta['alpha']:.0%}"
+
+    def us(x):
+        return f"{x * 1e6:.1f}"
+
+    def with_ci(est, ci, fmt):
+        return f"{fmt(est)} [{fmt(ci[0])}, {fmt(ci[1])}]"
+
+    def ratio(r):
+        return with_ci(r["estimate"], r["ci"], lambda x: f"{x:.3f}")
+
+    lines = [
+        f"# A/B comparison ({meta['vim']})",
+        "",
+        f"- A: `{meta['a']}`",
+        f"- B: `{meta['b']}`",
+        f"- {meta['rounds']} interleaved rounds of {meta['count']} runs "
+        "per motion",
+        f"- Times in microseconds, with {confidence} confidence intervals "
+        "by bootstrapping rounds; p-values by the two-sided Wilcoxon "
+        "signed-rank test on the per-round B/A ratios of medians",
+        "",
+        "| motion | A median | B median | A p99 | B p99 "
+        "| median B/A | p99 B/A | p-value |",
+        "|---|---|---|---|---|---|---|---|",
+    ]
+    for motion, m in report["motions"].items():
+        a, b = m["a"], m["b"]
+        significant = "**" if m["p_value"] < meta["alpha"] else ""
+        lines.append(
+            f"| `{motion}` "
+            f"| {with_ci(a['median'], a['median_ci'], us)} "
+            f"| {with_ci(b['median'], b['median_ci'], us)} "
+            f"| {with_ci(a['p99'], a['p99_ci'], us)} "
+            f"| {with_ci(b['p99'], b['p99_ci'], us)} "
+            f"| {ratio(m['median_ratio'])} "
+            f"| {ratio(m['p99_ratio'])} "
+            f"| {significant}{m['p_value']:.3g}{significant} |"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def compare(args):
+    times_a, times_b = run_interleaved(
+        args.vim, args.compare, args.motions, args.count, args.rounds
+    )
+    rng = np.random.default_rng(args.seed)
+    report = {
+        "meta": {
+            "vim": args.vim,
+            "a": args.compare[0],
+            "b": args.compare[1],
+            "rounds": args.rounds,
+            "count": args.count,
+            "bootstrap": args.bootstrap,
+            "alpha": args.alpha,
+        },
+        "motions": {
+            motion: compare_motion(
+                rng,
+                times_a[motion],
+                times_b[motion],
+                args.bootstrap,
+                args.alpha,
+            )
+            for motion in args.motions
+        },
+    }
+    with open(f"{args.output}.json", "w", encoding="utf-8") as outfile:
+        json.dump(report, outfile, indent=2)
+    markdown = markdown_report(report)
+    with open(f"{args.output}.md", "w", encoding="utf-8") as outfile:
+        outfile.write(markdown)
+    print(markdown)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Plot the wall times of `w` in Vim and Neovim, or compare "
+        "two builds of the extension with --compare."
+    )
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("A", "B"),
+        help="compare two builds of the extension, given as paths to the "
+        "built libraries",
+    )
+    parser.add_argument(
+        "--vim",
+        choices=["vim", "nvim"],
+        default="vim",
+        help="the editor to compare the builds in (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--motions",
+        nargs="+",
+        choices=MOTIONS,
+        default=MOTIONS,
+        help="the motions to compare (default: all)",
+    )
+    parser.add_argument(
+        "--count",
+        type=int,
+        default=2000,
+        help="runs of each motion per round (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=10,
+        help="rounds of interleaved runs (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--bootstrap",
+        type=int,
+        default=1000,
+        help="bootstrap resamples (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--alpha",
+        type=float,
+        default=0.05,
+        help="significance level (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="seed of the bootstrap (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="compare_report",
+        help="write the report to OUTPUT.md and OUTPUT.json "
+        "(default: %(default)s)",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    subprocess.run("bash download_dataset.sh".split(), check=True)
+    if args.compare:
+        compare(args)
+    else:
+        plot()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+# Copyright 2026 Kaiwen Wu. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+
+"""Time the motions of the extension module on synthetic buffers, without
+Vim in the loop, and write the results as JSON."""
+
+import argparse
+from datetime import datetime, timezone
+import json
+import platform
+import statistics
+import sys
+import time
+
+from .buffers import SCRIPTS, make_buffer, new_rng, sample_cursors
+from .keys import REPO_ROOT, motion_cases
+
+# The default `iskeyword` of Vim.
+DEFAULT_ISK = b"@,48-57,_,192-255"
+
+FULL_SWEEP = {
+    "counts": [1, 8, 64],
+    "line_lens": [40, 400, 4000],
+    "preview_limits": [16, 256],
+}
+QUICK_SWEEP = {
+    "counts": [1, 8],
+    "line_lens": [80],
+    "preview_limits": [16],
+}
+
+
+def import_extension():
+    sys.path.insert(0, str(REPO_ROOT / "pythonx"))
+    try:
+        from jieba_vim import jieba_vim_rs
+    except ImportError as err:
+        sys.exit(
+            f"cannot import the extension module ({err}); build it first "
+            "with `JIEBA_VIM_BUILD_FROM_SOURCE=1 bash build.sh` at the "
+            "repository root"
+        )
+    return jieba_vim_rs
+
+
+def make_call(word_motion, api, motion, count, preview_limit):
+    """Return a function of ``(buffer, curpos)`` that calls ``api``, where
+    ``curpos`` is as returned by ``getcurpos()``."""
+    if api == "nmap":
+        return lambda buffer, curpos: word_motion.nmap(
+            buffer, motion, curpos, count
+        )
+    if api == "xmap":
+        return lambda buffer, curpos: word_motion.xmap(
+            buffer, b"v", motion, curpos[:4], curpos[:4], count
+        )
+    if api == "omap":
+        return lambda buffer, curpos: word_motion.omap(
+            buffer, motion, curpos, count, b"d"
+        )
+    if api == "imap":
+        return lambda buffer, curpos: word_motion.imap(buffer, motion, curpos)
+    if api == "preview_nmap":
+        return lambda buffer, curpos: word_motion.preview_nmap(
+            buffer, motion, curpos, preview_limit
+        )
+    raise ValueError(f"unknown api: {api}")
+
+
+def summarize(times_ns):
+    times_ns = sorted(times_ns)
+    return {
+        "samples": len(times_ns),
+        "min_ns": times_ns[0],
+        "median_ns": statistics.median(times_ns),
+        "mean_ns": statistics.fmean(times_ns),
+        "p90_ns": times_ns[int(0.9 * (len(times_ns) - 1))],
+        "max_ns": times_ns[-1],
+    }
+
+
+def time_case(word_motion, call, buffer, curposes, cold):
+    """Return the wall times of ``call`` at each of ``curposes``. If
+    ``cold`` is true, clear the token cache before each call, so that the
+    lines are tokenized anew."""
+    times_ns = []
+    for curpos in curposes:
+        if cold:
+            word_motion.clear_cache()
+        start = time.perf_counter_ns()
+        call(buffer, curpos)
+        times_ns.append(time.perf_counter_ns() - start)
+    return times_ns
+
+
+def case_params(api, sweep):
+    """Return the ``(count, preview_limit)`` to sweep for ``api``."""
+    if api == "imap":
+        return [(None, None)]
+    if api == "preview_nmap":
+        return [(None, limit) for limit in sweep["preview_limits"]]
+    return [(count, None) for count in sweep["counts"]]
+
+
+def run(word_motion, args, sweep):
+    cases = [c for c in motion_cases() if c[0] in args.api]
+    results = []
+    for script in args.script:
+        for line_len in sweep["line_lens"]:
+            rng = new_rng(args.seed, script, line_len)
+            buffer = make_buffer(rng, script, line_len, args.lines)
+            curposes = [
+                [0, lnum, col, 0, col]
+                for lnum, col in sample_cursors(rng, buffer, args.samples)
+            ]
+            print(f"{script} x {line_len} chars", file=sys.stderr)
+            word_motion.clear_cache()
+            if not args.cold:
+                word_motion.fill_cache(buffer, word=True)
+                word_motion.fill_cache(buffer, word=False)
+            for api, key, motion in cases:
+                for count, preview_limit in case_params(api, sweep):
+                    call = make_call(
+                        word_motion, api, motion, count, preview_limit
+                    )
+                    times_ns = time_case(
+                        word_motion, call, buffer, curposes, args.cold
+                    )
+                    results.append(
+                        {
+                            "api": api,
+                            "key": key,
+                            "count": count,
+                            "preview_limit": preview_limit,
+                            "script": script,
+                            "line_len": line_len,
+                            **summarize(times_ns),
+                        }
+                    )
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="bench_results.json",
+        help="where to write the results (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--lazy",
+        action="store_true",
+        help="benchmark `LazyWordMotion` instead of `WordMotion`",
+    )
+    parser.add_argument("--user-dict", help="path to a jieba user dict")
+    parser.add_argument(
+        "--cold",
+        action="store_true",
+        help="clear the token cache before each call",
+    )
+    parser.add_argument(
+        "--quick",
+        action="store_true",
+        help="sweep fewer counts and line lengths",
+    )
+    parser.add_argument(
+        "--api",
+        action="append",
+        choices=["nmap", "xmap", "omap", "imap", "preview_nmap"],
+        help="the API to benchmark; may be repeated (default: all)",
+    )
+    parser.add_argument(
+        "--script",
+        action="append",
+        choices=list(SCRIPTS),
+        help="the script mix of the buffers; may be repeated (default: all)",
+    )
+    parser.add_argument(
+        "--lines",
+        type=int,
+        default=64,
+        help="number of lines in each buffer (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--samples",
+        type=int,
+        default=200,
+        help="number of timed calls per case (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="seed of the buffers and cursors (default: %(default)s)",
+    )
+    args = parser.parse_args()
+    if args.api is None:
+        args.api = ["nmap", "xmap", "omap", "imap", "preview_nmap"]
+    if args.script is None:
+        args.script = list(SCRIPTS)
+    return args
+
+
+def main():
+    args = parse_args()
+    sweep = QUICK_SWEEP if args.quick else FULL_SWEEP
+    jieba_vim_rs = import_extension()
+    cls = jieba_vim_rs.LazyWordMotion if args.lazy else jieba_vim_rs.WordMotion
+    started_at = datetime.now(timezone.utc).isoformat()
+    word_motion = cls(DEFAULT_ISK, args.user_dict)
+    # Load the jieba dictionary before timing anything.
+    word_motion.nmap(["结巴"], b"w", [0, 1, 1, 0, 1], 1)
+    word_motion.reset_stats()
+
+    results = run(word_motion, args, sweep)
+    report = {
+        "meta": {
+            "started_at": started_at,
+            "python": sys.version,
+            "platform": platform.platform(),
+            "word_motion": cls.__name__,
+            "user_dict": args.user_dict,
+            "cold": args.cold,
+            "lines": args.lines,
+            "seed": args.seed,
+            "sweep": sweep,
+        },
+        "stats": word_motion.stats(),
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as outfile:
+        json.dump(report, outfile, indent=2)
+    print(f"wrote {len(results)} results to {args.output}", file=sys.stderr)
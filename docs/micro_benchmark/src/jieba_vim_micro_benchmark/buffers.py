@@ -0,0 +1,144 @@
+# Copyright 2026 Kaiwen Wu. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+
+"""Synthetic buffers of various script mixes and line lengths."""
+
+import random
+import unicodedata
+
+ASCII_WORDS = [
+    "the",
+    "quick",
+    "brown",
+    "fox",
+    "jumps",
+    "over",
+    "lazy",
+    "dog",
+    "foo_bar",
+    "x86_64",
+    "self.cache",
+    "f(x)",
+    "--verbose",
+    "a+b=c",
+]
+HANZI_PHRASES = [
+    "我们",
+    "今天",
+    "学习",
+    "中文分词",
+    "是一个",
+    "非常",
+    "重要的",
+    "自然语言处理",
+    "问题",
+    "，",
+    "。",
+    "“结巴”",
+    "（测试）",
+]
+EMOJI = [
+    "\U0001f600",
+    "\U0001f44d\U0001f3fd",
+    "\U0001f468\u200d\U0001f469\u200d\U0001f467",
+    "\U0001f1e8\U0001f1f3",
+    "\u2764\ufe0f",
+    "ok",
+    " ",
+]
+# Words with combining diacritical marks rather than precomposed chars.
+COMBINING_WORDS = [
+    "cafe\u0301",
+    "nai\u0308ve",
+    "a\u0300\u0301\u0302",
+    "n\u0303o",
+    "Zu\u0308rich",
+    "plain",
+]
+
+
+def ascii_chunk(rng):
+    return rng.choice(ASCII_WORDS) + " "
+
+
+def hanzi_chunk(rng):
+    return rng.choice(HANZI_PHRASES)
+
+
+def emoji_chunk(rng):
+    return rng.choice(EMOJI)
+
+
+def combining_chunk(rng):
+    return rng.choice(COMBINING_WORDS) + rng.choice([" ", " ", "."])
+
+
+def mixed_chunk(rng):
+    return rng.choice([ascii_chunk, hanzi_chunk, emoji_chunk, combining_chunk])(
+        rng
+    )
+
+
+SCRIPTS = {
+    "ascii": ascii_chunk,
+    "hanzi": hanzi_chunk,
+    "emoji": emoji_chunk,
+    "combining": combining_chunk,
+    "mixed": mixed_chunk,
+}
+
+
+def make_line(rng, script, line_len):
+    """Return a line of ``line_len`` chars in ``script``."""
+    chunk = SCRIPTS[script]
+    chunks = []
+    n_chars = 0
+    while n_chars < line_len:
+        chunks.append(chunk(rng))
+        n_chars += len(chunks[-1])
+    return "".join(chunks)[:line_len]
+
+
+def make_buffer(rng, script, line_len, n_lines):
+    """Return a buffer of ``n_lines`` lines of ``line_len`` chars in
+    ``script``, as a list of str."""
+    return [make_line(rng, script, line_len) for _ in range(n_lines)]
+
+
+def cursor_cols(line):
+    """Return the columns (1-indexed byte indices) where Vim may put the
+    cursor in ``line``, i.e. those of chars other than combining marks and
+    joiners."""
+    cols = []
+    col = 1
+    for c in line:
+        if not unicodedata.combining(c) and c not in "\u200d\ufe0f":
+            cols.append(col)
+        col += len(c.encode("utf-8"))
+    return cols or [1]
+
+
+def sample_cursors(rng, buffer, n):
+    """Return ``n`` random cursors in ``buffer`` as ``(lnum, col)``."""
+    cursors = []
+    for _ in range(n):
+        lnum = rng.randrange(len(buffer)) + 1
+        cursors.append((lnum, rng.choice(cursor_cols(buffer[lnum - 1]))))
+    return cursors
+
+
+def new_rng(seed, *keys):
+    """Return a random generator seeded by ``seed`` and ``keys``, so that
+    each benchmark case sees the same buffer in every run."""
+    return random.Random(repr((seed,) + keys))
@@ -0,0 +1,79 @@
+# Copyright 2026 Kaiwen Wu. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+
+"""The motion keys benchmarked, as passed to the extension by the plugin."""
+
+import importlib.util
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+
+# The normal, visual and operator-pending mode motions that the plugin maps
+# the arrow keys to (see `JiebaNmapExpr` in plugin/jieba_vim.vim).
+ARROW_KEY_MOTIONS = {
+    "\\<C-Left>": "B",
+    "\\<S-Left>": "b",
+    "\\<C-Right>": "W",
+    "\\<S-Right>": "w",
+}
+
+# The key codes of the insert mode motions, as Vim passes them to `imap`.
+INSERT_KEY_CODES = {
+    "\\<C-w>": b"\x17",
+    "\\<C-Left>": b"\x80\xfdU",
+    "\\<C-Right>": b"\x80\xfdV",
+    "\\<S-Left>": b"\x80#4",
+    "\\<S-Right>": b"\x80%i",
+}
+
+
+def load_motion_keys():
+    """Load ``motion_keys.py`` of the test metatest, which lists the motion
+    keys the plugin maps, without installing the metatest package."""
+    path = (
+        REPO_ROOT
+        / "test"
+        / "jieba_test_metatest"
+        / "src"
+        / "jieba_test_metatest"
+        / "motion_keys.py"
+    )
+    spec = importlib.util.spec_from_file_location("motion_keys", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def motion_bytes(key):
+    """Return the motion argument of ``nmap``/``xmap``/``omap`` for ``key``
+    of ``WORD_MOTION_KEYS`` or ``WORD_TEXT_OBJECTS``."""
+    return ARROW_KEY_MOTIONS.get(key, key).encode("utf-8")
+
+
+def motion_cases():
+    """Return the ``(api, key, motion)`` to benchmark, where ``key`` is how
+    ``motion_keys.py`` writes the key, and ``motion`` the bytes passed to
+    ``api``."""
+    keys = load_motion_keys()
+    cases = []
+    for key in keys.WORD_MOTION_KEYS:
+        cases.append(("nmap", key, motion_bytes(key)))
+    for api in ["xmap", "omap"]:
+        for key in keys.WORD_MOTION_KEYS + keys.WORD_TEXT_OBJECTS:
+            cases.append((api, key, motion_bytes(key)))
+    for key in keys.WORD_MOTION_INSERT_KEYS:
+        cases.append(("imap", key, INSERT_KEY_CODES[key]))
+    for key in keys.WORD_MOTION_KEYS:
+        cases.append(("preview_nmap", key, motion_bytes(key)))
+    return cases
@@ -0,0 +1,377 @@
+# Copyright 2026 Kaiwen Wu. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+
+"""Measure the resident set size (RSS) that jieba.vim adds to a process:
+after importing `jieba_vim.navigation`, constructing the word motion
+objects, loading dictionaries, and moving through large buffers, and that
+it adds to each instance under the settings that affect memory. Each
+scenario runs in a fresh interpreter, so that its peak RSS is its own.
+
+RSS is read from /proc, and peak RSS from `getrusage`, so this is for Linux.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+
+from .bench import DEFAULT_ISK, import_extension
+from .buffers import make_buffer, new_rng
+from .startup import write_dict
+
+BUFFER_LINES = [10000, 100000, 1000000]
+QUICK_BUFFER_LINES = [10000, 100000]
+DICT_SIZES = [10000, 100000, 1000000]
+QUICK_DICT_SIZES = [10000, 100000]
+LINE_LEN = 80
+# The count of each `w` in `walk`, which moves over some 10 lines.
+WALK_COUNT = 200
+# The number of lines of the buffer walked through under each setting.
+SETTINGS_LINES = 1000
+# The word motion objects and calls that the plugin makes under the
+# settings that affect memory.
+SETTINGS = {
+    # g:jieba_vim_lazy = 0.
+    "eager": {"class": "WordMotion", "prewarm": False, "cut_memo": False},
+    # The defaults, g:jieba_vim_lazy = 1 and g:jieba_vim_prewarm = 1.
+    "lazy": {"class": "LazyWordMotion", "prewarm": True, "cut_memo": False},
+    # g:jieba_vim_prewarm = 0.
+    "lazy_no_prewarm": {
+        "class": "LazyWordMotion",
+        "prewarm": False,
+        "cut_memo": False,
+    },
+    # g:jieba_vim_prewarm = 0, with the cut memo snapshot that an earlier
+    # instance saved in g:jieba_vim_cut_memo_dir after moving over the same
+    # text.
+    "lazy_no_prewarm_cut_memo": {
+        "class": "LazyWordMotion",
+        "prewarm": False,
+        "cut_memo": True,
+    },
+}
+
+
+def current_rss():
+    """Return the RSS of this process in bytes."""
+    with open("/proc/self/statm", encoding="ascii") as infile:
+        pages = int(infile.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def peak_rss():
+    """Return the peak RSS of this process in bytes."""
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # `ru_maxrss` is in bytes on macOS, and in kilobytes elsewhere.
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def walk(word_motion, buffer):
+    """Move through ``buffer`` with `w` from the first line to the last, so
+    that every line is tokenized by the motions alone. Unlike `fill_cache`,
+    this neither copies the whole buffer at once nor tokenizes on worker
+    threads, whose copies and malloc arenas would count towards the RSS of
+    the token cache."""
+    cursor = [0, 1, 1, 0, 1]
+    while True:
+        output = word_motion.nmap(buffer, b"w", cursor, WALK_COUNT)
+        _, lnum, col, off = output["cursor"]
+        if [lnum, col] == cursor[1:3]:
+            return
+        cursor = [0, lnum, col, off, col]
+
+
+def take_snapshot(snapshots, stage):
+    snapshots.append(
+        {"stage": stage, "rss": current_rss(), "peak_rss": peak_rss()}
+    )
+
+
+def run_scenario(spec):
+    """Run the scenario described by ``spec`` in this process, and return
+    the RSS after each stage."""
+    if "setting" in spec:
+        return run_setting(spec)
+    snapshots = []
+
+    def snapshot(stage):
+        take_snapshot(snapshots, stage)
+
+    snapshot("start")
+    jieba_vim_rs = import_extension()
+    importlib.import_module("jieba_vim.navigation")
+    snapshot("import")
+    cls = getattr(jieba_vim_rs, spec["class"])
+    word_motion = cls(DEFAULT_ISK, spec["dict"])
+    snapshot("construct")
+    # Wait for the dictionary of a `LazyWordMotion` to load.
+    word_motion.nmap(["结巴"], b"w", [0, 1, 1, 0, 1], 1)
+    snapshot("first_motion")
+    result = {"spec": spec, "snapshots": snapshots}
+    if spec["lines"] is None:
+        return result
+
+    if spec["cache_capacity"] is not None:
+        word_motion.set_cache_capacity(spec["cache_capacity"])
+    rng = new_rng(spec["seed"], "mixed", LINE_LEN, spec["lines"])
+    buffer = make_buffer(rng, "mixed", LINE_LEN, spec["lines"])
+    snapshot("buffer")
+    walk(word_motion, buffer)
+    snapshot("walk")
+    stats = word_motion.stats()
+    result["cached_lines"] = stats["lines_parsed"] - stats["cache_evictions"]
+    return result
+
+
+def run_setting(spec):
+    """Run an instance of jieba.vim under the setting named in ``spec``, as
+    the plugin would, through a buffer of mixed text, and return the RSS
+    after each stage and whether the dictionary was loaded. Save the cut
+    memo as a snapshot if ``spec`` asks to."""
+    setting = SETTINGS[spec["setting"]]
+    snapshots = []
+
+    def snapshot(stage):
+        take_snapshot(snapshots, stage)
+
+    snapshot("start")
+    jieba_vim_rs = import_extension()
+    importlib.import_module("jieba_vim.navigation")
+    snapshot("import")
+    word_motion = getattr(jieba_vim_rs, setting["class"])(DEFAULT_ISK, None)
+    if setting["cut_memo"]:
+        word_motion.load_cut_memo(spec["cut_memo_dir"])
+    if setting["prewarm"]:
+        word_motion.prewarm()
+    snapshot("construct")
+    rng = new_rng(spec["seed"], "mixed", LINE_LEN, SETTINGS_LINES)
+    buffer = make_buffer(rng, "mixed", LINE_LEN, SETTINGS_LINES)
+    snapshot("buffer")
+    walk(word_motion, buffer)
+    snapshot("walk")
+    if spec["save_cut_memo"]:
+        word_motion.save_cut_memo(spec["cut_memo_dir"])
+    return {
+        "spec": spec,
+        "snapshots": snapshots,
+        "dict_loaded": word_motion.stats()["dict_load_time"] is not None,
+    }
+
+
+def spawn_scenario(spec):
+    """Run the scenario described by ``spec`` in a fresh interpreter."""
+    proc = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "jieba_vim_micro_benchmark.memory",
+            "--scenario",
+            json.dumps(spec),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(proc.stdout)
+
+
+def rss_at(result, stage):
+    for s in result["snapshots"]:
+        if s["stage"] == stage:
+            return s["rss"]
+    raise KeyError(stage)
+
+
+def fit_line(points):
+    """Return the intercept and the slope of the least-squares line through
+    ``points``, a list of ``(x, y)``."""
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    sxx = sum((x - mean_x) ** 2 for x, _ in points)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    slope = sxy / sxx
+    return mean_y - slope * mean_x, slope
+
+
+def instance_rss(result):
+    """Return the RSS added by an instance of jieba.vim, i.e. that of the
+    whole run less the buffer, which Vim holds anyway."""
+    return (
+        rss_at(result, "walk")
+        - rss_at(result, "buffer")
+        + rss_at(result, "construct")
+        - rss_at(result, "start")
+    )
+
+
+def summarize(buffer_results, dict_results, settings_results):
+    """Return the bytes per cached line for each buffer size, and the bytes
+    per dictionary entry, i.e. the slope of the RSS added by loading a
+    dictionary over the dictionary sizes, along with the intercept, which is
+    the fixed cost of loading any dictionary. Also return the RSS added by
+    an instance under each setting, and whether it loaded the dictionary."""
+    per_line = {}
+    for r in buffer_results:
+        if r["cached_lines"]:
+            delta = rss_at(r, "walk") - rss_at(r, "buffer")
+            per_line[r["spec"]["lines"]] = delta / r["cached_lines"]
+    dict_rss = [
+        (
+            r["spec"]["dict_size"],
+            rss_at(r, "first_motion") - rss_at(r, "import"),
+        )
+        for r in dict_results
+    ]
+    fixed, per_entry = fit_line(dict_rss)
+    return {
+        "bytes_per_cached_line": per_line,
+        "bytes_per_dict_entry": per_entry,
+        "dict_fixed_bytes": fixed,
+        "instance_bytes": {
+            r["spec"]["setting"]: instance_rss(r) for r in settings_results
+        },
+        "dict_loaded": {
+            r["spec"]["setting"]: r["dict_loaded"] for r in settings_results
+        },
+    }
+
+
+def report_stages(result):
+    spec = result["spec"]
+    if "setting" in spec:
+        label = f"setting={spec['setting']}"
+    else:
+        label = f"{spec['class']} dict={spec['dict_size'] or 'default'}"
+        if spec["lines"] is not None:
+            label += f" lines={spec['lines']}"
+    print(label, file=sys.stderr)
+    for s in result["snapshots"]:
+        print(
+            f"  {s['stage']:>12}: rss {s['rss'] / 2**20:8.1f} MiB, "
+            f"peak {s['peak_rss'] / 2**20:8.1f} MiB",
+            file=sys.stderr,
+        )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="memory_results.json",
+        help="where to write the results (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--quick",
+        action="store_true",
+        help="leave out the 1M-line buffer and 1M-entry dictionary",
+    )
+    parser.add_argument(
+        "--cache-capacity",
+        type=int,
+        help="token cache capacity in bytes (default: that of the plugin)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="seed of the buffers and dictionaries (default: %(default)s)",
+    )
+    parser.add_argument("--scenario", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.scenario is not None:
+        print(json.dumps(run_scenario(json.loads(args.scenario))))
+        return
+
+    base = {
+        "dict": None,
+        "dict_size": None,
+        "lines": None,
+        "cache_capacity": args.cache_capacity,
+        "seed": args.seed,
+    }
+    results = []
+    for cls in ["WordMotion", "LazyWordMotion"]:
+        results.append(spawn_scenario({**base, "class": cls}))
+    buffer_lines = QUICK_BUFFER_LINES if args.quick else BUFFER_LINES
+    buffer_results = [
+        spawn_scenario({**base, "class": "WordMotion", "lines": n})
+        for n in buffer_lines
+    ]
+    dict_sizes = QUICK_DICT_SIZES if args.quick else DICT_SIZES
+    dict_results = []
+    with tempfile.TemporaryDirectory() as dict_dir:
+        for size in dict_sizes:
+            path = os.path.join(dict_dir, f"dict_{size}.txt")
+            write_dict(path, size, args.seed + size)
+            dict_results.append(
+                spawn_scenario(
+                    {
+                        **base,
+                        "class": "WordMotion",
+                        "dict": path,
+                        "dict_size": size,
+                    }
+                )
+            )
+    settings_results = []
+    with tempfile.TemporaryDirectory() as cut_memo_dir:
+        setting_base = {
+            "cut_memo_dir": cut_memo_dir,
+            "save_cut_memo": False,
+            "seed": args.seed,
+        }
+        # The earlier instance that saves the cut memo snapshot.
+        spawn_scenario(
+            {**setting_base, "setting": "lazy", "save_cut_memo": True}
+        )
+        for name in SETTINGS:
+            settings_results.append(
+                spawn_scenario({**setting_base, "setting": name})
+            )
+    results += buffer_results + dict_results + settings_results
+    for r in results:
+        report_stages(r)
+
+    summary = summarize(buffer_results, dict_results, settings_results)
+    print(json.dumps(summary, indent=2), file=sys.stderr)
+    report = {
+        "meta": {
+            "python": sys.version,
+            "platform": platform.platform(),
+            "line_len": LINE_LEN,
+            "walk_count": WALK_COUNT,
+            "settings_lines": SETTINGS_LINES,
+            "cache_capacity": args.cache_capacity,
+            "seed": args.seed,
+        },
+        "summary": summary,
+        "scenarios": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as outfile:
+        json.dump(report, outfile, indent=2)
+
+
+if __name__ == "__main__":
+    main()
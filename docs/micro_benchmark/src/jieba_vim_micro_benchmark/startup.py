@@ -0,0 +1,219 @@
+# Copyright 2026 Kaiwen Wu. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+
+"""Time the startup cost of the plugin: importing `jieba_vim.navigation`
+and constructing the word motion objects. Compare the times against a
+stored baseline, and exit with nonzero code on a regression."""
+
+import argparse
+import json
+import os
+from pathlib import Path
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from .bench import DEFAULT_ISK, import_extension
+from .keys import REPO_ROOT
+
+PYTHONX = REPO_ROOT / "pythonx"
+
+IMPORT_SNIPPET = f"""
+import sys
+import time
+sys.path.insert(0, {str(PYTHONX)!r})
+start = time.perf_counter()
+import jieba_vim.navigation
+print(time.perf_counter() - start)
+"""
+
+# Numbers of entries in the synthetic dictionaries.
+DICT_SIZES = [1000, 10000, 100000]
+
+
+def time_import(pycache_prefix):
+    """Return the time to import `jieba_vim.navigation` in a fresh
+    interpreter, which reads and writes the bytecode cache under
+    ``pycache_prefix`` instead of next to the sources in the repo."""
+    env = dict(os.environ, PYTHONPYCACHEPREFIX=str(pycache_prefix))
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    proc = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return float(proc.stdout)
+
+
+def write_dict(path, n_entries, seed):
+    """Write a jieba dictionary of ``n_entries`` random words to ``path``."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as outfile:
+        for _ in range(n_entries):
+            word = "".join(
+                chr(rng.randrange(0x4E00, 0x9FA6))
+                for _ in range(rng.randrange(2, 5))
+            )
+            outfile.write(f"{word} {rng.randrange(1, 1000)} n\n")
+
+
+def time_construct(cls, path, first_motion):
+    """Return the time to construct ``cls`` with dictionary ``path``. If
+    ``first_motion`` is true, include the first motion, which waits for the
+    dictionary of a `LazyWordMotion` to load."""
+    start = time.perf_counter()
+    word_motion = cls(DEFAULT_ISK, path)
+    if first_motion:
+        word_motion.nmap(["结巴"], b"w", [0, 1, 1, 0, 1], 1)
+    return time.perf_counter() - start
+
+
+def time_cold_import(warm_prefix):
+    """Return the time to import `jieba_vim.navigation` in a fresh
+    interpreter without the bytecode cache of `jieba_vim`, so that its
+    modules are compiled anew. The bytecode of the standard library is still
+    read from ``warm_prefix``."""
+    with tempfile.TemporaryDirectory() as prefix:
+        shutil.copytree(warm_prefix, prefix, dirs_exist_ok=True)
+        # The cache of a source directory mirrors its absolute path.
+        source_dir = (PYTHONX / "jieba_vim").resolve()
+        shutil.rmtree(Path(prefix).joinpath(*source_dir.parts[1:]))
+        return time_import(prefix)
+
+
+def measure(repeat, dict_dir):
+    """Return the median times in seconds, keyed by name."""
+    jieba_vim_rs = import_extension()
+    times = {}
+
+    def record(name, fn):
+        times[name] = statistics.median(fn() for _ in range(repeat))
+        print(f"{name}: {times[name] * 1e3:.3f} ms", file=sys.stderr)
+
+    warm_prefix = Path(dict_dir) / "pycache"
+    time_import(warm_prefix)
+    record("import_cold", lambda: time_cold_import(warm_prefix))
+    record("import_warm", lambda: time_import(warm_prefix))
+
+    dicts = {"default": None}
+    for size in DICT_SIZES:
+        path = Path(dict_dir) / f"dict_{size}.txt"
+        write_dict(path, size, size)
+        dicts[f"dict{size}"] = str(path)
+    for dict_name, path in dicts.items():
+        for cls in [jieba_vim_rs.WordMotion, jieba_vim_rs.LazyWordMotion]:
+            record(
+                f"{cls.__name__}_{dict_name}",
+                lambda: time_construct(cls, path, False),
+            )
+        record(
+            f"LazyWordMotion_{dict_name}_first_motion",
+            lambda: time_construct(jieba_vim_rs.LazyWordMotion, path, True),
+        )
+    return times
+
+
+def find_regressions(times, baseline, threshold, min_delta):
+    """Return the names in ``times`` slower than in ``baseline`` by more than
+    ``threshold`` (relative) and ``min_delta`` seconds, with their baseline
+    and current times."""
+    regressions = []
+    for name, t in times.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if t > base * (1 + threshold) and t - base > min_delta:
+            regressions.append((name, base, t))
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--baseline",
+        default="startup_baseline.json",
+        help="the stored baseline (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="overwrite the baseline with the times of this run",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="where to write the times of this run as JSON",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="relative slowdown over the baseline considered a regression "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=1.0,
+        help="slowdowns of at most this many milliseconds are considered "
+        "noise (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="number of runs of each measurement, whose median is taken "
+        "(default: %(default)s)",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as dict_dir:
+        times = measure(args.repeat, dict_dir)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as outfile:
+            json.dump(times, outfile, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as outfile:
+            json.dump(times, outfile, indent=2)
+        print(f"saved the baseline to {args.baseline}", file=sys.stderr)
+        return
+
+    try:
+        with open(args.baseline, encoding="utf-8") as infile:
+            baseline = json.load(infile)
+    except FileNotFoundError:
+        sys.exit(
+            f"baseline {args.baseline} not found; record one with "
+            "--save-baseline"
+        )
+    regressions = find_regressions(
+        times, baseline, args.threshold, args.min_delta_ms / 1e3
+    )
+    for name, base, t in regressions:
+        print(
+            f"regression: {name}: {base * 1e3:.3f} ms -> {t * 1e3:.3f} ms",
+            file=sys.stderr,
+        )
+    if regressions:
+        sys.exit(1)
+    print("no regression", file=sys.stderr)
@@ -12,7 +12,7 @@
 -- License for the specific language governing permissions and limitations
 -- under the License.
 
-local M = { word_motion = nil }
+local M = { word_motion = nil, attached_buffers = {} }
 
 M.jieba_vim_rs = require("jieba_vim.jieba_vim_rs")
 
@@ -27,10 +27,14 @@ M.buffer = {
 
     lines = function()
         return vim.api.nvim_buf_line_count(0)
+    end,
+
+    bufnr = function()
+        return vim.api.nvim_get_current_buf()
     end
 }
 
-function M.init_word_motion(self, user_dict, isk, lazy)
+function M.init_word_motion(self, user_dict, isk, lazy, cache_capacity)
     if self.word_motion ~= nil then
         return ""
     end
@@ -50,10 +54,18 @@ function M.init_word_motion(self, user_dict, isk, lazy)
         return string.format("jieba_vim: failed to load user dict: %s", tostring(user_dict))
     end
 
+    if cache_capacity ~= nil then
+        wm:set_cache_capacity(tonumber(cache_capacity))
+    end
     self.word_motion = wm
     return ""
 end
 
+-- Start loading the lazy jieba dictionary in the background.
+function M.prewarm(self)
+    self.word_motion:prewarm()
+end
+
 function M.nmap(self, buffer, motion, cursor, count)
     return self.word_motion:nmap(buffer, motion, cursor, count)
 end
@@ -70,7 +82,13 @@ function M.imap(self, buffer, motion, cursor)
     return self.word_motion:imap(buffer, motion, cursor)
 end
 
-function M.preview_nmap(self, buffer, motion, cursor, preview_limit)
+-- If `batch_size` is given, return the stops in batches ready to be passed to
+-- `matchaddpos()`.
+function M.preview_nmap(self, buffer, motion, cursor, preview_limit, batch_size)
+    if batch_size ~= nil then
+        return self.word_motion:preview_nmap_batched(
+            buffer, motion, cursor, preview_limit, batch_size)
+    end
     return self.word_motion:preview_nmap(buffer, motion, cursor, preview_limit)
 end
 
@@ -78,4 +96,56 @@ function M.update_isk(self, isk)
     self.word_motion:set_isk(isk)
 end
 
+function M.on_lines(self, bufnr, first, last_old, last_new)
+    self.word_motion:on_lines(bufnr, first, last_old, last_new)
+end
+
+-- Keep the cached tokenized lines of buffer `bufnr` in sync with its edits.
+function M.attach(self, bufnr)
+    if self.attached_buffers[bufnr] then
+        return
+    end
+    local ok = vim.api.nvim_buf_attach(bufnr, false, {
+        on_lines = function(_, buf, _, first, last_old, last_new)
+            if self.word_motion ~= nil then
+                self:on_lines(buf, first, last_old, last_new)
+            end
+        end,
+        on_detach = function(_, buf)
+            self.attached_buffers[buf] = nil
+        end,
+    })
+    if ok then
+        self.attached_buffers[bufnr] = true
+    end
+end
+
+function M.cut_memo_stats(self)
+    return self.word_motion:cut_memo_stats()
+end
+
+-- Counters and timers of the motions, with times in seconds.
+function M.stats(self)
+    return self.word_motion:stats()
+end
+
+function M.reset_stats(self)
+    self.word_motion:reset_stats()
+end
+
+-- Load the snapshot of the cut memo under `dir`, if any.
+function M.load_cut_memo(self, dir)
+    -- A broken snapshot is overwritten by the next `save_cut_memo`.
+    pcall(self.word_motion.load_cut_memo, self.word_motion, dir)
+end
+
+-- Save the cut memo as a snapshot under `dir`, unless nothing has been cut
+-- since it was loaded.
+function M.save_cut_memo(self, dir)
+    if self.word_motion:cut_memo_stats().misses == 0 then
+        return
+    end
+    pcall(self.word_motion.save_cut_memo, self.word_motion, dir)
+end
+
 return M
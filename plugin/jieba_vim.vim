@@ -27,12 +27,38 @@ endif
 let g:loaded_jieba_vim = 1
 ""
 " (默认 1)：是/否 (1/0) 延迟加载 jieba 词典直到有中文出现。
+" 启用时，窗口中出现中文后 (|BufReadPost|, |CursorHold|) 即在后台加载词典。
 let g:jieba_vim_lazy = get(g:, 'jieba_vim_lazy', 1)
 
+""
+" (默认 1)：延迟加载词典时，是/否 (1/0) 在窗口中出现中文后即在后台加载词典。设为 0
+" 则直到跳转需要时才加载，可与 |g:jieba_vim_cut_memo_dir| 配合以减少内存占用。
+let g:jieba_vim_prewarm = get(g:, 'jieba_vim_prewarm', 1)
+
 ""
 " (默认空)：若为非空字符串，加载此文件路径所指向的用户自定义词典。
 let g:jieba_vim_user_dict = get(g:, 'jieba_vim_user_dict', '')
 
+""
+" (默认 16)：跨跳转缓存的分词结果所占内存上限 (MiB)，超出时淘汰最久未用的行。设为 0
+" 则不缓存。
+let g:jieba_vim_cache_capacity = get(g:, 'jieba_vim_cache_capacity', 16)
+
+if has("nvim")
+    let s:cache_home = stdpath("cache")
+elseif !empty($XDG_CACHE_HOME)
+    let s:cache_home = $XDG_CACHE_HOME
+else
+    let s:cache_home = expand("~/.cache")
+endif
+""
+" (默认 Neovim 为 stdpath('cache')/jieba.vim，Vim 为 $XDG_CACHE_HOME/jieba.vim，
+" 未设置 $XDG_CACHE_HOME 时为 ~/.cache/jieba.vim)：延迟加载词典时，在此目录保存 jieba
+" 的分词结果，供之后启动的 Vim 直接使用，从而在词典加载前即可跳转。保存的只是分词结
+" 果而非词典，遇到未见过的中文时仍需加载词典。设为空字符串则不保存。
+let g:jieba_vim_cut_memo_dir = get(g:, 'jieba_vim_cut_memo_dir',
+    \ s:cache_home . "/jieba.vim")
+
 
 ""
 " (默认 0)：是/否 (1/0) 自动开启 keymap（不包含预览）。
@@ -86,7 +112,8 @@ function! s:InitWordMotion() abort
     if !s:loaded_jieba_vim_cdylib
         return
     endif
-    let l:args = [g:jieba_vim_user_dict, &iskeyword, str2nr(g:jieba_vim_lazy)]
+    let l:args = [g:jieba_vim_user_dict, &iskeyword, str2nr(g:jieba_vim_lazy),
+        \ str2nr(g:jieba_vim_cache_capacity) * 1024 * 1024]
     if has("nvim")
         let l:init_word_motion_err = luaeval("jieba_vim:init_word_motion(unpack(_A))", l:args)
         if l:init_word_motion_err !=# ""
@@ -102,8 +129,42 @@ function! s:InitWordMotion() abort
         endif
     endif
     let s:loaded_jieba_vim_word_motion = 1
+    call s:LoadCutMemo()
+endfunction
+
+function! s:UseCutMemoSnapshot()
+    return str2nr(g:jieba_vim_lazy) && !empty(g:jieba_vim_cut_memo_dir)
+endfunction
+
+function! s:LoadCutMemo()
+    if !s:UseCutMemoSnapshot()
+        return
+    endif
+    let l:args = [g:jieba_vim_cut_memo_dir]
+    if has("nvim")
+        call luaeval("jieba_vim:load_cut_memo(unpack(_A))", l:args)
+    else
+        call py3eval("jieba_vim.navigation.load_cut_memo(*vim.eval('l:args'))")
+    endif
 endfunction
 
+function! s:SaveCutMemo()
+    if !s:loaded_jieba_vim_word_motion || !s:UseCutMemoSnapshot()
+        return
+    endif
+    let l:args = [g:jieba_vim_cut_memo_dir]
+    if has("nvim")
+        call luaeval("jieba_vim:save_cut_memo(unpack(_A))", l:args)
+    else
+        call py3eval("jieba_vim.navigation.save_cut_memo(*vim.eval('l:args'))")
+    endif
+endfunction
+
+augroup jieba_vim_cut_memo
+    autocmd!
+    autocmd VimLeavePre * call s:SaveCutMemo()
+augroup END
+
 let s:loaded_jieba_vim_word_motion = 0
 call s:InitWordMotion()
 
@@ -111,6 +172,49 @@ call s:InitWordMotion()
 " 取消按词跳转位置预览
 command! JiebaPreviewCancel call <SID>JiebaPreviewCancel()
 
+""
+" 显示按词跳转的调用次数、耗时与缓存统计。加 [!] 则在显示后清零
+command! -bang JiebaStats call <SID>JiebaStats(<bang>0)
+
+function! s:JiebaStats(reset)
+    if !s:loaded_jieba_vim_word_motion
+        echoerr "jieba.vim: word_motion uninitialized; check jieba_vim config"
+        return
+    endif
+    if has("nvim")
+        let l:stats = luaeval("jieba_vim:stats()")
+    else
+        let l:stats = py3eval("jieba_vim.navigation.stats()")
+    endif
+    echo "calls:"
+    " An empty Lua table is converted to an empty list.
+    if type(l:stats.calls) == v:t_dict
+        for l:kind in sort(keys(l:stats.calls))
+            echo printf("  %-20s %d", l:kind, l:stats.calls[l:kind])
+        endfor
+    endif
+    echo printf("call time:            %.3f s", l:stats.call_time)
+    echo printf("buffer fetch time:    %.3f s", l:stats.fetch_time)
+    echo printf("tokenization time:    %.3f s", l:stats.tokenize_time)
+    echo printf("jieba cut time:       %.3f s", l:stats.cut_time)
+    " The dictionary load time is nil (None) until the lazy dictionary loads.
+    let l:load_time = get(l:stats, "dict_load_time", "")
+    echo "dictionary load time: " . (type(l:load_time) == v:t_float
+        \ ? printf("%.3f s", l:load_time) : "not loaded")
+    echo printf("lines parsed:         %d (%.1f per call)",
+        \ l:stats.lines_parsed, l:stats.lines_parsed_per_call)
+    echo printf("cache hits:           %d", l:stats.cache_hits)
+    echo printf("cache misses:         %d", l:stats.cache_misses)
+    echo printf("cache evictions:      %d", l:stats.cache_evictions)
+    if a:reset
+        if has("nvim")
+            lua jieba_vim:reset_stats()
+        else
+            py3 jieba_vim.navigation.reset_stats()
+        endif
+    endif
+endfunction
+
 let s:motions = ["w", "W", "e", "E", "b", "B", "ge", "gE"]
 let s:objects = ["iw", "iW", "aw", "aW"]
 
@@ -140,8 +244,16 @@ let s:objects = ["iw", "iW", "aw", "aW"]
 " 如果用户安装了 `tpope/vim-repeat` (https://github.com/tpope/vim-repeat)，可使用 |.|
 " 重复上一次 word operation。例如 `dw.` 相当于 `dwdw`。
 
+function s:ClearPreviewMatches()
+    for l:id in get(w:, "jieba_vim_preview_matches", [])
+        silent! call matchdelete(l:id)
+    endfor
+    let w:jieba_vim_preview_matches = []
+endfunction
+
 function s:JiebaPreviewCancel()
     execute "hi clear JiebaPreview"
+    call s:ClearPreviewMatches()
 endfunction
 
 function s:JiebaModelPreview(...)
@@ -151,6 +263,7 @@ function s:JiebaModelPreview(...)
     if !s:loaded_jieba_vim_word_motion
         throw "word_motion uninitialized; check jieba_vim config"
     endif
+    call s:FlushLines()
 
     if has("nvim")
         return luaeval("jieba_vim:preview_nmap(jieba_vim.buffer, unpack(_A))",
@@ -171,17 +284,15 @@ function! s:JiebaPreview(motion)
     if l:limit < 0
         let l:limit = 99999
     endif
-    let l:cursor_positions = s:JiebaModelPreview(a:motion, getcurpos(), l:limit)
-    if empty(l:cursor_positions)
-        call s:JiebaPreviewCancel()
-    else
+    " Each batch holds at most 8 positions, the most that matchaddpos() takes
+    " before patch-8.1.0362.
+    let l:batches = s:JiebaModelPreview(a:motion, getcurpos(), l:limit, 8)
+    call s:JiebaPreviewCancel()
+    if !empty(l:batches)
         execute "hi link JiebaPreview IncSearch"
-        let l:pattern = '%' . l:cursor_positions[0][1] . 'c%' . l:cursor_positions[0][0] . 'l'
-        for pos in l:cursor_positions[1:]
-            let l:pattern .= '|%' . pos[1] . 'c%' . pos[0] . 'l'
-        endfor
-        for pos in l:cursor_positions
-            execute 'match JiebaPreview /\v' . l:pattern . '/'
+        for l:batch in l:batches
+            call add(w:jieba_vim_preview_matches,
+                \ matchaddpos("JiebaPreview", l:batch))
         endfor
     endif
 endfunction
@@ -198,6 +309,7 @@ function! JiebaModelNmap(...)
     if !s:loaded_jieba_vim_word_motion
         throw "word_motion uninitialized; check jieba_vim config"
     endif
+    call s:FlushLines()
 
     if has("nvim")
         return luaeval("jieba_vim:nmap(jieba_vim.buffer, unpack(_A))", a:000)
@@ -214,6 +326,7 @@ function! JiebaModelXmap(...)
     if !s:loaded_jieba_vim_word_motion
         throw "word_motion uninitialized; check jieba_vim config"
     endif
+    call s:FlushLines()
 
     if has("nvim")
         return luaeval("jieba_vim:xmap(jieba_vim.buffer, unpack(_A))", a:000)
@@ -230,6 +343,7 @@ function! JiebaModelOmap(...)
     if !s:loaded_jieba_vim_word_motion
         throw "word_motion uninitialized; check jieba_vim config"
     endif
+    call s:FlushLines()
 
     if has("nvim")
         return luaeval("jieba_vim:omap(jieba_vim.buffer, unpack(_A))", a:000)
@@ -246,6 +360,7 @@ function! JiebaModelImap(...)
     if !s:loaded_jieba_vim_word_motion
         throw "word_motion uninitialized; check jieba_vim config"
     endif
+    call s:FlushLines()
 
     if has("nvim")
         return luaeval("jieba_vim:imap(jieba_vim.buffer, unpack(_A))", a:000)
@@ -632,6 +747,65 @@ augroup jieba_vim_update_isk
     autocmd OptionSet iskeyword call s:UpdateIsk()
 augroup END
 
+function! s:OnLines(bufnr, start, end, added, changes)
+    if !s:loaded_jieba_vim_word_motion
+        return
+    endif
+    " Lines [start, end) (1-indexed) before the change now span
+    " [start, end + added).
+    let l:args = [a:bufnr, a:start - 1, a:end - 1, a:end - 1 + a:added]
+    call py3eval("jieba_vim.navigation.on_lines(*vim.eval('l:args'))")
+endfunction
+
+function! s:AttachBuffer()
+    if !s:loaded_jieba_vim_word_motion
+        return
+    endif
+    if has("nvim")
+        lua jieba_vim:attach(vim.api.nvim_get_current_buf())
+    elseif exists("*listener_add") && !exists("b:jieba_vim_listener")
+        let b:jieba_vim_listener = listener_add(function("s:OnLines"))
+    endif
+endfunction
+
+" Vim defers the change callbacks until redraw. Run them now so that the
+" cached tokenized lines are in sync before computing a motion.
+function! s:FlushLines()
+    if !has("nvim") && exists("b:jieba_vim_listener")
+        silent! call listener_flush()
+    endif
+endfunction
+
+augroup jieba_vim_on_lines
+    autocmd!
+    autocmd BufEnter * call s:AttachBuffer()
+augroup END
+
+" Load the lazy jieba dictionary in the background once 汉字 show up in the
+" window, so that the first motion over them does not stall.
+function! s:Prewarm()
+    if !s:loaded_jieba_vim_word_motion
+        return
+    endif
+    let l:lines = getline(line("w0"), line("w$"))
+    if match(l:lines, '[\u4e00-\u9fff]') < 0
+        return
+    endif
+    if has("nvim")
+        lua jieba_vim:prewarm()
+    else
+        py3 jieba_vim.navigation.prewarm()
+    endif
+    autocmd! jieba_vim_prewarm
+endfunction
+
+augroup jieba_vim_prewarm
+    autocmd!
+    if str2nr(g:jieba_vim_lazy) && str2nr(g:jieba_vim_prewarm)
+        autocmd BufReadPost,CursorHold * call s:Prewarm()
+    endif
+augroup END
+
 
 " Reference: https://github.com/junegunn/fzf/blob/master/plugin/fzf.vim
 function! jieba_vim#install()
@@ -27,12 +27,14 @@ def ints(arr):
     return [int(x) for x in arr]
 
 
-def init_word_motion(user_dict, isk, lazy):
+def init_word_motion(user_dict, isk, lazy, cache_capacity=None):
     """Return error message. Empty error message means no error."""
     if not user_dict:
         user_dict = None
     isk = as_bytes(isk)
     lazy = bool(int(lazy))
+    if cache_capacity is not None:
+        cache_capacity = int(cache_capacity)
 
     global word_motion
     if word_motion is not None:
@@ -44,6 +46,13 @@ def init_word_motion(user_dict, isk, lazy):
             word_motion = jieba_vim_rs.WordMotion(isk, user_dict)
     except (IOError, ValueError):
         return f"jieba.vim: failed to load user dict: {user_dict}"
+    if cache_capacity is not None:
+        word_motion.set_cache_capacity(cache_capacity)
+
+
+def prewarm():
+    """Start loading the lazy jieba dictionary in the background."""
+    word_motion.prewarm()
 
 
 def nmap(buffer, motion, cursor, count):
@@ -81,13 +90,108 @@ def imap(buffer, motion, cursor):
     return word_motion.imap(buffer, motion, cursor)
 
 
-def preview_nmap(buffer, motion, cursor, preview_limit):
+def preview_nmap(buffer, motion, cursor, preview_limit, batch_size=None):
+    """Return the stops of ``motion`` as a list of ``[lnum, col]``. If
+    ``batch_size`` is given, return instead lists of at most ``batch_size``
+    ``[lnum, col, len]``, each ready to be passed to ``matchaddpos()``."""
     motion = as_bytes(motion)
     cursor = ints(cursor)
     preview_limit = int(preview_limit)
-    return word_motion.preview_nmap(buffer, motion, cursor, preview_limit)
+    if batch_size is None:
+        return word_motion.preview_nmap(buffer, motion, cursor, preview_limit)
+    batch_size = int(batch_size)
+    return word_motion.preview_nmap_batched(
+        buffer, motion, cursor, preview_limit, batch_size
+    )
+
+
+def tokenize_lines(buffer, first=1, last=None, word=True):
+    """Return the byte offsets of the non-space tokens in lines
+    ``first..last`` (1-indexed) of ``buffer`` as ``(bounds, index)``, two
+    ``array('I')``. The tokens of the i-th line span bytes ``bounds[2 * j]``
+    to ``bounds[2 * j + 1]`` (0-indexed, end exclusive) for ``j`` in
+    ``range(index[i], index[i + 1])``."""
+    first = int(first)
+    if last is not None:
+        last = int(last)
+    return word_motion.tokenize_lines(buffer, first, last, bool(word))
+
+
+def fill_cache(buffer, first=1, last=None, word=True, threads=None):
+    """Tokenize lines ``first..last`` (1-indexed) of ``buffer`` on
+    ``threads`` threads (as many as there are cores if ``None``) to warm the
+    cache of tokenized lines. Return ``(cached, skipped)``, the numbers of
+    lines cached, and of lines tokenized but too large to cache."""
+    first = int(first)
+    if last is not None:
+        last = int(last)
+    if threads is not None:
+        threads = int(threads)
+    return word_motion.fill_cache(buffer, first, last, bool(word), threads)
+
+
+def word_count(buffer, first=1, last=None, word=True):
+    """Return the number of words (``WORD``s if ``word`` is false) in lines
+    ``first..last`` (1-indexed) of ``buffer``, where a run of Hanzi counts as
+    the words jieba cuts it into. Lines counted before are not read again
+    unless changed, as told by ``on_lines``."""
+    first = int(first)
+    if last is not None:
+        last = int(last)
+    return word_motion.word_count(buffer, first, last, bool(word))
 
 
 def update_isk(isk):
     isk = as_bytes(isk)
     word_motion.set_isk(isk)
+
+
+def on_lines(bufnr, first, last_old, last_new):
+    """Notify that lines ``first..last_old`` (0-indexed, end exclusive) in
+    buffer ``bufnr`` have been replaced by lines ``first..last_new``."""
+    bufnr = int(bufnr)
+    first = int(first)
+    last_old = int(last_old)
+    last_new = int(last_new)
+    word_motion.on_lines(bufnr, first, last_old, last_new)
+
+
+def cut_memo_stats():
+    return word_motion.cut_memo_stats()
+
+
+def stats():
+    """Return the counters and timers of the motions as a dict, with times
+    in seconds."""
+    return word_motion.stats()
+
+
+def reset_stats():
+    word_motion.reset_stats()
+
+
+def set_tracer(tracer=None):
+    """Trace the phases of the motions with ``tracer``, a callable passed
+    each trace event as a dict, or a file path where the events are written
+    as Chrome trace JSON. ``None`` disables tracing."""
+    word_motion.set_tracer(tracer)
+
+
+def load_cut_memo(directory):
+    """Load the snapshot of the cut memo under ``directory``, if any."""
+    try:
+        word_motion.load_cut_memo(directory)
+    except OSError:
+        # A broken snapshot is overwritten by the next `save_cut_memo`.
+        pass
+
+
+def save_cut_memo(directory):
+    """Save the cut memo as a snapshot under ``directory``, unless nothing
+    has been cut since it was loaded."""
+    if word_motion.cut_memo_stats()["misses"] == 0:
+        return
+    try:
+        word_motion.save_cut_memo(directory)
+    except OSError:
+        pass
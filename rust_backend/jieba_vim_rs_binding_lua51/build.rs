@@ -1,3 +1,7 @@
+use std::env;
+use std::fs;
+use std::path::Path;
+
 #[cfg(target_os = "macos")]
 fn add_extension_module_link_args() {
     println!("cargo::rustc-link-arg=-undefined");
@@ -9,4 +13,29 @@ fn add_extension_module_link_args() {}
 
 fn main() {
     add_extension_module_link_args();
+    set_jieba_rs_version();
+}
+
+/// Expose the version of jieba-rs locked for this workspace as
+/// `JIEBA_RS_VERSION`, which keys the snapshots of the cut memo.
+fn set_jieba_rs_version() {
+    let lock_path = Path::new(&env::var("CARGO_MANIFEST_DIR").unwrap())
+        .join("../Cargo.lock");
+    println!("cargo::rerun-if-changed={}", lock_path.display());
+    let lock = fs::read_to_string(&lock_path).unwrap_or_else(|err| {
+        panic!("cannot read {}: {}", lock_path.display(), err)
+    });
+    let mut lines = lock.lines();
+    while let Some(line) = lines.next() {
+        if line == "name = \"jieba-rs\"" {
+            let version = lines
+                .next()
+                .and_then(|line| line.strip_prefix("version = \""))
+                .and_then(|version| version.strip_suffix('"'))
+                .expect("malformed jieba-rs package in Cargo.lock");
+            println!("cargo::rustc-env=JIEBA_RS_VERSION={}", version);
+            return;
+        }
+    }
+    panic!("jieba-rs is not in {}", lock_path.display());
 }
@@ -12,7 +12,6 @@
 // License for the specific language governing permissions and limitations
 // under the License.
 
-mod preview;
 mod wrappers;
 
 use mlua::{self, Lua, Table};
@@ -14,18 +14,19 @@
 
 use std::fs::File;
 use std::io::BufReader;
-use std::sync::OnceLock;
+use std::path::Path;
+use std::sync::{Arc, Once, OnceLock};
+use std::thread;
+use std::time::{Duration, Instant};
 
 use jieba_rs::Jieba;
 use jieba_vim_rs_core::BufferLike;
 use jieba_vim_rs_core::motion::{
-    ImapOutput, NmapOutput, OmapOutput, WordMotion, XmapOutput,
+    ImapOutput, MotionStats, NmapOutput, OmapOutput, WordMotion, XmapOutput,
 };
-use jieba_vim_rs_core::token::{JiebaPlaceholder, Tokenizer};
+use jieba_vim_rs_core::token::{CutMemoStats, JiebaPlaceholder, Tokenizer};
 use mlua::{IntoLua, Lua, ObjectLike, Table, UserData, UserDataMethods, Value};
 
-use crate::preview;
-
 struct TableBufferWrapper(Table);
 
 impl BufferLike for TableBufferWrapper {
@@ -35,11 +36,35 @@ impl BufferLike for TableBufferWrapper {
         self.0.call_function("getline", lnum)
     }
 
+    fn with_line<R, F: FnOnce(&str) -> R>(
+        &self,
+        lnum: usize,
+        f: F,
+    ) -> Result<R, Self::Error> {
+        let line: mlua::String = self.0.call_function("getline", lnum)?;
+        // Borrow the string from the Lua state.
+        Ok(f(&line.to_str()?))
+    }
+
     fn lines(&self) -> Result<usize, Self::Error> {
         self.0.call_function("lines", ())
     }
+
+    fn bufnr(&self) -> Result<usize, Self::Error> {
+        if self.0.contains_key("bufnr")? {
+            self.0.call_function("bufnr", ())
+        } else {
+            Ok(0)
+        }
+    }
 }
 
+/// Identifies the jieba behind [`JiebaWrapper`] and [`LazyJiebaWrapper`] in
+/// the snapshots of the cut memo, which must not be loaded by another version
+/// of jieba-rs or with another cut mode.
+const CUTTER_ID: &str =
+    concat!("jieba-rs ", env!("JIEBA_RS_VERSION"), " cut hmm");
+
 struct JiebaWrapper(Jieba);
 
 impl JiebaPlaceholder for JiebaWrapper {
@@ -52,12 +77,45 @@ impl JiebaPlaceholder for JiebaWrapper {
     }
 }
 
+#[derive(Clone)]
 struct LazyJiebaWrapper {
     path: Option<String>,
-    jieba: OnceLock<Jieba>,
+    jieba: Arc<OnceLock<Jieba>>,
+    prewarm: Arc<Once>,
+    /// Time taken to load the dictionary, once loaded.
+    load_time: Arc<OnceLock<Duration>>,
 }
 
 impl LazyJiebaWrapper {
+    fn new(path: Option<String>) -> Self {
+        Self {
+            path,
+            jieba: Arc::new(OnceLock::new()),
+            prewarm: Arc::new(Once::new()),
+            load_time: Arc::new(OnceLock::new()),
+        }
+    }
+
+    fn get_jieba(&self) -> &Jieba {
+        self.jieba.get_or_init(|| {
+            let start = Instant::now();
+            let jieba = self.init_jieba();
+            let _ = self.load_time.set(start.elapsed());
+            jieba
+        })
+    }
+
+    /// Initialize jieba on a background thread, at most once. A cut made
+    /// before the initialization finishes blocks until it finishes.
+    fn prewarm(&self) {
+        self.prewarm.call_once(|| {
+            let this = self.clone();
+            thread::spawn(move || {
+                this.get_jieba();
+            });
+        });
+    }
+
     fn init_jieba(&self) -> Jieba {
         match &self.path {
             None => Jieba::new(),
@@ -79,8 +137,7 @@ impl LazyJiebaWrapper {
 
 impl JiebaPlaceholder for LazyJiebaWrapper {
     fn cut_hmm_into_char_counts(&self, sentence: &str) -> Vec<usize> {
-        self.jieba
-            .get_or_init(|| self.init_jieba())
+        self.get_jieba()
             .cut(sentence, true)
             .into_iter()
             .map(|token| token.end - token.start)
@@ -141,8 +198,52 @@ impl IntoLua for ImapOutputWrapper {
     }
 }
 
+pub struct CutMemoStatsWrapper(CutMemoStats);
+
+impl IntoLua for CutMemoStatsWrapper {
+    fn into_lua(self, lua: &Lua) -> mlua::Result<Value> {
+        let table = lua.create_table()?;
+        table.set("hits", self.0.hits)?;
+        table.set("misses", self.0.misses)?;
+        table.set("entries", self.0.entries)?;
+        table.set("size", self.0.size)?;
+        Ok(Value::Table(table))
+    }
+}
+
+/// The counters and timers of a word motion, and the time taken to load the
+/// jieba dictionary, if loaded.
+pub struct MotionStatsWrapper(MotionStats, Option<Duration>);
+
+impl IntoLua for MotionStatsWrapper {
+    fn into_lua(self, lua: &Lua) -> mlua::Result<Value> {
+        let Self(stats, dict_load_time) = self;
+        let total_calls = stats.total_calls();
+        let table = lua.create_table()?;
+        table.set("calls", lua.create_table_from(stats.calls)?)?;
+        // Times are in seconds.
+        table.set("call_time", stats.call_time.as_secs_f64())?;
+        table.set("fetch_time", stats.parse.fetch_time.as_secs_f64())?;
+        table.set("tokenize_time", stats.parse.tokenize_time.as_secs_f64())?;
+        table.set("cut_time", stats.cut_time.as_secs_f64())?;
+        table.set("dict_load_time", dict_load_time.map(|t| t.as_secs_f64()))?;
+        table.set("lines_parsed", stats.parse.lines_parsed)?;
+        table.set(
+            "lines_parsed_per_call",
+            stats.parse.lines_parsed as f64 / total_calls.max(1) as f64,
+        )?;
+        table.set("cache_hits", stats.parse.hits)?;
+        table.set("cache_misses", stats.parse.misses)?;
+        table.set("cache_evictions", stats.parse.evictions)?;
+        Ok(Value::Table(table))
+    }
+}
+
 pub struct WordMotionWrapper {
     wm: WordMotion<JiebaWrapper>,
+    path: Option<String>,
+    /// Time taken to load the jieba dictionary.
+    dict_load_time: Duration,
 }
 
 impl WordMotionWrapper {
@@ -150,11 +251,12 @@ impl WordMotionWrapper {
         _lua: &Lua,
         (isk_option, path): (String, Option<String>),
     ) -> mlua::Result<Self> {
-        let jieba = match path {
+        let start = Instant::now();
+        let jieba = match &path {
             None => Jieba::new(),
             Some(path) => {
                 let mut reader =
-                    BufReader::new(File::open(&path).map_err(|_| {
+                    BufReader::new(File::open(path).map_err(|_| {
                         mlua::Error::runtime(format!(
                             "jieba_vim: failed to open file: {}",
                             path
@@ -168,6 +270,7 @@ impl WordMotionWrapper {
                 })?
             }
         };
+        let dict_load_time = start.elapsed();
         let tokenizer =
             Tokenizer::try_new(JiebaWrapper(jieba), isk_option.as_bytes())
                 .map_err(|_| {
@@ -178,6 +281,8 @@ impl WordMotionWrapper {
                 })?;
         Ok(Self {
             wm: WordMotion::new(tokenizer),
+            path,
+            dict_load_time,
         })
     }
 
@@ -197,6 +302,91 @@ impl WordMotionWrapper {
             })
     }
 
+    fn set_cache_capacity(
+        _lua: &Lua,
+        this: &mut Self,
+        capacity: usize,
+    ) -> mlua::Result<()> {
+        this.wm.set_cache_capacity(capacity);
+        Ok(())
+    }
+
+    fn clear_cache(_lua: &Lua, this: &mut Self, _: ()) -> mlua::Result<()> {
+        this.wm.clear_cache();
+        Ok(())
+    }
+
+    fn on_lines(
+        _lua: &Lua,
+        this: &mut Self,
+        (bufnr, first, last_old, last_new): (usize, usize, usize, usize),
+    ) -> mlua::Result<()> {
+        this.wm.on_lines(bufnr, first, last_old, last_new);
+        Ok(())
+    }
+
+    fn set_cut_memo_capacity(
+        _lua: &Lua,
+        this: &mut Self,
+        capacity: usize,
+    ) -> mlua::Result<()> {
+        this.wm.set_cut_memo_capacity(capacity);
+        Ok(())
+    }
+
+    fn cut_memo_stats(
+        _lua: &Lua,
+        this: &Self,
+        _: (),
+    ) -> mlua::Result<CutMemoStatsWrapper> {
+        Ok(CutMemoStatsWrapper(this.wm.cut_memo_stats()))
+    }
+
+    fn stats(
+        _lua: &Lua,
+        this: &Self,
+        _: (),
+    ) -> mlua::Result<MotionStatsWrapper> {
+        Ok(MotionStatsWrapper(
+            this.wm.stats(),
+            Some(this.dict_load_time),
+        ))
+    }
+
+    fn reset_stats(_lua: &Lua, this: &mut Self, _: ()) -> mlua::Result<()> {
+        this.wm.reset_stats();
+        Ok(())
+    }
+
+    fn load_cut_memo(
+        _lua: &Lua,
+        this: &mut Self,
+        dir: String,
+    ) -> mlua::Result<bool> {
+        this.wm
+            .load_cut_memo_snapshot(
+                Path::new(&dir),
+                this.path.as_deref().map(Path::new),
+                CUTTER_ID,
+            )
+            .map_err(mlua::Error::external)
+    }
+
+    fn save_cut_memo(_lua: &Lua, this: &Self, dir: String) -> mlua::Result<()> {
+        this.wm
+            .save_cut_memo_snapshot(
+                Path::new(&dir),
+                this.path.as_deref().map(Path::new),
+                CUTTER_ID,
+            )
+            .map_err(mlua::Error::external)
+    }
+
+    /// Do nothing, since jieba has been loaded on construction.
+    fn prewarm(_lua: &Lua, _this: &Self, _: ()) -> mlua::Result<()> {
+        Ok(())
+    }
+
     fn nmap(
         _lua: &Lua,
         this: &mut Self,
@@ -321,20 +511,10 @@ impl WordMotionWrapper {
         let buffer = TableBufferWrapper(buffer);
         let mut cursor_arr = [0usize; 4];
         cursor_arr.copy_from_slice(&cursor[..4]);
-        let [_, lnum, col, _] = cursor_arr;
-        let preview_positions = preview::preview(
-            |b, (lnum, col)| {
-                let output = this.wm.nmap(
-                    b,
-                    motion.as_bytes(),
-                    [0, lnum, col, 0, col],
-                    1,
-                )?;
-                let [_, lnum, col, _] = output.cursor;
-                Ok((lnum, col))
-            },
+        let preview_positions = this.wm.preview_nmap(
             &buffer,
-            (lnum, col),
+            &motion.as_bytes(),
+            cursor_arr,
             preview_limit,
         )?;
         Ok(preview_positions
@@ -342,21 +522,65 @@ impl WordMotionWrapper {
             .map(|(lnum, col)| [lnum, col])
             .collect())
     }
+
+    fn preview_nmap_batched(
+        _lua: &Lua,
+        this: &mut Self,
+        (buffer, motion, cursor, preview_limit, batch_size): (
+            Table,
+            String,
+            Vec<usize>,
+            usize,
+            usize,
+        ),
+    ) -> mlua::Result<Vec<Vec<[usize; 3]>>> {
+        if cursor.len() < 4 {
+            return Err(mlua::Error::runtime(
+                "cursor must contain at least 4 elements",
+            ));
+        }
+        let buffer = TableBufferWrapper(buffer);
+        let mut cursor_arr = [0usize; 4];
+        cursor_arr.copy_from_slice(&cursor[..4]);
+        this.wm.preview_nmap_batched(
+            &buffer,
+            &motion.as_bytes(),
+            cursor_arr,
+            preview_limit,
+            batch_size,
+        )
+    }
 }
 
 impl UserData for WordMotionWrapper {
     fn add_methods<M: UserDataMethods<Self>>(methods: &mut M) {
         methods.add_method_mut("set_isk", Self::set_isk);
+        methods.add_method_mut("set_cache_capacity", Self::set_cache_capacity);
+        methods.add_method_mut("clear_cache", Self::clear_cache);
+        methods.add_method_mut("on_lines", Self::on_lines);
+        methods.add_method_mut(
+            "set_cut_memo_capacity",
+            Self::set_cut_memo_capacity,
+        );
+        methods.add_method("cut_memo_stats", Self::cut_memo_stats);
+        methods.add_method("stats", Self::stats);
+        methods.add_method_mut("reset_stats", Self::reset_stats);
+        methods.add_method_mut("load_cut_memo", Self::load_cut_memo);
+        methods.add_method("save_cut_memo", Self::save_cut_memo);
+        methods.add_method("prewarm", Self::prewarm);
         methods.add_method_mut("nmap", Self::nmap);
         methods.add_method_mut("xmap", Self::xmap);
         methods.add_method_mut("omap", Self::omap);
         methods.add_method_mut("imap", Self::imap);
         methods.add_method_mut("preview_nmap", Self::preview_nmap);
+        methods
+            .add_method_mut("preview_nmap_batched", Self::preview_nmap_batched);
     }
 }
 
 pub struct LazyWordMotionWrapper {
     wm: WordMotion<LazyJiebaWrapper>,
+    jieba: LazyJiebaWrapper,
 }
 
 impl LazyWordMotionWrapper {
@@ -373,19 +597,19 @@ impl LazyWordMotionWrapper {
                 ))
             })?;
         }
-        let jieba = LazyJiebaWrapper {
-            path,
-            jieba: OnceLock::new(),
-        };
-        let tokenizer = Tokenizer::try_new(jieba, isk_option.as_bytes())
-            .map_err(|_| {
-                mlua::Error::runtime(format!(
-                    "jieba_vim: failed to parse isk: {}",
-                    isk_option
-                ))
-            })?;
+        let jieba = LazyJiebaWrapper::new(path);
+        let tokenizer =
+            Tokenizer::try_new(jieba.clone(), isk_option.as_bytes()).map_err(
+                |_| {
+                    mlua::Error::runtime(format!(
+                        "jieba_vim: failed to parse isk: {}",
+                        isk_option
+                    ))
+                },
+            )?;
         Ok(Self {
             wm: WordMotion::new(tokenizer),
+            jieba,
         })
     }
 
@@ -405,6 +629,93 @@ impl LazyWordMotionWrapper {
             })
     }
 
+    fn set_cache_capacity(
+        _lua: &Lua,
+        this: &mut Self,
+        capacity: usize,
+    ) -> mlua::Result<()> {
+        this.wm.set_cache_capacity(capacity);
+        Ok(())
+    }
+
+    fn clear_cache(_lua: &Lua, this: &mut Self, _: ()) -> mlua::Result<()> {
+        this.wm.clear_cache();
+        Ok(())
+    }
+
+    fn on_lines(
+        _lua: &Lua,
+        this: &mut Self,
+        (bufnr, first, last_old, last_new): (usize, usize, usize, usize),
+    ) -> mlua::Result<()> {
+        this.wm.on_lines(bufnr, first, last_old, last_new);
+        Ok(())
+    }
+
+    fn set_cut_memo_capacity(
+        _lua: &Lua,
+        this: &mut Self,
+        capacity: usize,
+    ) -> mlua::Result<()> {
+        this.wm.set_cut_memo_capacity(capacity);
+        Ok(())
+    }
+
+    fn cut_memo_stats(
+        _lua: &Lua,
+        this: &Self,
+        _: (),
+    ) -> mlua::Result<CutMemoStatsWrapper> {
+        Ok(CutMemoStatsWrapper(this.wm.cut_memo_stats()))
+    }
+
+    fn stats(
+        _lua: &Lua,
+        this: &Self,
+        _: (),
+    ) -> mlua::Result<MotionStatsWrapper> {
+        Ok(MotionStatsWrapper(
+            this.wm.stats(),
+            this.jieba.load_time.get().copied(),
+        ))
+    }
+
+    fn reset_stats(_lua: &Lua, this: &mut Self, _: ()) -> mlua::Result<()> {
+        this.wm.reset_stats();
+        Ok(())
+    }
+
+    fn load_cut_memo(
+        _lua: &Lua,
+        this: &mut Self,
+        dir: String,
+    ) -> mlua::Result<bool> {
+        this.wm
+            .load_cut_memo_snapshot(
+                Path::new(&dir),
+                this.jieba.path.as_deref().map(Path::new),
+                CUTTER_ID,
+            )
+            .map_err(mlua::Error::external)
+    }
+
+    fn save_cut_memo(_lua: &Lua, this: &Self, dir: String) -> mlua::Result<()> {
+        this.wm
+            .save_cut_memo_snapshot(
+                Path::new(&dir),
+                this.jieba.path.as_deref().map(Path::new),
+                CUTTER_ID,
+            )
+            .map_err(mlua::Error::external)
+    }
+
+    /// Load jieba on a background thread. A motion made before the loading
+    /// finishes waits for it to finish.
+    fn prewarm(_lua: &Lua, this: &Self, _: ()) -> mlua::Result<()> {
+        this.jieba.prewarm();
+        Ok(())
+    }
+
     fn nmap(
         _lua: &Lua,
         this: &mut Self,
@@ -529,20 +840,10 @@ impl LazyWordMotionWrapper {
         let buffer = TableBufferWrapper(buffer);
         let mut cursor_arr = [0usize; 4];
         cursor_arr.copy_from_slice(&cursor[..4]);
-        let [_, lnum, col, _] = cursor_arr;
-        let preview_positions = preview::preview(
-            |b, (lnum, col)| {
-                let output = this.wm.nmap(
-                    b,
-                    motion.as_bytes(),
-                    [0, lnum, col, 0, col],
-                    1,
-                )?;
-                let [_, lnum, col, _] = output.cursor;
-                Ok((lnum, col))
-            },
+        let preview_positions = this.wm.preview_nmap(
             &buffer,
-            (lnum, col),
+            &motion.as_bytes(),
+            cursor_arr,
             preview_limit,
         )?;
         Ok(preview_positions
@@ -550,15 +851,58 @@ impl LazyWordMotionWrapper {
             .map(|(lnum, col)| [lnum, col])
             .collect())
     }
+
+    fn preview_nmap_batched(
+        _lua: &Lua,
+        this: &mut Self,
+        (buffer, motion, cursor, preview_limit, batch_size): (
+            Table,
+            String,
+            Vec<usize>,
+            usize,
+            usize,
+        ),
+    ) -> mlua::Result<Vec<Vec<[usize; 3]>>> {
+        if cursor.len() < 4 {
+            return Err(mlua::Error::runtime(
+                "cursor must contain at least 4 elements",
+            ));
+        }
+        let buffer = TableBufferWrapper(buffer);
+        let mut cursor_arr = [0usize; 4];
+        cursor_arr.copy_from_slice(&cursor[..4]);
+        this.wm.preview_nmap_batched(
+            &buffer,
+            &motion.as_bytes(),
+            cursor_arr,
+            preview_limit,
+            batch_size,
+        )
+    }
 }
 
 impl UserData for LazyWordMotionWrapper {
     fn add_methods<M: UserDataMethods<Self>>(methods: &mut M) {
         methods.add_method_mut("set_isk", Self::set_isk);
+        methods.add_method_mut("set_cache_capacity", Self::set_cache_capacity);
+        methods.add_method_mut("clear_cache", Self::clear_cache);
+        methods.add_method_mut("on_lines", Self::on_lines);
+        methods.add_method_mut(
+            "set_cut_memo_capacity",
+            Self::set_cut_memo_capacity,
+        );
+        methods.add_method("cut_memo_stats", Self::cut_memo_stats);
+        methods.add_method("stats", Self::stats);
+        methods.add_method_mut("reset_stats", Self::reset_stats);
+        methods.add_method_mut("load_cut_memo", Self::load_cut_memo);
+        methods.add_method("save_cut_memo", Self::save_cut_memo);
+        methods.add_method("prewarm", Self::prewarm);
         methods.add_method_mut("nmap", Self::nmap);
         methods.add_method_mut("xmap", Self::xmap);
         methods.add_method_mut("omap", Self::omap);
         methods.add_method_mut("imap", Self::imap);
         methods.add_method_mut("preview_nmap", Self::preview_nmap);
+        methods
+            .add_method_mut("preview_nmap_batched", Self::preview_nmap_batched);
     }
 }
@@ -0,0 +1,93 @@
+# Copyright 2026 Kaiwen Wu. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+
+"""Tests of the py3 binding. They import the built `jieba_vim_rs` extension,
+which is to be put on `PYTHONPATH`."""
+
+import threading
+
+import pytest
+
+import jieba_vim_rs
+
+ISK = b"@,48-57,_,192-255"
+
+
+@pytest.fixture(params=["WordMotion", "LazyWordMotion"])
+def word_motion(request):
+    return getattr(jieba_vim_rs, request.param)(ISK)
+
+
+def test_concurrent_calls(word_motion):
+    buffer = ["foo 你好世界 bar"] * 1000
+    errors = []
+
+    def work():
+        try:
+            for lnum in range(1, 200):
+                word_motion.nmap(buffer, b"w", [0, lnum, 1, 0, 1], 3)
+                word_motion.word_count(buffer, lnum, lnum + 10)
+                word_motion.stats()
+            word_motion.set_cache_capacity(1 << 20)
+        except Exception as err:
+            errors.append(err)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert word_motion.stats()["calls"]["nmap w"] == 8 * 199
+
+
+def test_motion_over_many_lines(word_motion):
+    buffer = ["foo"] + ["  "] * 500 + ["bar"]
+    output = word_motion.nmap(buffer, b"w", [0, 1, 1, 0, 1], 1)
+    assert output["cursor"][1] == 502
+    output = word_motion.nmap(buffer, b"b", [0, 502, 1, 0, 1], 1)
+    assert output["cursor"][1] == 1
+    assert word_motion.stats()["calls"]["nmap w"] == 1
+
+
+def test_word_count_sees_edits(word_motion):
+    buffer = ["foo bar"] * 100
+    assert word_motion.word_count(buffer) == 200
+    buffer[50] = "foo bar baz"
+    assert word_motion.word_count(buffer) == 201
+
+
+class NumberedBuffer(list):
+    """A list of lines with a buffer number, like a Vim buffer."""
+
+    number = 1
+
+
+def test_word_count_of_numbered_buffer(word_motion):
+    buffer = NumberedBuffer(["foo bar"] * 100)
+    assert word_motion.word_count(buffer) == 200
+    buffer[50] = "foo bar baz"
+    word_motion.on_lines(1, 50, 51, 51)
+    assert word_motion.word_count(buffer) == 201
+    buffer.insert(0, "qux")
+    assert word_motion.word_count(buffer) == 202
+
+
+def test_line_range_arguments_in_same_order(word_motion):
+    buffer = ["foo", "bar baz", "qux.quux"]
+    assert word_motion.fill_cache(buffer, 2, 3, False, 1) == (2, 0)
+    bounds, index = word_motion.tokenize_lines(buffer, 2, 3, False)
+    assert list(bounds) == [0, 3, 4, 7, 0, 8]
+    assert list(index) == [0, 2, 3]
+    assert word_motion.word_count(buffer, 2, 3, False) == 3
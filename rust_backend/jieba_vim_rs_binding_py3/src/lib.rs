@@ -12,7 +12,6 @@
 // License for the specific language governing permissions and limitations
 // under the License.
 
-mod preview;
 mod wrappers;
 
 use pyo3::prelude::*;
@@ -12,21 +12,30 @@
 // License for the specific language governing permissions and limitations
 // under the License.
 
+use std::cell::Cell;
 use std::fs::File;
-use std::io::BufReader;
-use std::sync::OnceLock;
+use std::io::{self, BufReader, BufWriter, Write};
+use std::path::{Path, PathBuf};
+use std::process;
+use std::sync::atomic::{AtomicU64, Ordering};
+use std::sync::{
+    Arc, Mutex, MutexGuard, Once, OnceLock, PoisonError, TryLockError,
+};
+use std::thread;
+use std::time::{Duration, Instant};
 
 use jieba_rs::Jieba;
 use jieba_vim_rs_core::BufferLike;
 use jieba_vim_rs_core::motion::{
-    ImapOutput, NmapOutput, OmapOutput, WordMotion, XmapOutput,
+    ImapOutput, MotionStats, NmapOutput, OmapOutput, TokenizeLinesError,
+    TokenizedLines, WordMotion, XmapOutput,
 };
-use jieba_vim_rs_core::token::{JiebaPlaceholder, Tokenizer};
-use pyo3::exceptions::{PyIOError, PyValueError};
+use jieba_vim_rs_core::token::{CutMemoStats, JiebaPlaceholder, Tokenizer};
+use jieba_vim_rs_core::trace::{Tracer, Tracing};
+use pyo3::IntoPyObjectExt;
+use pyo3::exceptions::{PyIOError, PyOverflowError, PyTypeError, PyValueError};
 use pyo3::prelude::*;
-use pyo3::types::PyDict;
-
-use crate::preview;
+use pyo3::types::{PyBytes, PyDict, PyString, PyTuple};
 
 struct BoundWrapper<'b, 'py, T>(&'b Bound<'py, T>);
 
@@ -43,29 +52,422 @@ impl<'b, 'py> BufferLike for BoundWrapper<'b, 'py, PyAny> {
         self.0.get_item(lnum - 1)?.extract::<String>()
     }
 
+    fn with_line<R, F: FnOnce(&str) -> R>(
+        &self,
+        lnum: usize,
+        f: F,
+    ) -> Result<R, Self::Error> {
+        let line = self.0.get_item(lnum - 1)?.extract::<Bound<PyString>>()?;
+        // Borrow the UTF-8 representation cached in the str object.
+        #[cfg(any(Py_3_10, not(Py_LIMITED_API)))]
+        {
+            Ok(f(line.to_str()?))
+        }
+        // The cached UTF-8 representation is unavailable in the limited API
+        // before Python 3.10, e.g. in the default build for Python 3.7. Borrow
+        // from the bytes object Python encodes instead, which still saves the
+        // copy into a `String` made by `getline`.
+        #[cfg(not(any(Py_3_10, not(Py_LIMITED_API))))]
+        {
+            let bytes = line.encode_utf8()?;
+            // SAFETY: bytes encoded by Python as UTF-8 are valid UTF-8.
+            Ok(f(unsafe {
+                std::str::from_utf8_unchecked(bytes.as_bytes())
+            }))
+        }
+    }
+
     fn lines(&self) -> Result<usize, Self::Error> {
         self.0.len()
     }
+
+    fn bufnr(&self) -> Result<usize, Self::Error> {
+        // Vim buffers have a `number` attribute, while plain lists of strings
+        // do not.
+        if self.0.hasattr("number")? {
+            self.0.getattr("number")?.extract()
+        } else {
+            Ok(0)
+        }
+    }
+}
+
+/// Lines `first..first + lines.len()` (1-indexed) of a buffer, copied while
+/// holding the GIL, so that they can be tokenized on other threads with the
+/// GIL released.
+struct CopiedLines {
+    bufnr: usize,
+    first: usize,
+    lines: Vec<String>,
+}
+
+impl CopiedLines {
+    /// Copy the buffer number and lines `first..=last` of `buffer`, clamped
+    /// to the lines in it.
+    fn new(
+        buffer: &Bound<'_, PyAny>,
+        first: usize,
+        last: usize,
+    ) -> PyResult<Self> {
+        let buffer = BoundWrapper(buffer);
+        let first = first.max(1);
+        let last = last.min(buffer.lines()?);
+        let lines = (first..=last)
+            .map(|lnum| buffer.getline(lnum))
+            .collect::<PyResult<_>>()?;
+        Ok(Self {
+            bufnr: buffer.bufnr()?,
+            first,
+            lines,
+        })
+    }
+}
+
+thread_local! {
+    /// Whether the jieba cuts made on the current thread release the GIL,
+    /// which is the case while a motion runs with the GIL held.
+    static DETACH_CUTS: Cell<bool> = const { Cell::new(false) };
+}
+
+/// Have the jieba cuts made on the current thread release the GIL, until
+/// dropped.
+struct DetachCuts(bool);
+
+impl DetachCuts {
+    fn enter() -> Self {
+        Self(DETACH_CUTS.replace(true))
+    }
+}
+
+impl Drop for DetachCuts {
+    fn drop(&mut self) {
+        DETACH_CUTS.set(self.0);
+    }
+}
+
+/// Make a jieba cut with `cut`, releasing the GIL around it if the current
+/// thread is running a motion with the GIL held.
+fn detach_cut<R, F>(cut: F) -> R
+where
+    R: Send,
+    F: Send + FnOnce() -> R,
+{
+    if DETACH_CUTS.get() {
+        Python::attach(|py| py.detach(cut))
+    } else {
+        cut()
+    }
+}
+
+/// Run `f` on `wm`, locked with the GIL released, since a motion may take
+/// the GIL while holding the lock, e.g. to call a tracer. A motion that
+/// panicked leaves `wm` usable.
+fn with_word_motion<C, R, F>(
+    py: Python<'_>,
+    wm: &Mutex<WordMotion<C>>,
+    f: F,
+) -> R
+where
+    WordMotion<C>: Send,
+    R: Send,
+    F: Send + FnOnce(&mut WordMotion<C>) -> R,
+{
+    py.detach(|| {
+        let mut wm = wm.lock().unwrap_or_else(PoisonError::into_inner);
+        f(&mut *wm)
+    })
+}
+
+/// Lock `wm` with the GIL held. Rather than blocking on the lock with the GIL
+/// held, which would deadlock with a motion that takes the GIL while holding
+/// the lock, wait for the lock with the GIL released and try again.
+fn lock_attached<'a, C>(
+    py: Python<'_>,
+    wm: &'a Mutex<WordMotion<C>>,
+) -> MutexGuard<'a, WordMotion<C>>
+where
+    WordMotion<C>: Send,
+{
+    loop {
+        match wm.try_lock() {
+            Ok(wm) => return wm,
+            Err(TryLockError::Poisoned(err)) => return err.into_inner(),
+            Err(TryLockError::WouldBlock) => py.detach(|| drop(wm.lock())),
+        }
+    }
+}
+
+/// Run `f` on `wm` and `buffer` with the GIL held, so that the lines of
+/// `buffer` are read only when needed, and lent to `f` rather than copied to
+/// be hashed against the cache. The GIL is released around jieba cuts,
+/// including
+/// lazy dictionary loading, so that other Python threads keep running during
+/// them. A line changed by another Python thread meanwhile may thus be read
+/// in its new state, which does not happen in Vim, where buffers are only
+/// changed on the main thread.
+fn with_buffer<'py, C, R, F>(
+    wm: &Mutex<WordMotion<C>>,
+    buffer: &Bound<'py, PyAny>,
+    f: F,
+) -> PyResult<R>
+where
+    WordMotion<C>: Send,
+    F: FnOnce(&mut WordMotion<C>, &BoundWrapper<'_, 'py, PyAny>) -> PyResult<R>,
+{
+    let mut wm = lock_attached(buffer.py(), wm);
+    let _detach = DetachCuts::enter();
+    f(&mut *wm, &BoundWrapper(buffer))
+}
+
+/// Raise the error of [`WordMotion::tokenize_lines`] as a Python exception.
+fn tokenize_lines_error(err: TokenizeLinesError<PyErr>) -> PyErr {
+    match err {
+        TokenizeLinesError::Buffer(err) => err,
+        TokenizeLinesError::TooLong { lnum } => PyOverflowError::new_err(
+            format!("line {} is too long for 32-bit token bounds", lnum),
+        ),
+    }
 }
 
+/// Copy `values` into an array, failing if there are not exactly `N` of
+/// them. `name` names `values` in the error message.
+fn to_array<const N: usize>(
+    values: &[usize],
+    name: &str,
+) -> PyResult<[usize; N]> {
+    values.try_into().map_err(|_| {
+        PyValueError::new_err(format!(
+            "{} must contain exactly {} elements",
+            name, N
+        ))
+    })
+}
+
+/// Convert `output` into a Python object in span `"build_output"`.
+fn build_output<'py, T>(
+    py: Python<'py>,
+    tracing: &Tracing,
+    output: T,
+) -> PyResult<Bound<'py, PyAny>>
+where
+    T: IntoPyObject<'py, Error = PyErr>,
+{
+    let _span = tracing.span("build_output");
+    output.into_bound_py_any(py)
+}
+
+/// Id of the current thread in trace events. Threads are numbered from 1
+/// in the order they first emit a trace event.
+fn trace_tid() -> u64 {
+    static NEXT_TID: AtomicU64 = AtomicU64::new(1);
+    thread_local! {
+        static TID: u64 = NEXT_TID.fetch_add(1, Ordering::Relaxed);
+    }
+    TID.with(|tid| *tid)
+}
+
+/// A begin (`"B"`) or end (`"E"`) event in the Chrome `trace_event` format.
+struct TraceEvent {
+    name: &'static str,
+    ph: &'static str,
+    /// Microseconds since the tracer was set.
+    ts: f64,
+    tid: u64,
+}
+
+impl TraceEvent {
+    fn now(epoch: Instant, name: &'static str, ph: &'static str) -> Self {
+        Self {
+            name,
+            ph,
+            ts: epoch.elapsed().as_secs_f64() * 1e6,
+            tid: trace_tid(),
+        }
+    }
+}
+
+/// A tracer that passes each trace event as a dict to a Python callable.
+struct CallbackTracer {
+    callback: Py<PyAny>,
+    epoch: Instant,
+}
+
+impl CallbackTracer {
+    fn emit(&self, name: &'static str, ph: &'static str) {
+        let event = TraceEvent::now(self.epoch, name, ph);
+        Python::attach(|py| {
+            let dict = PyDict::new(py);
+            let result = dict
+                .set_item("name", event.name)
+                .and_then(|_| dict.set_item("ph", event.ph))
+                .and_then(|_| dict.set_item("ts", event.ts))
+                .and_then(|_| dict.set_item("pid", process::id()))
+                .and_then(|_| dict.set_item("tid", event.tid))
+                .and_then(|_| self.callback.call1(py, (dict,)));
+            // A broken tracer must not break the motions.
+            if let Err(err) = result {
+                err.write_unraisable(py, None);
+            }
+        });
+    }
+}
+
+impl Tracer for CallbackTracer {
+    fn begin(&self, name: &'static str) {
+        self.emit(name, "B");
+    }
+
+    fn end(&self, name: &'static str) {
+        self.emit(name, "E");
+    }
+}
+
+/// A tracer that writes the trace events to a file as a JSON array, which
+/// `chrome://tracing` and Perfetto load. The closing bracket is left out, as
+/// the format allows, so that the file is complete whenever it is loaded.
+struct FileTracer {
+    writer: Mutex<BufWriter<File>>,
+    epoch: Instant,
+}
+
+impl FileTracer {
+    fn create(path: &Path, epoch: Instant) -> io::Result<Self> {
+        let mut writer = BufWriter::new(File::create(path)?);
+        writer.write_all(b"[\n")?;
+        writer.flush()?;
+        Ok(Self {
+            writer: Mutex::new(writer),
+            epoch,
+        })
+    }
+
+    fn emit(&self, name: &'static str, ph: &'static str) {
+        thread_local! {
+            /// Number of spans open on the current thread.
+            static DEPTH: Cell<usize> = const { Cell::new(0) };
+        }
+        let event = TraceEvent::now(self.epoch, name, ph);
+        let depth = DEPTH.with(|depth| {
+            let d = if ph == "B" {
+                depth.get() + 1
+            } else {
+                depth.get().saturating_sub(1)
+            };
+            depth.set(d);
+            d
+        });
+        let mut writer = self.writer.lock().unwrap();
+        // Write errors are dropped, so as not to break the motions.
+        let _ = writeln!(
+            writer,
+            "{{\"name\":\"{}\",\"ph\":\"{}\",\"ts\":{:.3},\"pid\":{},\"tid\":{}}},",
+            event.name,
+            event.ph,
+            event.ts,
+            process::id(),
+            event.tid,
+        );
+        // Flush once the outermost span of the thread ends.
+        if depth == 0 {
+            let _ = writer.flush();
+        }
+    }
+}
+
+impl Tracer for FileTracer {
+    fn begin(&self, name: &'static str) {
+        self.emit(name, "B");
+    }
+
+    fn end(&self, name: &'static str) {
+        self.emit(name, "E");
+    }
+}
+
+/// Make the tracer set by `set_tracer` from a file path or a callable, or
+/// disable tracing if `tracer` is `None`.
+fn new_tracer(
+    tracer: Option<&Bound<'_, PyAny>>,
+) -> PyResult<Option<Arc<dyn Tracer>>> {
+    let Some(tracer) = tracer else {
+        return Ok(None);
+    };
+    let epoch = Instant::now();
+    if let Ok(path) = tracer.extract::<PathBuf>() {
+        let tracer =
+            FileTracer::create(&path, epoch).map_err(PyIOError::new_err)?;
+        return Ok(Some(Arc::new(tracer)));
+    }
+    if tracer.is_callable() {
+        return Ok(Some(Arc::new(CallbackTracer {
+            callback: tracer.clone().unbind(),
+            epoch,
+        })));
+    }
+    Err(PyTypeError::new_err(
+        "tracer must be a callable or a file path",
+    ))
+}
+
+/// Identifies the jieba behind [`JiebaWrapper`] and [`LazyJiebaWrapper`] in
+/// the snapshots of the cut memo, which must not be loaded by another version
+/// of jieba-rs or with another cut mode.
+const CUTTER_ID: &str =
+    concat!("jieba-rs ", env!("JIEBA_RS_VERSION"), " cut hmm");
+
 struct JiebaWrapper(Jieba);
 
 impl JiebaPlaceholder for JiebaWrapper {
     fn cut_hmm_into_char_counts(&self, sentence: &str) -> Vec<usize> {
-        self.0
-            .cut(sentence, true)
-            .into_iter()
-            .map(|token| token.end - token.start)
-            .collect()
+        detach_cut(|| {
+            self.0
+                .cut(sentence, true)
+                .into_iter()
+                .map(|token| token.end - token.start)
+                .collect()
+        })
     }
 }
 
+#[derive(Clone)]
 struct LazyJiebaWrapper {
     path: Option<String>,
-    jieba: OnceLock<Jieba>,
+    jieba: Arc<OnceLock<Jieba>>,
+    prewarm: Arc<Once>,
+    /// Time taken to load the dictionary, once loaded.
+    load_time: Arc<OnceLock<Duration>>,
 }
 
 impl LazyJiebaWrapper {
+    fn new(path: Option<String>) -> Self {
+        Self {
+            path,
+            jieba: Arc::new(OnceLock::new()),
+            prewarm: Arc::new(Once::new()),
+            load_time: Arc::new(OnceLock::new()),
+        }
+    }
+
+    fn get_jieba(&self) -> &Jieba {
+        self.jieba.get_or_init(|| {
+            let start = Instant::now();
+            let jieba = self.init_jieba();
+            let _ = self.load_time.set(start.elapsed());
+            jieba
+        })
+    }
+
+    /// Initialize jieba on a background thread, at most once. A cut made
+    /// before the initialization finishes blocks until it finishes.
+    fn prewarm(&self) {
+        self.prewarm.call_once(|| {
+            let this = self.clone();
+            thread::spawn(move || {
+                this.get_jieba();
+            });
+        });
+    }
+
     fn init_jieba(&self) -> Jieba {
         match &self.path {
             None => Jieba::new(),
@@ -87,12 +489,13 @@ impl LazyJiebaWrapper {
 
 impl JiebaPlaceholder for LazyJiebaWrapper {
     fn cut_hmm_into_char_counts(&self, sentence: &str) -> Vec<usize> {
-        self.jieba
-            .get_or_init(|| self.init_jieba())
-            .cut(sentence, true)
-            .into_iter()
-            .map(|token| token.end - token.start)
-            .collect()
+        detach_cut(|| {
+            self.get_jieba()
+                .cut(sentence, true)
+                .into_iter()
+                .map(|token| token.end - token.start)
+                .collect()
+        })
     }
 }
 
@@ -180,10 +583,111 @@ impl<'py> IntoPyObject<'py> for ImapOutputWrapper {
     }
 }
 
-#[pyclass]
+pub struct CutMemoStatsWrapper(CutMemoStats);
+
+impl<'py> IntoPyObject<'py> for CutMemoStatsWrapper {
+    type Target = PyDict;
+    type Output = Bound<'py, Self::Target>;
+    type Error = PyErr;
+
+    fn into_pyobject(
+        self,
+        py: Python<'py>,
+    ) -> Result<Self::Output, Self::Error> {
+        let dict = PyDict::new(py);
+        dict.set_item("hits", self.0.hits)?;
+        dict.set_item("misses", self.0.misses)?;
+        dict.set_item("entries", self.0.entries)?;
+        dict.set_item("size", self.0.size)?;
+        Ok(dict)
+    }
+}
+
+/// The counters and timers of a word motion, and the time taken to load the
+/// jieba dictionary, if loaded.
+pub struct MotionStatsWrapper(MotionStats, Option<Duration>);
+
+impl<'py> IntoPyObject<'py> for MotionStatsWrapper {
+    type Target = PyDict;
+    type Output = Bound<'py, Self::Target>;
+    type Error = PyErr;
+
+    fn into_pyobject(
+        self,
+        py: Python<'py>,
+    ) -> Result<Self::Output, Self::Error> {
+        let Self(stats, dict_load_time) = self;
+        let total_calls = stats.total_calls();
+        let dict = PyDict::new(py);
+        dict.set_item("calls", &stats.calls)?;
+        // Times are in seconds.
+        dict.set_item("call_time", stats.call_time.as_secs_f64())?;
+        dict.set_item("fetch_time", stats.parse.fetch_time.as_secs_f64())?;
+        dict.set_item(
+            "tokenize_time",
+            stats.parse.tokenize_time.as_secs_f64(),
+        )?;
+        dict.set_item("cut_time", stats.cut_time.as_secs_f64())?;
+        dict.set_item(
+            "dict_load_time",
+            dict_load_time.map(|t| t.as_secs_f64()),
+        )?;
+        dict.set_item("lines_parsed", stats.parse.lines_parsed)?;
+        dict.set_item(
+            "lines_parsed_per_call",
+            stats.parse.lines_parsed as f64 / total_calls.max(1) as f64,
+        )?;
+        dict.set_item("cache_hits", stats.parse.hits)?;
+        dict.set_item("cache_misses", stats.parse.misses)?;
+        dict.set_item("cache_evictions", stats.parse.evictions)?;
+        Ok(dict)
+    }
+}
+
+pub struct TokenizedLinesWrapper(TokenizedLines);
+
+/// Convert `values` into an `array('I')`, whose item is a C unsigned int,
+/// i.e. 32-bit on all platforms Vim runs on.
+fn uint_array<'py>(
+    py: Python<'py>,
+    values: &[u32],
+) -> PyResult<Bound<'py, PyAny>> {
+    let array = py.import("array")?.getattr("array")?.call1(("I",))?;
+    let bytes: Vec<u8> = values.iter().flat_map(|v| v.to_ne_bytes()).collect();
+    array.call_method1("frombytes", (PyBytes::new(py, &bytes),))?;
+    Ok(array)
+}
+
+impl<'py> IntoPyObject<'py> for TokenizedLinesWrapper {
+    type Target = PyTuple;
+    type Output = Bound<'py, Self::Target>;
+    type Error = PyErr;
+
+    fn into_pyobject(
+        self,
+        py: Python<'py>,
+    ) -> Result<Self::Output, Self::Error> {
+        let bounds = uint_array(py, &self.0.bounds)?;
+        let index = uint_array(py, &self.0.index)?;
+        PyTuple::new(py, [bounds, index])
+    }
+}
+
+#[pyclass(frozen)]
 #[pyo3(name = "WordMotion")]
 pub struct WordMotionWrapper {
-    wm: WordMotion<JiebaWrapper>,
+    wm: Mutex<WordMotion<JiebaWrapper>>,
+    /// The tracing of `wm`, which is read without locking `wm`.
+    tracing: Mutex<Tracing>,
+    path: Option<String>,
+    /// Time taken to load the jieba dictionary.
+    dict_load_time: Duration,
+}
+
+impl WordMotionWrapper {
+    fn tracing(&self) -> Tracing {
+        self.tracing.lock().unwrap().clone()
+    }
 }
 
 #[pymethods]
@@ -193,6 +697,7 @@ impl WordMotionWrapper {
     #[new]
     #[pyo3(signature = (isk_option, path=None))]
     pub fn new(isk_option: &[u8], path: Option<&str>) -> PyResult<Self> {
+        let start = Instant::now();
         let jieba = match path {
             None => Jieba::new(),
             Some(path) => {
@@ -204,6 +709,7 @@ impl WordMotionWrapper {
                 })?
             }
         };
+        let dict_load_time = start.elapsed();
         let tokenizer = Tokenizer::try_new(JiebaWrapper(jieba), isk_option)
             .map_err(|_| {
                 PyValueError::new_err(format!(
@@ -212,128 +718,240 @@ impl WordMotionWrapper {
                 ))
             })?;
         Ok(Self {
-            wm: WordMotion::new(tokenizer),
+            wm: Mutex::new(WordMotion::new(tokenizer)),
+            tracing: Mutex::default(),
+            path: path.map(str::to_string),
+            dict_load_time,
         })
     }
 
-    pub fn set_isk(&mut self, isk_option: &[u8]) -> PyResult<()> {
-        self.wm
-            .get_tokenizer_mut()
-            .try_set_word_predicate(isk_option)
-            .map_err(|_| {
-                PyValueError::new_err(format!(
-                    "failed to parse isk: {}",
-                    unsafe { std::str::from_utf8_unchecked(isk_option) }
-                ))
-            })
+    pub fn set_isk(&self, py: Python<'_>, isk_option: &[u8]) -> PyResult<()> {
+        with_word_motion(py, &self.wm, |wm| {
+            wm.get_tokenizer_mut()
+                .try_set_word_predicate(isk_option)
+                .is_ok()
+        })
+        .then_some(())
+        .ok_or_else(|| {
+            PyValueError::new_err(format!("failed to parse isk: {}", unsafe {
+                std::str::from_utf8_unchecked(isk_option)
+            }))
+        })
     }
 
-    pub fn nmap(
-        &mut self,
-        buffer: &Bound<'_, PyAny>,
+    /// Set the maximum number of bytes taken by the tokenized lines cached
+    /// across motions. Zero `capacity` disables the cache.
+    pub fn set_cache_capacity(&self, py: Python<'_>, capacity: usize) {
+        with_word_motion(py, &self.wm, |wm| wm.set_cache_capacity(capacity));
+    }
+
+    pub fn clear_cache(&self, py: Python<'_>) {
+        with_word_motion(py, &self.wm, |wm| wm.clear_cache());
+    }
+
+    /// Notify that lines `first..last_old` (0-indexed, end exclusive) in
+    /// buffer `bufnr` have been replaced by lines `first..last_new`, so that
+    /// only the cached tokenized lines touched by the change are dropped.
+    pub fn on_lines(
+        &self,
+        py: Python<'_>,
+        bufnr: usize,
+        first: usize,
+        last_old: usize,
+        last_new: usize,
+    ) {
+        with_word_motion(py, &self.wm, |wm| {
+            wm.on_lines(bufnr, first, last_old, last_new)
+        });
+    }
+
+    /// Set the maximum number of bytes taken by the memo of jieba cut
+    /// results. Zero `capacity` disables the memo.
+    pub fn set_cut_memo_capacity(&self, py: Python<'_>, capacity: usize) {
+        with_word_motion(py, &self.wm, |wm| wm.set_cut_memo_capacity(capacity));
+    }
+
+    /// Return the hit/miss counters and the size of the memo of jieba cut
+    /// results as a dict.
+    pub fn cut_memo_stats(&self, py: Python<'_>) -> CutMemoStatsWrapper {
+        CutMemoStatsWrapper(with_word_motion(py, &self.wm, |wm| {
+            wm.cut_memo_stats()
+        }))
+    }
+
+    /// Trace the phases of the motions: argument conversion, line fetches,
+    /// tokenization, jieba cuts, the motions themselves, and output
+    /// building. `tracer` is either a callable, which is passed each begin
+    /// and end event as a dict in the Chrome `trace_event` format, or a file
+    /// path, where the events are written as Chrome trace JSON. `None`
+    /// disables tracing.
+    #[pyo3(signature = (tracer=None))]
+    pub fn set_tracer(
+        &self,
+        py: Python<'_>,
+        tracer: Option<&Bound<'_, PyAny>>,
+    ) -> PyResult<()> {
+        let tracer = new_tracer(tracer)?;
+        *self.tracing.lock().unwrap() = Tracing::new(tracer.clone());
+        with_word_motion(py, &self.wm, |wm| wm.set_tracer(tracer));
+        Ok(())
+    }
+
+    /// Return the counters and timers of the motions as a dict, with times
+    /// in seconds.
+    pub fn stats(&self, py: Python<'_>) -> MotionStatsWrapper {
+        MotionStatsWrapper(
+            with_word_motion(py, &self.wm, |wm| wm.stats()),
+            Some(self.dict_load_time),
+        )
+    }
+
+    /// Reset the counters and timers of the motions, except for the time
+    /// taken to load the dictionary.
+    pub fn reset_stats(&self, py: Python<'_>) {
+        with_word_motion(py, &self.wm, |wm| wm.reset_stats());
+    }
+
+    /// Load the snapshot of the cut memo saved under `dir` by
+    /// `save_cut_memo`. Return `False` if there is no snapshot yet.
+    pub fn load_cut_memo(&self, py: Python<'_>, dir: &str) -> PyResult<bool> {
+        with_word_motion(py, &self.wm, |wm| {
+            wm.load_cut_memo_snapshot(
+                Path::new(dir),
+                self.path.as_deref().map(Path::new),
+                CUTTER_ID,
+            )
+        })
+        .map_err(PyIOError::new_err)
+    }
+
+    /// Save the cut memo as a snapshot under `dir`, keyed by the jieba
+    /// dictionary in use.
+    pub fn save_cut_memo(&self, py: Python<'_>, dir: &str) -> PyResult<()> {
+        with_word_motion(py, &self.wm, |wm| {
+            wm.save_cut_memo_snapshot(
+                Path::new(dir),
+                self.path.as_deref().map(Path::new),
+                CUTTER_ID,
+            )
+        })
+        .map_err(PyIOError::new_err)
+    }
+
+    /// Do nothing, since jieba has been loaded on construction.
+    pub fn prewarm(&self) {}
+
+    pub fn nmap<'py>(
+        &self,
+        buffer: &Bound<'py, PyAny>,
         motion: &[u8],
         cursor: Vec<usize>,
         count: u64,
-    ) -> PyResult<NmapOutputWrapper> {
-        if cursor.len() != 5 {
-            return Err(PyValueError::new_err(
-                "cursor must contain exactly 5 elements",
-            ));
-        }
-        let mut cursor_arr = [0usize; 5];
-        cursor_arr.copy_from_slice(&cursor);
-        Ok(NmapOutputWrapper(self.wm.nmap(
-            &BoundWrapper(buffer),
-            motion,
-            cursor_arr,
-            count,
-        )?))
-    }
-
-    pub fn xmap(
-        &mut self,
-        buffer: &Bound<'_, PyAny>,
+    ) -> PyResult<Bound<'py, PyAny>> {
+        let tracing = self.tracing();
+        let cursor_arr = {
+            let _span = tracing.span("convert_args");
+            to_array::<5>(&cursor, "cursor")?
+        };
+        let output = with_buffer(&self.wm, buffer, |wm, buffer| {
+            wm.nmap(buffer, motion, cursor_arr, count)
+        })?;
+        build_output(buffer.py(), &tracing, NmapOutputWrapper(output))
+    }
+
+    pub fn xmap<'py>(
+        &self,
+        buffer: &Bound<'py, PyAny>,
         visualmode: &[u8],
         motion: &[u8],
         visual_begin: Vec<usize>,
         visual_end: Vec<usize>,
         count: u64,
-    ) -> PyResult<XmapOutputWrapper> {
-        if visual_begin.len() != 4 {
-            return Err(PyValueError::new_err(
-                "visual_begin must contain exactly 4 elements",
-            ));
-        }
-        if visual_end.len() != 4 {
-            return Err(PyValueError::new_err(
-                "visual_end must contain exactly 4 elements",
-            ));
-        }
-        let mut visual_begin_arr = [0usize; 4];
-        visual_begin_arr.copy_from_slice(&visual_begin);
-        let mut visual_end_arr = [0usize; 4];
-        visual_end_arr.copy_from_slice(&visual_end);
-        Ok(XmapOutputWrapper(self.wm.xmap(
-            &BoundWrapper(buffer),
-            visualmode,
-            motion,
-            visual_begin_arr,
-            visual_end_arr,
-            count,
-        )?))
-    }
-
-    pub fn omap(
-        &mut self,
-        buffer: &Bound<'_, PyAny>,
+    ) -> PyResult<Bound<'py, PyAny>> {
+        let tracing = self.tracing();
+        let (visual_begin_arr, visual_end_arr) = {
+            let _span = tracing.span("convert_args");
+            (
+                to_array::<4>(&visual_begin, "visual_begin")?,
+                to_array::<4>(&visual_end, "visual_end")?,
+            )
+        };
+        let output = with_buffer(&self.wm, buffer, |wm, buffer| {
+            wm.xmap(
+                buffer,
+                visualmode,
+                motion,
+                visual_begin_arr,
+                visual_end_arr,
+                count,
+            )
+        })?;
+        build_output(buffer.py(), &tracing, XmapOutputWrapper(output))
+    }
+
+    pub fn omap<'py>(
+        &self,
+        buffer: &Bound<'py, PyAny>,
         motion: &[u8],
         cursor: Vec<usize>,
         count: u64,
         operator: &[u8],
-    ) -> PyResult<OmapOutputWrapper> {
-        if cursor.len() != 5 {
-            return Err(PyValueError::new_err(
-                "cursor must contain exactly 5 elements",
-            ));
-        }
-        let mut cursor_arr = [0usize; 5];
-        cursor_arr.copy_from_slice(&cursor);
-        Ok(OmapOutputWrapper(self.wm.omap(
-            &BoundWrapper(buffer),
-            motion,
-            cursor_arr,
-            count,
-            operator,
-        )?))
-    }
-
-    pub fn imap(
-        &mut self,
+    ) -> PyResult<Bound<'py, PyAny>> {
+        let tracing = self.tracing();
+        let cursor_arr = {
+            let _span = tracing.span("convert_args");
+            to_array::<5>(&cursor, "cursor")?
+        };
+        let output = with_buffer(&self.wm, buffer, |wm, buffer| {
+            wm.omap(buffer, motion, cursor_arr, count, operator)
+        })?;
+        build_output(buffer.py(), &tracing, OmapOutputWrapper(output))
+    }
+
+    pub fn imap<'py>(
+        &self,
+        buffer: &Bound<'py, PyAny>,
+        motion: &[u8],
+        cursor: Vec<usize>,
+    ) -> PyResult<Bound<'py, PyAny>> {
+        let tracing = self.tracing();
+        let cursor_arr = {
+            let _span = tracing.span("convert_args");
+            to_array::<5>(&cursor, "cursor")?
+        };
+        let output = with_buffer(&self.wm, buffer, |wm, buffer| {
+            wm.imap(buffer, motion, cursor_arr)
+        })?;
+        build_output(buffer.py(), &tracing, ImapOutputWrapper(output))
+    }
+
+    pub fn preview_nmap(
+        &self,
         buffer: &Bound<'_, PyAny>,
         motion: &[u8],
         cursor: Vec<usize>,
-    ) -> PyResult<ImapOutputWrapper> {
-        if cursor.len() != 5 {
+        preview_limit: usize,
+    ) -> PyResult<Vec<(usize, usize)>> {
+        if cursor.len() < 4 {
             return Err(PyValueError::new_err(
-                "cursor must contain exactly 5 elements",
+                "cursor must contain at least 4 elements",
             ));
         }
-        let mut cursor_arr = [0usize; 5];
-        cursor_arr.copy_from_slice(&cursor);
-        Ok(ImapOutputWrapper(self.wm.imap(
-            &BoundWrapper(buffer),
-            motion,
-            cursor_arr,
-        )?))
+        let mut cursor_arr = [0usize; 4];
+        cursor_arr.copy_from_slice(&cursor[..4]);
+        with_buffer(&self.wm, buffer, |wm, buffer| {
+            wm.preview_nmap(buffer, motion, cursor_arr, preview_limit)
+        })
     }
 
-    pub fn preview_nmap(
-        &mut self,
+    pub fn preview_nmap_batched(
+        &self,
         buffer: &Bound<'_, PyAny>,
         motion: &[u8],
         cursor: Vec<usize>,
         preview_limit: usize,
-    ) -> PyResult<Vec<(usize, usize)>> {
+        batch_size: usize,
+    ) -> PyResult<Vec<Vec<[usize; 3]>>> {
         if cursor.len() < 4 {
             return Err(PyValueError::new_err(
                 "cursor must contain at least 4 elements",
@@ -341,25 +959,103 @@ impl WordMotionWrapper {
         }
         let mut cursor_arr = [0usize; 4];
         cursor_arr.copy_from_slice(&cursor[..4]);
-        let [_, lnum, col, _] = cursor_arr;
-        preview::preview(
-            |b, (lnum, col)| {
-                let output =
-                    self.wm.nmap(b, motion, [0, lnum, col, 0, col], 1)?;
-                let [_, lnum, col, _] = output.cursor;
-                Ok((lnum, col))
-            },
-            &BoundWrapper(buffer),
-            (lnum, col),
-            preview_limit,
-        )
+        with_buffer(&self.wm, buffer, |wm, buffer| {
+            wm.preview_nmap_batched(
+                buffer,
+                motion,
+                cursor_arr,
+                preview_limit,
+                batch_size,
+            )
+        })
+    }
+
+    /// Tokenize lines `first..=last` (1-indexed) of `buffer` into `word`s,
+    /// or `WORD`s if `word` is false, and return `(bounds, index)` as two
+    /// `array('I')`s. The non-space tokens of the i-th line span bytes
+    /// `bounds[2 * j]` to `bounds[2 * j + 1]` (0-indexed, end exclusive), for
+    /// `j` in `range(index[i], index[i + 1])`. `last` defaults to the last
+    /// line.
+    #[pyo3(signature = (buffer, first=1, last=None, word=true))]
+    pub fn tokenize_lines(
+        &self,
+        buffer: &Bound<'_, PyAny>,
+        first: usize,
+        last: Option<usize>,
+        word: bool,
+    ) -> PyResult<TokenizedLinesWrapper> {
+        let last = last.unwrap_or(usize::MAX);
+        let output = with_buffer(&self.wm, buffer, |wm, buffer| {
+            wm.tokenize_lines(buffer, first, last, word)
+                .map_err(tokenize_lines_error)
+        })?;
+        Ok(TokenizedLinesWrapper(output))
+    }
+
+    /// Tokenize lines `first..=last` (1-indexed) of `buffer` into `word`s,
+    /// or `WORD`s if `word` is false, on `threads` threads (as many as there
+    /// are cores by default), and cache them for later motions. The GIL is
+    /// released while tokenizing. `last` defaults to the last line. Return
+    /// `(cached, skipped)`, the numbers of lines cached, and of lines
+    /// tokenized but left out of the cache, as they are too large for it.
+    #[pyo3(signature = (buffer, first=1, last=None, word=true, threads=None))]
+    pub fn fill_cache(
+        &self,
+        py: Python<'_>,
+        buffer: &Bound<'_, PyAny>,
+        first: usize,
+        last: Option<usize>,
+        word: bool,
+        threads: Option<usize>,
+    ) -> PyResult<(usize, usize)> {
+        let copied =
+            CopiedLines::new(buffer, first, last.unwrap_or(usize::MAX))?;
+        let filled = with_word_motion(py, &self.wm, |wm| {
+            wm.fill_cache(
+                copied.bufnr,
+                copied.first,
+                &copied.lines,
+                word,
+                threads.unwrap_or(0),
+            )
+        });
+        Ok((filled.cached, filled.skipped))
+    }
+
+    /// Count the `word`s, or `WORD`s if `word` is false, in lines
+    /// `first..=last` (1-indexed) of `buffer`, where a run of 汉字 counts as
+    /// the words jieba cuts it into. The word counts of the lines are kept
+    /// across calls, so that only the lines changed since, as told by
+    /// `on_lines`, are read and tokenized again. `last` defaults to the last
+    /// line.
+    #[pyo3(signature = (buffer, first=1, last=None, word=true))]
+    pub fn word_count(
+        &self,
+        buffer: &Bound<'_, PyAny>,
+        first: usize,
+        last: Option<usize>,
+        word: bool,
+    ) -> PyResult<u64> {
+        let last = last.unwrap_or(usize::MAX);
+        with_buffer(&self.wm, buffer, |wm, buffer| {
+            wm.word_count(buffer, first, last, word)
+        })
     }
 }
 
-#[pyclass]
+#[pyclass(frozen)]
 #[pyo3(name = "LazyWordMotion")]
 pub struct LazyWordMotionWrapper {
-    wm: WordMotion<LazyJiebaWrapper>,
+    wm: Mutex<WordMotion<LazyJiebaWrapper>>,
+    /// The tracing of `wm`, which is read without locking `wm`.
+    tracing: Mutex<Tracing>,
+    jieba: LazyJiebaWrapper,
+}
+
+impl LazyWordMotionWrapper {
+    fn tracing(&self) -> Tracing {
+        self.tracing.lock().unwrap().clone()
+    }
 }
 
 #[pymethods]
@@ -371,140 +1067,252 @@ impl LazyWordMotionWrapper {
         if let Some(path) = &path {
             File::open(path).map_err(PyIOError::new_err)?;
         }
-        let jieba = LazyJiebaWrapper {
-            path,
-            jieba: OnceLock::new(),
-        };
+        let jieba = LazyJiebaWrapper::new(path);
         let tokenizer =
-            Tokenizer::try_new(jieba, isk_option).map_err(|_| {
+            Tokenizer::try_new(jieba.clone(), isk_option).map_err(|_| {
                 PyValueError::new_err(format!(
                     "failed to parse isk: {}",
                     unsafe { std::str::from_utf8_unchecked(isk_option) }
                 ))
             })?;
         Ok(Self {
-            wm: WordMotion::new(tokenizer),
+            wm: Mutex::new(WordMotion::new(tokenizer)),
+            tracing: Mutex::default(),
+            jieba,
         })
     }
 
-    pub fn set_isk(&mut self, isk_option: &[u8]) -> PyResult<()> {
-        self.wm
-            .get_tokenizer_mut()
-            .try_set_word_predicate(isk_option)
-            .map_err(|_| {
-                PyValueError::new_err(format!(
-                    "failed to parse isk: {}",
-                    unsafe { std::str::from_utf8_unchecked(isk_option) }
-                ))
-            })
+    pub fn set_isk(&self, py: Python<'_>, isk_option: &[u8]) -> PyResult<()> {
+        with_word_motion(py, &self.wm, |wm| {
+            wm.get_tokenizer_mut()
+                .try_set_word_predicate(isk_option)
+                .is_ok()
+        })
+        .then_some(())
+        .ok_or_else(|| {
+            PyValueError::new_err(format!("failed to parse isk: {}", unsafe {
+                std::str::from_utf8_unchecked(isk_option)
+            }))
+        })
     }
 
-    pub fn nmap(
-        &mut self,
-        buffer: &Bound<'_, PyAny>,
+    /// Set the maximum number of bytes taken by the tokenized lines cached
+    /// across motions. Zero `capacity` disables the cache.
+    pub fn set_cache_capacity(&self, py: Python<'_>, capacity: usize) {
+        with_word_motion(py, &self.wm, |wm| wm.set_cache_capacity(capacity));
+    }
+
+    pub fn clear_cache(&self, py: Python<'_>) {
+        with_word_motion(py, &self.wm, |wm| wm.clear_cache());
+    }
+
+    /// Notify that lines `first..last_old` (0-indexed, end exclusive) in
+    /// buffer `bufnr` have been replaced by lines `first..last_new`, so that
+    /// only the cached tokenized lines touched by the change are dropped.
+    pub fn on_lines(
+        &self,
+        py: Python<'_>,
+        bufnr: usize,
+        first: usize,
+        last_old: usize,
+        last_new: usize,
+    ) {
+        with_word_motion(py, &self.wm, |wm| {
+            wm.on_lines(bufnr, first, last_old, last_new)
+        });
+    }
+
+    /// Set the maximum number of bytes taken by the memo of jieba cut
+    /// results. Zero `capacity` disables the memo.
+    pub fn set_cut_memo_capacity(&self, py: Python<'_>, capacity: usize) {
+        with_word_motion(py, &self.wm, |wm| wm.set_cut_memo_capacity(capacity));
+    }
+
+    /// Return the hit/miss counters and the size of the memo of jieba cut
+    /// results as a dict.
+    pub fn cut_memo_stats(&self, py: Python<'_>) -> CutMemoStatsWrapper {
+        CutMemoStatsWrapper(with_word_motion(py, &self.wm, |wm| {
+            wm.cut_memo_stats()
+        }))
+    }
+
+    /// Trace the phases of the motions: argument conversion, line fetches,
+    /// tokenization, jieba cuts, the motions themselves, and output
+    /// building. `tracer` is either a callable, which is passed each begin
+    /// and end event as a dict in the Chrome `trace_event` format, or a file
+    /// path, where the events are written as Chrome trace JSON. `None`
+    /// disables tracing.
+    #[pyo3(signature = (tracer=None))]
+    pub fn set_tracer(
+        &self,
+        py: Python<'_>,
+        tracer: Option<&Bound<'_, PyAny>>,
+    ) -> PyResult<()> {
+        let tracer = new_tracer(tracer)?;
+        *self.tracing.lock().unwrap() = Tracing::new(tracer.clone());
+        with_word_motion(py, &self.wm, |wm| wm.set_tracer(tracer));
+        Ok(())
+    }
+
+    /// Return the counters and timers of the motions as a dict, with times
+    /// in seconds. The time taken to load the dictionary is `None` until it
+    /// is loaded.
+    pub fn stats(&self, py: Python<'_>) -> MotionStatsWrapper {
+        MotionStatsWrapper(
+            with_word_motion(py, &self.wm, |wm| wm.stats()),
+            self.jieba.load_time.get().copied(),
+        )
+    }
+
+    /// Reset the counters and timers of the motions, except for the time
+    /// taken to load the dictionary.
+    pub fn reset_stats(&self, py: Python<'_>) {
+        with_word_motion(py, &self.wm, |wm| wm.reset_stats());
+    }
+
+    /// Load the snapshot of the cut memo saved under `dir` by
+    /// `save_cut_memo`. Return `False` if there is no snapshot yet.
+    pub fn load_cut_memo(&self, py: Python<'_>, dir: &str) -> PyResult<bool> {
+        with_word_motion(py, &self.wm, |wm| {
+            wm.load_cut_memo_snapshot(
+                Path::new(dir),
+                self.jieba.path.as_deref().map(Path::new),
+                CUTTER_ID,
+            )
+        })
+        .map_err(PyIOError::new_err)
+    }
+
+    /// Save the cut memo as a snapshot under `dir`, keyed by the jieba
+    /// dictionary in use.
+    pub fn save_cut_memo(&self, py: Python<'_>, dir: &str) -> PyResult<()> {
+        with_word_motion(py, &self.wm, |wm| {
+            wm.save_cut_memo_snapshot(
+                Path::new(dir),
+                self.jieba.path.as_deref().map(Path::new),
+                CUTTER_ID,
+            )
+        })
+        .map_err(PyIOError::new_err)
+    }
+
+    /// Load jieba on a background thread, which does not hold the GIL. A
+    /// motion made before the loading finishes waits for it to finish.
+    pub fn prewarm(&self) {
+        self.jieba.prewarm();
+    }
+
+    pub fn nmap<'py>(
+        &self,
+        buffer: &Bound<'py, PyAny>,
         motion: &[u8],
         cursor: Vec<usize>,
         count: u64,
-    ) -> PyResult<NmapOutputWrapper> {
-        if cursor.len() != 5 {
-            return Err(PyValueError::new_err(
-                "cursor must contain exactly 5 elements",
-            ));
-        }
-        let mut cursor_arr = [0usize; 5];
-        cursor_arr.copy_from_slice(&cursor);
-        Ok(NmapOutputWrapper(self.wm.nmap(
-            &BoundWrapper(buffer),
-            motion,
-            cursor_arr,
-            count,
-        )?))
-    }
-
-    pub fn xmap(
-        &mut self,
-        buffer: &Bound<'_, PyAny>,
+    ) -> PyResult<Bound<'py, PyAny>> {
+        let tracing = self.tracing();
+        let cursor_arr = {
+            let _span = tracing.span("convert_args");
+            to_array::<5>(&cursor, "cursor")?
+        };
+        let output = with_buffer(&self.wm, buffer, |wm, buffer| {
+            wm.nmap(buffer, motion, cursor_arr, count)
+        })?;
+        build_output(buffer.py(), &tracing, NmapOutputWrapper(output))
+    }
+
+    pub fn xmap<'py>(
+        &self,
+        buffer: &Bound<'py, PyAny>,
         visualmode: &[u8],
         motion: &[u8],
         visual_begin: Vec<usize>,
         visual_end: Vec<usize>,
         count: u64,
-    ) -> PyResult<XmapOutputWrapper> {
-        if visual_begin.len() != 4 {
-            return Err(PyValueError::new_err(
-                "visual_begin must contain exactly 4 elements",
-            ));
-        }
-        if visual_end.len() != 4 {
-            return Err(PyValueError::new_err(
-                "visual_end must contain exactly 4 elements",
-            ));
-        }
-        let mut visual_begin_arr = [0usize; 4];
-        visual_begin_arr.copy_from_slice(&visual_begin);
-        let mut visual_end_arr = [0usize; 4];
-        visual_end_arr.copy_from_slice(&visual_end);
-        Ok(XmapOutputWrapper(self.wm.xmap(
-            &BoundWrapper(buffer),
-            visualmode,
-            motion,
-            visual_begin_arr,
-            visual_end_arr,
-            count,
-        )?))
-    }
-
-    pub fn omap(
-        &mut self,
-        buffer: &Bound<'_, PyAny>,
+    ) -> PyResult<Bound<'py, PyAny>> {
+        let tracing = self.tracing();
+        let (visual_begin_arr, visual_end_arr) = {
+            let _span = tracing.span("convert_args");
+            (
+                to_array::<4>(&visual_begin, "visual_begin")?,
+                to_array::<4>(&visual_end, "visual_end")?,
+            )
+        };
+        let output = with_buffer(&self.wm, buffer, |wm, buffer| {
+            wm.xmap(
+                buffer,
+                visualmode,
+                motion,
+                visual_begin_arr,
+                visual_end_arr,
+                count,
+            )
+        })?;
+        build_output(buffer.py(), &tracing, XmapOutputWrapper(output))
+    }
+
+    pub fn omap<'py>(
+        &self,
+        buffer: &Bound<'py, PyAny>,
         motion: &[u8],
         cursor: Vec<usize>,
         count: u64,
         operator: &[u8],
-    ) -> PyResult<OmapOutputWrapper> {
-        if cursor.len() != 5 {
-            return Err(PyValueError::new_err(
-                "cursor must contain exactly 5 elements",
-            ));
-        }
-        let mut cursor_arr = [0usize; 5];
-        cursor_arr.copy_from_slice(&cursor);
-        Ok(OmapOutputWrapper(self.wm.omap(
-            &BoundWrapper(buffer),
-            motion,
-            cursor_arr,
-            count,
-            operator,
-        )?))
-    }
-
-    pub fn imap(
-        &mut self,
+    ) -> PyResult<Bound<'py, PyAny>> {
+        let tracing = self.tracing();
+        let cursor_arr = {
+            let _span = tracing.span("convert_args");
+            to_array::<5>(&cursor, "cursor")?
+        };
+        let output = with_buffer(&self.wm, buffer, |wm, buffer| {
+            wm.omap(buffer, motion, cursor_arr, count, operator)
+        })?;
+        build_output(buffer.py(), &tracing, OmapOutputWrapper(output))
+    }
+
+    pub fn imap<'py>(
+        &self,
+        buffer: &Bound<'py, PyAny>,
+        motion: &[u8],
+        cursor: Vec<usize>,
+    ) -> PyResult<Bound<'py, PyAny>> {
+        let tracing = self.tracing();
+        let cursor_arr = {
+            let _span = tracing.span("convert_args");
+            to_array::<5>(&cursor, "cursor")?
+        };
+        let output = with_buffer(&self.wm, buffer, |wm, buffer| {
+            wm.imap(buffer, motion, cursor_arr)
+        })?;
+        build_output(buffer.py(), &tracing, ImapOutputWrapper(output))
+    }
+
+    pub fn preview_nmap(
+        &self,
         buffer: &Bound<'_, PyAny>,
         motion: &[u8],
         cursor: Vec<usize>,
-    ) -> PyResult<ImapOutputWrapper> {
-        if cursor.len() != 5 {
+        preview_limit: usize,
+    ) -> PyResult<Vec<(usize, usize)>> {
+        if cursor.len() < 4 {
             return Err(PyValueError::new_err(
-                "cursor must contain exactly 5 elements",
+                "cursor must contain at least 4 elements",
             ));
         }
-        let mut cursor_arr = [0usize; 5];
-        cursor_arr.copy_from_slice(&cursor);
-        Ok(ImapOutputWrapper(self.wm.imap(
-            &BoundWrapper(buffer),
-            motion,
-            cursor_arr,
-        )?))
+        let mut cursor_arr = [0usize; 4];
+        cursor_arr.copy_from_slice(&cursor[..4]);
+        with_buffer(&self.wm, buffer, |wm, buffer| {
+            wm.preview_nmap(buffer, motion, cursor_arr, preview_limit)
+        })
     }
 
-    pub fn preview_nmap(
-        &mut self,
+    pub fn preview_nmap_batched(
+        &self,
         buffer: &Bound<'_, PyAny>,
         motion: &[u8],
         cursor: Vec<usize>,
         preview_limit: usize,
-    ) -> PyResult<Vec<(usize, usize)>> {
+        batch_size: usize,
+    ) -> PyResult<Vec<Vec<[usize; 3]>>> {
         if cursor.len() < 4 {
             return Err(PyValueError::new_err(
                 "cursor must contain at least 4 elements",
@@ -512,17 +1320,86 @@ impl LazyWordMotionWrapper {
         }
         let mut cursor_arr = [0usize; 4];
         cursor_arr.copy_from_slice(&cursor[..4]);
-        let [_, lnum, col, _] = cursor_arr;
-        preview::preview(
-            |b, (lnum, col)| {
-                let output =
-                    self.wm.nmap(b, motion, [0, lnum, col, 0, col], 1)?;
-                let [_, lnum, col, _] = output.cursor;
-                Ok((lnum, col))
-            },
-            &BoundWrapper(buffer),
-            (lnum, col),
-            preview_limit,
-        )
+        with_buffer(&self.wm, buffer, |wm, buffer| {
+            wm.preview_nmap_batched(
+                buffer,
+                motion,
+                cursor_arr,
+                preview_limit,
+                batch_size,
+            )
+        })
+    }
+
+    /// Tokenize lines `first..=last` (1-indexed) of `buffer` into `word`s,
+    /// or `WORD`s if `word` is false, and return `(bounds, index)` as two
+    /// `array('I')`s. The non-space tokens of the i-th line span bytes
+    /// `bounds[2 * j]` to `bounds[2 * j + 1]` (0-indexed, end exclusive), for
+    /// `j` in `range(index[i], index[i + 1])`. `last` defaults to the last
+    /// line.
+    #[pyo3(signature = (buffer, first=1, last=None, word=true))]
+    pub fn tokenize_lines(
+        &self,
+        buffer: &Bound<'_, PyAny>,
+        first: usize,
+        last: Option<usize>,
+        word: bool,
+    ) -> PyResult<TokenizedLinesWrapper> {
+        let last = last.unwrap_or(usize::MAX);
+        let output = with_buffer(&self.wm, buffer, |wm, buffer| {
+            wm.tokenize_lines(buffer, first, last, word)
+                .map_err(tokenize_lines_error)
+        })?;
+        Ok(TokenizedLinesWrapper(output))
+    }
+
+    /// Tokenize lines `first..=last` (1-indexed) of `buffer` into `word`s,
+    /// or `WORD`s if `word` is false, on `threads` threads (as many as there
+    /// are cores by default), and cache them for later motions. The GIL is
+    /// released while tokenizing. `last` defaults to the last line. Return
+    /// `(cached, skipped)`, the numbers of lines cached, and of lines
+    /// tokenized but left out of the cache, as they are too large for it.
+    #[pyo3(signature = (buffer, first=1, last=None, word=true, threads=None))]
+    pub fn fill_cache(
+        &self,
+        py: Python<'_>,
+        buffer: &Bound<'_, PyAny>,
+        first: usize,
+        last: Option<usize>,
+        word: bool,
+        threads: Option<usize>,
+    ) -> PyResult<(usize, usize)> {
+        let copied =
+            CopiedLines::new(buffer, first, last.unwrap_or(usize::MAX))?;
+        let filled = with_word_motion(py, &self.wm, |wm| {
+            wm.fill_cache(
+                copied.bufnr,
+                copied.first,
+                &copied.lines,
+                word,
+                threads.unwrap_or(0),
+            )
+        });
+        Ok((filled.cached, filled.skipped))
+    }
+
+    /// Count the `word`s, or `WORD`s if `word` is false, in lines
+    /// `first..=last` (1-indexed) of `buffer`, where a run of 汉字 counts as
+    /// the words jieba cuts it into. The word counts of the lines are kept
+    /// across calls, so that only the lines changed since, as told by
+    /// `on_lines`, are read and tokenized again. `last` defaults to the last
+    /// line.
+    #[pyo3(signature = (buffer, first=1, last=None, word=true))]
+    pub fn word_count(
+        &self,
+        buffer: &Bound<'_, PyAny>,
+        first: usize,
+        last: Option<usize>,
+        word: bool,
+    ) -> PyResult<u64> {
+        let last = last.unwrap_or(usize::MAX);
+        with_buffer(&self.wm, buffer, |wm, buffer| {
+            wm.word_count(buffer, first, last, word)
+        })
     }
 }
@@ -19,8 +19,27 @@ pub trait BufferLike {
     /// Get the line at line number `lnum` (1-indexed).
     fn getline(&self, lnum: usize) -> Result<String, Self::Error>;
 
+    /// Call `f` with the line at line number `lnum` (1-indexed) and return
+    /// its result. Implementors are encouraged to lend the line out of the
+    /// buffer's own storage, rather than copying it as in
+    /// [`getline`](BufferLike::getline).
+    fn with_line<R, F: FnOnce(&str) -> R>(
+        &self,
+        lnum: usize,
+        f: F,
+    ) -> Result<R, Self::Error> {
+        Ok(f(&self.getline(lnum)?))
+    }
+
     /// Get the total number of lines in the buffer.
     fn lines(&self) -> Result<usize, Self::Error>;
+
+    /// Get the buffer number, which tells apart the tokenized lines of
+    /// different buffers cached across motions. Buffers not backed by a Vim
+    /// buffer may all share the default number.
+    fn bufnr(&self) -> Result<usize, Self::Error> {
+        Ok(0)
+    }
 }
 
 impl BufferLike for Vec<String> {
@@ -30,6 +49,14 @@ impl BufferLike for Vec<String> {
         self.get(lnum - 1).map(|s| s.to_string()).ok_or(())
     }
 
+    fn with_line<R, F: FnOnce(&str) -> R>(
+        &self,
+        lnum: usize,
+        f: F,
+    ) -> Result<R, Self::Error> {
+        self.get(lnum - 1).map(|s| f(s)).ok_or(())
+    }
+
     fn lines(&self) -> Result<usize, Self::Error> {
         Ok(self.len())
     }
@@ -0,0 +1,92 @@
+// Copyright 2026 Kaiwen Wu. All Rights Reserved.
+//
+// Licensed under the Apache License, Version 2.0 (the "License"); you may not
+// use this file except in compliance with the License. You may obtain a copy
+// of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+// WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+// License for the specific language governing permissions and limitations
+// under the License.
+
+//! A Fenwick tree (binary indexed tree) of prefix sums.
+
+use std::ops::Range;
+
+/// Prefix sums over a sequence of counts, updated and queried in O(log n).
+pub struct Fenwick {
+    /// The i-th node (indexed from 1) holds the sum of the values from the
+    /// `i - (i & i.wrapping_neg()) + 1`-th to the i-th.
+    tree: Vec<u64>,
+}
+
+impl Fenwick {
+    /// Build the prefix sums of `values` in O(n).
+    pub fn from_values<I: IntoIterator<Item = u64>>(values: I) -> Self {
+        let mut tree: Vec<u64> = values.into_iter().collect();
+        for i in 1..=tree.len() {
+            let parent = i + (i & i.wrapping_neg());
+            if parent <= tree.len() {
+                tree[parent - 1] += tree[i - 1];
+            }
+        }
+        Self { tree }
+    }
+
+    /// Add `delta` to the `i`-th value (indexed from 0).
+    pub fn add(&mut self, i: usize, delta: i64) {
+        let mut i = i + 1;
+        while i <= self.tree.len() {
+            self.tree[i - 1] = self.tree[i - 1].wrapping_add_signed(delta);
+            i += i & i.wrapping_neg();
+        }
+    }
+
+    /// The sum of the first `n` values.
+    pub fn prefix_sum(&self, n: usize) -> u64 {
+        let mut i = n.min(self.tree.len());
+        let mut sum = 0;
+        while i > 0 {
+            sum += self.tree[i - 1];
+            i -= i & i.wrapping_neg();
+        }
+        sum
+    }
+
+    /// The sum of the values in `range`.
+    pub fn range_sum(&self, range: Range<usize>) -> u64 {
+        if range.start >= range.end {
+            return 0;
+        }
+        self.prefix_sum(range.end) - self.prefix_sum(range.start)
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::Fenwick;
+
+    #[test]
+    fn test_fenwick() {
+        let mut values = vec![3, 0, 1, 4, 1, 5, 9, 2, 6, 5, 3];
+        let mut fenwick = Fenwick::from_values(values.iter().copied());
+        for start in 0..=values.len() {
+            for end in start..=values.len() {
+                let sum: u64 = values[start..end].iter().sum();
+                assert_eq!(fenwick.range_sum(start..end), sum);
+            }
+        }
+        fenwick.add(4, 7);
+        values[4] += 7;
+        fenwick.add(0, -3);
+        values[0] -= 3;
+        for n in 0..=values.len() {
+            let sum: u64 = values[..n].iter().sum();
+            assert_eq!(fenwick.prefix_sum(n), sum);
+        }
+        assert_eq!(fenwick.range_sum(5..2), 0);
+    }
+}
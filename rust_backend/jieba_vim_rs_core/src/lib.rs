@@ -13,7 +13,10 @@
 // under the License.
 
 mod buffer;
+mod fenwick;
+mod lru;
 pub mod motion;
 pub mod token;
+pub mod trace;
 
 pub use buffer::BufferLike;
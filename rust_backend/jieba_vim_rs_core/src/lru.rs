@@ -0,0 +1,368 @@
+// Copyright 2026 Kaiwen Wu. All Rights Reserved.
+//
+// Licensed under the Apache License, Version 2.0 (the "License"); you may not
+// use this file except in compliance with the License. You may obtain a copy
+// of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+// WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+// License for the specific language governing permissions and limitations
+// under the License.
+
+//! A least-recently-used cache bounded by the total weight of its entries.
+
+use std::borrow::Borrow;
+use std::collections::HashMap;
+use std::hash::Hash;
+
+/// Sentinel index of the doubly linked list.
+const NIL: usize = usize::MAX;
+
+struct Node<K, V> {
+    key: K,
+    value: V,
+    weight: usize,
+    /// The more recently used neighbor.
+    prev: usize,
+    /// The less recently used neighbor.
+    next: usize,
+}
+
+/// A least-recently-used cache. Each entry is given a weight on insertion
+/// (typically its estimated size in bytes), and the least recently used
+/// entries are evicted whenever the total weight exceeds the capacity.
+pub struct LruCache<K, V> {
+    index: HashMap<K, usize>,
+    /// Entries are stored in a slab and linked by indices, ordered from the
+    /// most recently used (`head`) to the least recently used (`tail`).
+    nodes: Vec<Option<Node<K, V>>>,
+    free: Vec<usize>,
+    head: usize,
+    tail: usize,
+    weight: usize,
+    capacity: usize,
+    /// Number of entries evicted so far.
+    evictions: u64,
+}
+
+impl<K, V> LruCache<K, V> {
+    pub fn new(capacity: usize) -> Self {
+        Self {
+            index: HashMap::new(),
+            nodes: Vec::new(),
+            free: Vec::new(),
+            head: NIL,
+            tail: NIL,
+            weight: 0,
+            capacity,
+            evictions: 0,
+        }
+    }
+
+    /// The number of entries in the cache.
+    pub fn len(&self) -> usize {
+        self.index.len()
+    }
+
+    /// The total weight of the entries in the cache.
+    pub fn weight(&self) -> usize {
+        self.weight
+    }
+
+    pub fn capacity(&self) -> usize {
+        self.capacity
+    }
+
+    /// The number of entries evicted to keep within the capacity, since the
+    /// cache was created or since the counter was last reset.
+    pub fn evictions(&self) -> u64 {
+        self.evictions
+    }
+
+    pub fn reset_evictions(&mut self) {
+        self.evictions = 0;
+    }
+
+    pub fn clear(&mut self) {
+        self.index.clear();
+        self.nodes.clear();
+        self.free.clear();
+        self.head = NIL;
+        self.tail = NIL;
+        self.weight = 0;
+    }
+
+    /// Iterate over the entries from the least recently used to the most
+    /// recently used, without changing their recency.
+    pub fn iter(&self) -> impl Iterator<Item = (&K, &V)> {
+        let mut i = self.tail;
+        std::iter::from_fn(move || {
+            if i == NIL {
+                return None;
+            }
+            let node = self.node(i);
+            i = node.prev;
+            Some((&node.key, &node.value))
+        })
+    }
+
+    fn node(&self, i: usize) -> &Node<K, V> {
+        self.nodes[i].as_ref().unwrap()
+    }
+
+    fn node_mut(&mut self, i: usize) -> &mut Node<K, V> {
+        self.nodes[i].as_mut().unwrap()
+    }
+
+    fn unlink(&mut self, i: usize) {
+        let (prev, next) = {
+            let node = self.node(i);
+            (node.prev, node.next)
+        };
+        if prev == NIL {
+            self.head = next;
+        } else {
+            self.node_mut(prev).next = next;
+        }
+        if next == NIL {
+            self.tail = prev;
+        } else {
+            self.node_mut(next).prev = prev;
+        }
+    }
+
+    fn push_front(&mut self, i: usize) {
+        let head = self.head;
+        {
+            let node = self.node_mut(i);
+            node.prev = NIL;
+            node.next = head;
+        }
+        if head == NIL {
+            self.tail = i;
+        } else {
+            self.node_mut(head).prev = i;
+        }
+        self.head = i;
+    }
+}
+
+impl<K: Hash + Eq + Clone, V> LruCache<K, V> {
+    /// Change the capacity, evicting entries as needed.
+    pub fn set_capacity(&mut self, capacity: usize) {
+        self.capacity = capacity;
+        self.evict();
+    }
+
+    fn evict(&mut self) {
+        while self.weight > self.capacity && self.tail != NIL {
+            let i = self.tail;
+            self.unlink(i);
+            let node = self.nodes[i].take().unwrap();
+            self.free.push(i);
+            self.index.remove(&node.key);
+            self.weight -= node.weight;
+            self.evictions += 1;
+        }
+    }
+
+    /// Whether `key` is in the cache. Does not update the recency.
+    pub fn contains_key<Q>(&self, key: &Q) -> bool
+    where
+        K: Borrow<Q>,
+        Q: Hash + Eq + ?Sized,
+    {
+        self.index.contains_key(key)
+    }
+
+    /// Get the value of `key` without changing its recency.
+    pub fn peek<Q>(&self, key: &Q) -> Option<&V>
+    where
+        K: Borrow<Q>,
+        Q: Hash + Eq + ?Sized,
+    {
+        let i = *self.index.get(key)?;
+        Some(&self.node(i).value)
+    }
+
+    /// Get the value of `key` and mark it as the most recently used.
+    pub fn get<Q>(&mut self, key: &Q) -> Option<&V>
+    where
+        K: Borrow<Q>,
+        Q: Hash + Eq + ?Sized,
+    {
+        let i = *self.index.get(key)?;
+        self.unlink(i);
+        self.push_front(i);
+        Some(&self.node(i).value)
+    }
+
+    /// Insert `value` of `weight` under `key`, replacing the old value if
+    /// any, and mark it as the most recently used. Other entries are evicted
+    /// as needed. If `weight` alone exceeds the capacity, `value` is not
+    /// inserted but handed back.
+    pub fn insert(&mut self, key: K, value: V, weight: usize) -> Option<V> {
+        self.remove(&key);
+        if weight > self.capacity {
+            return Some(value);
+        }
+        let node = Node {
+            key: key.clone(),
+            value,
+            weight,
+            prev: NIL,
+            next: NIL,
+        };
+        let i = match self.free.pop() {
+            Some(i) => {
+                self.nodes[i] = Some(node);
+                i
+            }
+            None => {
+                self.nodes.push(Some(node));
+                self.nodes.len() - 1
+            }
+        };
+        self.push_front(i);
+        self.index.insert(key, i);
+        self.weight += weight;
+        self.evict();
+        None
+    }
+
+    /// Change the key of each entry to `f(key)`, or remove the entry if `f`
+    /// returns `None`, without changing their recency. `f` must not map two
+    /// retained keys to the same key.
+    pub fn rekey<F>(&mut self, mut f: F)
+    where
+        F: FnMut(&K) -> Option<K>,
+    {
+        self.index.clear();
+        for i in 0..self.nodes.len() {
+            let key = match &self.nodes[i] {
+                Some(node) => f(&node.key),
+                None => continue,
+            };
+            match key {
+                Some(key) => {
+                    self.index.insert(key.clone(), i);
+                    self.node_mut(i).key = key;
+                }
+                None => {
+                    self.unlink(i);
+                    let node = self.nodes[i].take().unwrap();
+                    self.free.push(i);
+                    self.weight -= node.weight;
+                }
+            }
+        }
+        debug_assert_eq!(
+            self.index.len(),
+            self.nodes.iter().filter(|node| node.is_some()).count()
+        );
+    }
+
+    /// Remove `key` from the cache and return its value, if any.
+    pub fn remove<Q>(&mut self, key: &Q) -> Option<V>
+    where
+        K: Borrow<Q>,
+        Q: Hash + Eq + ?Sized,
+    {
+        let i = self.index.remove(key)?;
+        self.unlink(i);
+        let node = self.nodes[i].take().unwrap();
+        self.free.push(i);
+        self.weight -= node.weight;
+        Some(node.value)
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::LruCache;
+
+    #[test]
+    fn test_lru_evicts_least_recently_used() {
+        let mut cache = LruCache::new(3);
+        assert_eq!(cache.insert(1, "a", 1), None);
+        assert_eq!(cache.insert(2, "b", 1), None);
+        assert_eq!(cache.insert(3, "c", 1), None);
+        assert_eq!(cache.get(&1), Some(&"a"));
+        // Peeking does not save 2 from eviction.
+        assert_eq!(cache.peek(&2), Some(&"b"));
+        assert_eq!(cache.insert(4, "d", 1), None);
+        assert!(cache.contains_key(&1));
+        assert!(!cache.contains_key(&2));
+        assert!(cache.contains_key(&3));
+        assert!(cache.contains_key(&4));
+        assert_eq!(cache.len(), 3);
+        assert_eq!(cache.weight(), 3);
+    }
+
+    #[test]
+    fn test_lru_iter() {
+        let mut cache = LruCache::new(10);
+        cache.insert(1, "a", 1);
+        cache.insert(2, "b", 1);
+        cache.insert(3, "c", 1);
+        cache.get(&1);
+        let entries: Vec<_> = cache.iter().map(|(k, v)| (*k, *v)).collect();
+        assert_eq!(entries, vec![(2, "b"), (3, "c"), (1, "a")]);
+    }
+
+    #[test]
+    fn test_lru_weight() {
+        let mut cache = LruCache::new(10);
+        cache.insert(1, (), 4);
+        cache.insert(2, (), 4);
+        cache.insert(3, (), 4);
+        assert!(!cache.contains_key(&1));
+        assert_eq!(cache.weight(), 8);
+        // Replacing an entry releases its old weight.
+        cache.insert(2, (), 1);
+        assert_eq!(cache.weight(), 5);
+        // Too heavy to be inserted at all.
+        assert_eq!(cache.insert(4, (), 11), Some(()));
+        assert!(!cache.contains_key(&4));
+        assert_eq!(cache.weight(), 5);
+        cache.set_capacity(2);
+        assert_eq!(cache.len(), 1);
+        assert!(cache.contains_key(&2));
+        assert_eq!(cache.evictions(), 2);
+        assert_eq!(cache.remove(&2), Some(()));
+        assert_eq!(cache.weight(), 0);
+        assert_eq!(cache.len(), 0);
+    }
+
+    #[test]
+    fn test_lru_rekey() {
+        let mut cache = LruCache::new(10);
+        cache.insert(1, "a", 1);
+        cache.insert(2, "b", 1);
+        cache.insert(3, "c", 1);
+        cache.rekey(|k| match k {
+            1 => Some(1),
+            2 => None,
+            k => Some(k + 10),
+        });
+        assert_eq!(cache.len(), 2);
+        assert_eq!(cache.weight(), 2);
+        assert_eq!(cache.get(&1), Some(&"a"));
+        assert_eq!(cache.get(&2), None);
+        assert_eq!(cache.get(&3), None);
+        assert_eq!(cache.get(&13), Some(&"c"));
+        // The freed slot is reused.
+        cache.insert(4, "d", 1);
+        assert_eq!(cache.len(), 3);
+    }
+
+    #[test]
+    fn test_lru_zero_capacity() {
+        let mut cache = LruCache::new(0);
+        assert_eq!(cache.insert(1, 1, 1), Some(1));
+        assert_eq!(cache.get(&1), None);
+    }
+}
@@ -14,11 +14,30 @@
 
 //! The main interface of module [`jieba_vim_rs_core::motion`](crate::motion).
 
+use std::collections::HashMap;
+use std::io::{self, Read, Write};
+use std::sync::Arc;
+use std::time::Instant;
+
 use crate::BufferLike;
-use crate::token::{JiebaPlaceholder, Tokenizer};
+use crate::token::{CutMemoStats, JiebaPlaceholder, Tokenizer};
+use crate::trace::{Tracer, Tracing};
+
+use super::core::buffer::{Filled, ParsedBuffer, TokenCache};
+use super::core::position::Position;
+use super::core::word_count::LineWordCounts;
+use super::stats::CallStats;
 
 pub struct WordMotion<C> {
     pub(super) tokenizer: Tokenizer<C>,
+    /// Tokenized lines kept across motions.
+    pub(super) cache: TokenCache,
+    /// Word counts of the lines of each buffer, keyed by the buffer number
+    /// and whether they count `word`s (otherwise `WORD`s).
+    pub(super) word_counts: HashMap<(usize, bool), LineWordCounts>,
+    /// Calls made, with the other counters and timers left to be collected
+    /// by [`stats`](WordMotion::stats).
+    pub(super) stats: CallStats,
 }
 
 /// Output types related to FFI bindings.
@@ -51,6 +70,17 @@ pub mod ffi {
     pub struct ImapOutput {
         pub cursor: Position,
     }
+
+    /// The non-space tokens of consecutive lines, in compressed sparse row
+    /// layout.
+    pub struct TokenizedLines {
+        /// The start and end (exclusive) byte offsets of each token, indexed
+        /// from 0 within its line, flattened into one vec.
+        pub bounds: Vec<u32>,
+        /// The tokens of the i-th line are `bounds[2 * index[i]..2 *
+        /// index[i + 1]]`. Its length is the number of lines plus one.
+        pub index: Vec<u32>,
+    }
 }
 
 /// Output types for inner-crate use.
@@ -180,12 +210,164 @@ pub(crate) use inner::{
 
 impl<C> WordMotion<C> {
     pub fn new(tokenizer: Tokenizer<C>) -> Self {
-        Self { tokenizer }
+        Self {
+            tokenizer,
+            cache: TokenCache::default(),
+            word_counts: HashMap::new(),
+            stats: CallStats::default(),
+        }
     }
 
+    /// Get the tokenizer for modification. Since the tokenization result may
+    /// change afterwards, the cached tokenized lines are dropped.
     pub fn get_tokenizer_mut(&mut self) -> &mut Tokenizer<C> {
+        self.cache.clear();
+        self.word_counts.clear();
         &mut self.tokenizer
     }
+
+    /// The maximum number of bytes taken by the tokenized lines cached across
+    /// motions.
+    pub fn cache_capacity(&self) -> usize {
+        self.cache.capacity()
+    }
+
+    /// Set the maximum number of bytes taken by the tokenized lines cached
+    /// across motions. The least recently used lines are evicted as needed.
+    /// Zero `capacity` disables the cache.
+    pub fn set_cache_capacity(&mut self, capacity: usize) {
+        self.cache.set_capacity(capacity);
+    }
+
+    /// Drop all tokenized lines cached across motions, and the word counts.
+    pub fn clear_cache(&mut self) {
+        self.cache.clear();
+        self.word_counts.clear();
+    }
+
+    /// Notify that lines `first..last_old` (0-indexed, end exclusive) in
+    /// buffer `bufnr` have been replaced by lines `first..last_new`, so that
+    /// only the tokenized lines touched by the change are dropped from the
+    /// cache. The arguments follow the convention of Neovim's `on_lines`
+    /// callback of `nvim_buf_attach()`.
+    pub fn on_lines(
+        &mut self,
+        bufnr: usize,
+        first: usize,
+        last_old: usize,
+        last_new: usize,
+    ) {
+        self.cache.on_lines(bufnr, first, last_old, last_new);
+        for word in [true, false] {
+            if let Some(counts) = self.word_counts.get_mut(&(bufnr, word)) {
+                counts.on_lines(first, last_old, last_new);
+            }
+        }
+    }
+
+    /// Tokenize `lines`, which are lines `first..` (1-indexed) of buffer
+    /// `bufnr`, on up to `threads` threads (as many as there are cores if
+    /// zero), and cache them, so that motions over them need not tokenize
+    /// them again. The lines are tokenized into `word`s if `word` is `true`,
+    /// otherwise into `WORD`s. Return the numbers of lines cached, and of
+    /// lines tokenized but left out of the cache.
+    pub fn fill_cache<S: AsRef<str> + Sync>(
+        &mut self,
+        bufnr: usize,
+        first: usize,
+        lines: &[S],
+        word: bool,
+        threads: usize,
+    ) -> Filled
+    where
+        C: JiebaPlaceholder + Sync,
+    {
+        let start = Instant::now();
+        let tracing = self.tokenizer.tracing().clone();
+        let _span = tracing.span("fill_cache");
+        let filled = self.cache.fill(
+            &self.tokenizer,
+            bufnr,
+            first,
+            lines,
+            word,
+            threads,
+        );
+        self.record_call("fill_cache", b"", start);
+        filled
+    }
+
+    /// Set the tracer of the phases of motions, or disable tracing if
+    /// `tracer` is `None`. The spans traced are the calls, e.g. `"nmap"`,
+    /// and within them `"fetch_line"`, `"parse_str1"` and `"jieba_cut"`,
+    /// or `"fill_chunk"` for each chunk of lines tokenized by
+    /// [`fill_cache`](WordMotion::fill_cache).
+    pub fn set_tracer(&mut self, tracer: Option<Arc<dyn Tracer>>) {
+        self.tokenizer.set_tracer(tracer);
+    }
+
+    pub fn tracing(&self) -> &Tracing {
+        self.tokenizer.tracing()
+    }
+
+    /// Set the maximum number of bytes taken by the memo of jieba cut
+    /// results, which is shared by all buffers. Zero `capacity` disables the
+    /// memo.
+    pub fn set_cut_memo_capacity(&mut self, capacity: usize) {
+        self.tokenizer.set_cut_memo_capacity(capacity);
+    }
+
+    /// Get the hit/miss counters and the size of the memo of jieba cut
+    /// results.
+    pub fn cut_memo_stats(&self) -> CutMemoStats {
+        self.tokenizer.cut_memo_stats()
+    }
+
+    /// Save the memo of jieba cut results to `writer`.
+    pub fn save_cut_memo<W: Write>(&self, writer: &mut W) -> io::Result<()> {
+        self.tokenizer.save_cut_memo(writer)
+    }
+
+    /// Load the jieba cut results saved by
+    /// [`save_cut_memo`](WordMotion::save_cut_memo) into the memo. The cut
+    /// results must have been made by the same jieba dictionary.
+    pub fn load_cut_memo<R: Read>(&mut self, reader: &mut R) -> io::Result<()> {
+        self.tokenizer.load_cut_memo(reader)
+    }
+
+    /// Wrap `buffer` so that its lines are tokenized on demand, reusing and
+    /// updating the tokenized lines cached across motions. Within
+    /// [`focused`](WordMotion::focused), a long line missing from the cache
+    /// is tokenized only around where the motion starts.
+    pub(super) fn parsed_buffer<'b, B: ?Sized>(
+        &mut self,
+        buffer: &'b B,
+        into_word: bool,
+    ) -> ParsedBuffer<'b, '_, B, C> {
+        ParsedBuffer::new(buffer, &self.tokenizer, &mut self.cache, into_word)
+            .around_focus()
+    }
+
+    /// Run `motion` from `start`, tokenizing a long line missing from the
+    /// cache only around `start`, so that a motion over a few words of a long
+    /// line costs about as much as over a short one. Should the motion look
+    /// past the tokens of the line around `start`, as told by the positions
+    /// it `reached`, it is run again over whole lines.
+    pub(super) fn focused<R, E>(
+        &mut self,
+        start: Position,
+        motion: impl Fn(&mut Self) -> Result<R, E>,
+        reached: impl Fn(&R) -> Vec<Position>,
+    ) -> Result<R, E> {
+        self.cache.focus(start.lnum, start.col);
+        let output = motion(self);
+        let reached = output.as_ref().ok().map(reached);
+        if self.cache.unfocus(reached.as_deref()) {
+            output
+        } else {
+            motion(self)
+        }
+    }
 }
 
 impl<C: JiebaPlaceholder> WordMotion<C> {
@@ -196,23 +378,22 @@ impl<C: JiebaPlaceholder> WordMotion<C> {
         cursor: ffi::CursorPositionCurswant,
         count: u64,
     ) -> Result<ffi::NmapOutput, B::Error> {
+        let start = Instant::now();
+        let tracing = self.tokenizer.tracing().clone();
+        let _span = tracing.span("nmap");
         let count = count.max(1);
-        let cursor = cursor.into();
-        let output = match motion {
-            b"w" | b"W" => {
-                self.nmap_w(buffer, cursor, count, motion[0] == b'w')
-            }
-            b"b" | b"B" => {
-                self.nmap_b(buffer, cursor, count, motion[0] == b'b')
-            }
-            b"e" | b"E" => {
-                self.nmap_e(buffer, cursor, count, motion[0] == b'e')
-            }
+        let cursor: Position = cursor.into();
+        let nmap = |wm: &mut Self| match motion {
+            b"w" | b"W" => wm.nmap_w(buffer, cursor, count, motion[0] == b'w'),
+            b"b" | b"B" => wm.nmap_b(buffer, cursor, count, motion[0] == b'b'),
+            b"e" | b"E" => wm.nmap_e(buffer, cursor, count, motion[0] == b'e'),
             b"ge" | b"gE" => {
-                self.nmap_ge(buffer, cursor, count, motion[1] == b'e')
+                wm.nmap_ge(buffer, cursor, count, motion[1] == b'e')
             }
             _ => unreachable!("invalid motion key sequence: {:?}", motion),
-        }?;
+        };
+        let output = self.focused(cursor, nmap, |o| vec![o.cursor])?;
+        self.record_call("nmap", motion, start);
         Ok(output.into())
     }
 
@@ -225,12 +406,15 @@ impl<C: JiebaPlaceholder> WordMotion<C> {
         visual_end: ffi::Position,
         count: u64,
     ) -> Result<ffi::XmapOutput, B::Error> {
+        let start = Instant::now();
+        let tracing = self.tokenizer.tracing().clone();
+        let _span = tracing.span("xmap");
         let count = count.max(1);
         let visualmode = visualmode.into();
         let visual_begin = visual_begin.into();
-        let visual_end = visual_end.into();
-        let output = match motion {
-            b"w" | b"W" => self.xmap_w(
+        let visual_end: Position = visual_end.into();
+        let xmap = |wm: &mut Self| match motion {
+            b"w" | b"W" => wm.xmap_w(
                 buffer,
                 visualmode,
                 visual_begin,
@@ -238,7 +422,7 @@ impl<C: JiebaPlaceholder> WordMotion<C> {
                 count,
                 motion[0] == b'w',
             ),
-            b"b" | b"B" => self.xmap_b(
+            b"b" | b"B" => wm.xmap_b(
                 buffer,
                 visualmode,
                 visual_begin,
@@ -246,7 +430,7 @@ impl<C: JiebaPlaceholder> WordMotion<C> {
                 count,
                 motion[0] == b'b',
             ),
-            b"e" | b"E" => self.xmap_e(
+            b"e" | b"E" => wm.xmap_e(
                 buffer,
                 visualmode,
                 visual_begin,
@@ -254,7 +438,7 @@ impl<C: JiebaPlaceholder> WordMotion<C> {
                 count,
                 motion[0] == b'e',
             ),
-            b"ge" | b"gE" => self.xmap_ge(
+            b"ge" | b"gE" => wm.xmap_ge(
                 buffer,
                 visualmode,
                 visual_begin,
@@ -262,7 +446,7 @@ impl<C: JiebaPlaceholder> WordMotion<C> {
                 count,
                 motion[1] == b'e',
             ),
-            b"iw" | b"iW" => self.xmap_iw(
+            b"iw" | b"iW" => wm.xmap_iw(
                 buffer,
                 visualmode,
                 visual_begin,
@@ -270,7 +454,7 @@ impl<C: JiebaPlaceholder> WordMotion<C> {
                 count,
                 motion[1] == b'w',
             ),
-            b"aw" | b"aW" => self.xmap_aw(
+            b"aw" | b"aW" => wm.xmap_aw(
                 buffer,
                 visualmode,
                 visual_begin,
@@ -279,7 +463,10 @@ impl<C: JiebaPlaceholder> WordMotion<C> {
                 motion[1] == b'w',
             ),
             _ => unreachable!("invalid motion key sequence: {:?}", motion),
-        }?;
+        };
+        let output =
+            self.focused(visual_end, xmap, |o| vec![o.langle, o.rangle])?;
+        self.record_call("xmap", motion, start);
         Ok(output.into())
     }
 
@@ -291,29 +478,35 @@ impl<C: JiebaPlaceholder> WordMotion<C> {
         count: u64,
         operator: &[u8],
     ) -> Result<ffi::OmapOutput, B::Error> {
+        let start = Instant::now();
+        let tracing = self.tokenizer.tracing().clone();
+        let _span = tracing.span("omap");
         let count = count.max(1);
-        let cursor = cursor.into();
-        let output = match motion {
+        let cursor: Position = cursor.into();
+        let omap = |wm: &mut Self| match motion {
             b"w" | b"W" => {
-                self.omap_w(buffer, cursor, count, motion[0] == b'w', operator)
+                wm.omap_w(buffer, cursor, count, motion[0] == b'w', operator)
             }
             b"b" | b"B" => {
-                self.omap_b(buffer, cursor, count, motion[0] == b'b', operator)
+                wm.omap_b(buffer, cursor, count, motion[0] == b'b', operator)
             }
             b"e" | b"E" => {
-                self.omap_e(buffer, cursor, count, motion[0] == b'e', operator)
+                wm.omap_e(buffer, cursor, count, motion[0] == b'e', operator)
             }
             b"ge" | b"gE" => {
-                self.omap_ge(buffer, cursor, count, motion[1] == b'e', operator)
+                wm.omap_ge(buffer, cursor, count, motion[1] == b'e', operator)
             }
             b"iw" | b"iW" => {
-                self.omap_iw(buffer, cursor, count, motion[1] == b'w', operator)
+                wm.omap_iw(buffer, cursor, count, motion[1] == b'w', operator)
             }
             b"aw" | b"aW" => {
-                self.omap_aw(buffer, cursor, count, motion[1] == b'w', operator)
+                wm.omap_aw(buffer, cursor, count, motion[1] == b'w', operator)
             }
             _ => unreachable!("invalid motion key sequence: {:?}", motion),
-        }?;
+        };
+        let output =
+            self.focused(cursor, omap, |o| vec![o.cursor, o.langle, o.rangle])?;
+        self.record_call("omap", motion, start);
         Ok(output.into())
     }
 
@@ -323,28 +516,113 @@ impl<C: JiebaPlaceholder> WordMotion<C> {
         motion: &[u8],
         cursor: ffi::CursorPositionCurswant,
     ) -> Result<ffi::ImapOutput, B::Error> {
-        let output = match motion {
+        let start = Instant::now();
+        let tracing = self.tokenizer.tracing().clone();
+        let _span = tracing.span("imap");
+        let cursor: Position = cursor.into();
+        let imap = |wm: &mut Self| match motion {
             // \<C-W>
-            b"\x17" | b"\\u0017" => self.imap_ctrl_w(buffer, cursor.into()),
+            b"\x17" | b"\\u0017" => wm.imap_ctrl_w(buffer, cursor),
             // \<C-Left>. Also accepting double-backslash version due to json-
             // decoding issue in Vim. Same below.
             b"\x80\xfdU" | b"\\u0080\\u00fdU" | b"\\\\u0080\\\\u00fdU" => {
-                self.imap_ctrl_left(buffer, cursor.into())
+                wm.imap_ctrl_left(buffer, cursor)
             }
             // \<C-Right>
             b"\x80\xfdV" | b"\\u0080\\u00fdV" | b"\\\\u0080\\\\u00fdV" => {
-                self.imap_ctrl_right(buffer, cursor.into())
+                wm.imap_ctrl_right(buffer, cursor)
             }
             // \<S-Left>
             b"\x80#4" | b"\\u0080#4" | b"\\\\u0080#4" => {
-                self.imap_shift_left(buffer, cursor.into())
+                wm.imap_shift_left(buffer, cursor)
             }
             // \<S-Right>
             b"\x80%i" | b"\\u0080%i" | b"\\\\u0080%i" => {
-                self.imap_shift_right(buffer, cursor.into())
+                wm.imap_shift_right(buffer, cursor)
             }
             _ => unreachable!("invalid motion key sequence: {:?}", motion),
-        }?;
+        };
+        let output = self.focused(cursor, imap, |o| vec![o.cursor])?;
+        self.record_call("imap", motion, start);
         Ok(output.into())
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use crate::token::Tokenizer;
+    use crate::token::jieba::KeywordCutter;
+
+    use super::WordMotion;
+
+    #[test]
+    fn test_motions_on_long_line_same_as_on_whole_line() {
+        let new_word_motion = || {
+            WordMotion::new(Tokenizer::new(
+                KeywordCutter::new(["你好".into(), "中国".into()]),
+                "@,48-57,_,192-255",
+            ))
+        };
+        let long_line: String = (0..300)
+            .map(|i| format!("你好{}，中国人 foo(bar{})。  ", i, i * 37))
+            .collect();
+        let buffer: Vec<String> =
+            vec!["再见".into(), long_line.clone(), "世界 baz".into()];
+        // The long line is tokenized as a whole in the cache of `whole`, and
+        // around the cursor in that of `part`.
+        let mut whole = new_word_motion();
+        whole.fill_cache(0, 1, &buffer, true, 1);
+        whole.fill_cache(0, 1, &buffer, false, 1);
+        let mut part = new_word_motion();
+        let cols = long_line
+            .char_indices()
+            .map(|(i, _)| i + 1)
+            .step_by(251)
+            .chain([1, long_line.len()]);
+        for col in cols {
+            let cursor = [0, 2, col, 0, col];
+            for count in [1, 3, 1000] {
+                for motion in [&b"w"[..], b"W", b"b", b"e", b"ge"] {
+                    part.clear_cache();
+                    let expected =
+                        whole.nmap(&buffer, motion, cursor, count).unwrap();
+                    let output =
+                        part.nmap(&buffer, motion, cursor, count).unwrap();
+                    assert_eq!(
+                        output.cursor, expected.cursor,
+                        "col={} count={} motion={:?}",
+                        col, count, motion
+                    );
+                }
+                for motion in [&b"w"[..], b"iw", b"aw"] {
+                    part.clear_cache();
+                    let expected = whole
+                        .omap(&buffer, motion, cursor, count, b"c")
+                        .unwrap();
+                    let output = part
+                        .omap(&buffer, motion, cursor, count, b"c")
+                        .unwrap();
+                    assert_eq!(
+                        (output.langle, output.rangle),
+                        (expected.langle, expected.rangle),
+                        "col={} count={} motion={:?}",
+                        col,
+                        count,
+                        motion
+                    );
+                }
+            }
+            for limit in [0, 5] {
+                part.clear_cache();
+                let cursor = [0, 2, col, 0];
+                assert_eq!(
+                    part.preview_nmap(&buffer, b"w", cursor, limit).unwrap(),
+                    whole.preview_nmap(&buffer, b"w", cursor, limit).unwrap(),
+                    "col={} limit={}",
+                    col,
+                    limit
+                );
+            }
+        }
+    }
+}
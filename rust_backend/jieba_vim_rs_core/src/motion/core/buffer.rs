@@ -12,10 +12,21 @@
 // License for the specific language governing permissions and limitations
 // under the License.
 
-use std::collections::HashMap;
+use std::collections::{HashMap, HashSet};
+use std::hash::{DefaultHasher, Hash, Hasher};
+use std::mem;
+use std::num::NonZeroUsize;
+use std::ops::Range;
+use std::thread;
+use std::time::{Duration, Instant};
 
 use crate::BufferLike;
-use crate::token::{JiebaPlaceholder, Token, Tokenizer};
+use crate::lru::LruCache;
+use crate::token::{
+    JiebaPlaceholder, LineTokens, PackedTokens, Token, TokenLike, Tokenizer,
+};
+
+use super::position::Position;
 
 /// Any type that resembles a Vim buffer but returns tokenized lines, often
 /// implemented with an internal cache.
@@ -23,30 +34,477 @@ pub trait ParsedBufferLike: BufferLike {
     /// Either return the cached tokenized line, or tokenize the requested
     /// line, update the cache (which requires mut self), and return the
     /// tokenization result.
-    fn getline_parsed(&mut self, lnum: usize) -> Result<&[Token], Self::Error>;
+    fn getline_parsed(
+        &mut self,
+        lnum: usize,
+    ) -> Result<LineTokens<'_>, Self::Error>;
+}
+
+/// Default capacity of [`TokenCache`] in bytes.
+pub const DEFAULT_TOKEN_CACHE_CAPACITY: usize = 16 * 1024 * 1024;
+
+/// Lines longer than this many bytes are tokenized window by window.
+const LONG_LINE_LEN: usize = 4096;
+
+/// Minimum byte length of the windows of a long line.
+const MIN_WINDOW_LEN: usize = 1024;
+
+/// Part of the capacity of [`TokenCache`] given to the windows of long lines.
+const WINDOW_CACHE_SHARE: usize = 4;
+
+/// Key of a cached tokenized line: the buffer number, the line number, and
+/// whether the line is tokenized into `word`s (otherwise `WORD`s).
+type LineKey = (usize, usize, bool);
+
+/// Key of the cached tokens of a window of a long line: the hash of the
+/// window content, and whether the window is tokenized into `word`s.
+type WindowKey = (u64, bool);
+
+/// A tokenized line, and the hash of the line content it's tokenized from.
+/// The tokens are packed so that caching a whole large buffer is affordable.
+struct CachedLine {
+    hash: u64,
+    tokens: PackedTokens,
+}
+
+impl CachedLine {
+    /// Estimated number of bytes taken by the cache entry.
+    fn weight(&self) -> usize {
+        mem::size_of::<LineKey>()
+            + mem::size_of::<Self>()
+            + self.tokens.heap_size()
+    }
+}
+
+pub fn hash_line(line: &str) -> u64 {
+    let mut hasher = DefaultHasher::new();
+    line.hash(&mut hasher);
+    hasher.finish()
+}
+
+/// Counters and timers of the lines tokenized through a [`TokenCache`].
+#[derive(Debug, Default, Clone, Copy, PartialEq, Eq)]
+pub struct ParseStats {
+    /// Time spent fetching lines from buffers.
+    pub fetch_time: Duration,
+    /// Time spent tokenizing lines, jieba included.
+    pub tokenize_time: Duration,
+    /// Number of lines tokenized.
+    pub lines_parsed: u64,
+    /// Number of lines looked up and found up to date in the cache.
+    pub hits: u64,
+    /// Number of lines looked up and found missing or outdated.
+    pub misses: u64,
+    /// Number of lines evicted from the cache.
+    pub evictions: u64,
+}
+
+/// The lines tokenized by [`TokenCache::fill`].
+#[derive(Debug, Default, Clone, Copy, PartialEq, Eq)]
+pub struct Filled {
+    /// Number of lines tokenized and cached.
+    pub cached: usize,
+    /// Number of lines tokenized but not cached, as they cannot be packed or
+    /// weigh more than the capacity of the cache. They are left to be
+    /// tokenized on demand.
+    pub skipped: usize,
+}
+
+/// Where a motion starts, around which a long line missing from the cache is
+/// tokenized only in part, and what the motion has seen of the buffer.
+struct Focus {
+    lnum: usize,
+    col: usize,
+    /// The columns (1-indexed, end exclusive) where the tokens of line `lnum`
+    /// are those of the whole line, if the line is tokenized in part.
+    trusted: Option<Range<usize>>,
+    /// Whether any other line has been looked up.
+    strayed: bool,
+}
+
+/// Tokenized lines kept across motions, bounded in memory by evicting the
+/// least recently used lines. A cached line is reused only if the content
+/// of the line is unchanged since it was tokenized.
+pub struct TokenCache {
+    lines: LruCache<LineKey, CachedLine>,
+    /// Tokens of the windows of long lines, indexed from 0 in the window.
+    windows: LruCache<WindowKey, PackedTokens>,
+    /// Counters and timers, except for the evictions counted by `lines`.
+    stats: ParseStats,
+    focus: Option<Focus>,
+}
+
+impl Default for TokenCache {
+    fn default() -> Self {
+        Self::new(DEFAULT_TOKEN_CACHE_CAPACITY)
+    }
+}
+
+impl TokenCache {
+    /// Create a cache that takes at most around `capacity` bytes. Zero
+    /// `capacity` disables the cache.
+    pub fn new(capacity: usize) -> Self {
+        Self {
+            lines: LruCache::new(capacity),
+            windows: LruCache::new(capacity / WINDOW_CACHE_SHARE),
+            stats: ParseStats::default(),
+            focus: None,
+        }
+    }
+
+    pub fn capacity(&self) -> usize {
+        self.lines.capacity()
+    }
+
+    pub fn set_capacity(&mut self, capacity: usize) {
+        self.lines.set_capacity(capacity);
+        self.windows.set_capacity(capacity / WINDOW_CACHE_SHARE);
+    }
+
+    pub fn clear(&mut self) {
+        self.lines.clear();
+        self.windows.clear();
+    }
+
+    /// Get the counters and timers since the cache was created or since
+    /// [`reset_stats`](TokenCache::reset_stats).
+    pub fn stats(&self) -> ParseStats {
+        ParseStats {
+            evictions: self.lines.evictions(),
+            ..self.stats
+        }
+    }
+
+    pub fn reset_stats(&mut self) {
+        self.stats = ParseStats::default();
+        self.lines.reset_evictions();
+    }
+
+    /// Have the motions over [`ParsedBuffer::around_focus`] tokenize line
+    /// `lnum`, if long and missing from the cache, only around column `col`
+    /// (1-indexed), until [`unfocus`](TokenCache::unfocus).
+    pub(crate) fn focus(&mut self, lnum: usize, col: usize) {
+        self.focus = Some(Focus {
+            lnum,
+            col,
+            trusted: None,
+            strayed: false,
+        });
+    }
+
+    /// Stop tokenizing around the focus. Return whether the motion run since
+    /// [`focus`](TokenCache::focus), which reached the positions `reached`
+    /// or failed if `None`, went as it would have over whole lines. That is
+    /// so if no line was tokenized in part, or if the motion looked up no
+    /// other line and reached only columns where the tokens are those of the
+    /// whole line.
+    pub(crate) fn unfocus(&mut self, reached: Option<&[Position]>) -> bool {
+        let Some(focus) = self.focus.take() else {
+            return true;
+        };
+        let Some(trusted) = focus.trusted else {
+            return true;
+        };
+        !focus.strayed
+            && reached.is_some_and(|reached| {
+                reached.iter().all(|pos| {
+                    pos.lnum == focus.lnum && trusted.contains(&pos.col)
+                })
+            })
+    }
+
+    /// Tokenize `line` like [`Tokenizer::parse_str1`], reusing and updating
+    /// the cached windows of long lines.
+    fn tokenize<C: JiebaPlaceholder>(
+        &mut self,
+        tokenizer: &Tokenizer<C>,
+        line: &str,
+        into_word: bool,
+    ) -> Vec<Token> {
+        let mut windows = WindowsSeen::default();
+        let tokens = tokenize_line(
+            tokenizer,
+            &self.windows,
+            line,
+            into_word,
+            &mut windows,
+        );
+        self.merge_windows(windows);
+        tokens
+    }
+
+    /// Mark the windows found by [`tokenize_line`] as recently used, and
+    /// cache the windows it tokenized.
+    fn merge_windows(&mut self, windows: WindowsSeen) {
+        for key in windows.found {
+            self.windows.get(&key);
+        }
+        for (key, packed) in windows.tokenized {
+            let weight = mem::size_of::<WindowKey>()
+                + mem::size_of::<PackedTokens>()
+                + packed.heap_size();
+            self.windows.insert(key, packed, weight);
+        }
+    }
+
+    /// Tokenize `lines`, which are lines `first..` (1-indexed) of buffer
+    /// `bufnr`, into `word`s if `into_word` is `true`, otherwise into
+    /// `WORD`s, and cache them. The lines are split into contiguous chunks
+    /// tokenized on up to `threads` threads, or as many threads as there are
+    /// cores if `threads` is zero. Lines already cached are left alone.
+    pub fn fill<C, S>(
+        &mut self,
+        tokenizer: &Tokenizer<C>,
+        bufnr: usize,
+        first: usize,
+        lines: &[S],
+        into_word: bool,
+        threads: usize,
+    ) -> Filled
+    where
+        C: JiebaPlaceholder + Sync,
+        S: AsRef<str> + Sync,
+    {
+        let threads = match threads {
+            0 => thread::available_parallelism().map_or(1, NonZeroUsize::get),
+            n => n,
+        };
+        let chunk_size = lines.len().div_ceil(threads).max(1);
+        let start = Instant::now();
+        let cache = &self.lines;
+        let cached_windows = &self.windows;
+        // Return the tokenized lines, with `None` for those that cannot be
+        // packed, and the windows of long lines seen. The windows are cached
+        // once all chunks are done.
+        let tokenize_chunk = |i: usize, chunk: &[S]| {
+            // A span per line would have the tracer called for each line,
+            // which may serialize the threads, e.g. on the GIL.
+            let _span = tokenizer.tracing().leaf_span("fill_chunk");
+            let first = first + i * chunk_size;
+            let mut windows = WindowsSeen::default();
+            let lines: Vec<_> = chunk
+                .iter()
+                .enumerate()
+                .filter_map(|(j, line)| {
+                    let line = line.as_ref();
+                    let key = (bufnr, first + j, into_word);
+                    let hash = hash_line(line);
+                    if cache.peek(&key).is_some_and(|c| c.hash == hash) {
+                        return None;
+                    }
+                    let tokens = tokenize_line(
+                        tokenizer,
+                        cached_windows,
+                        line,
+                        into_word,
+                        &mut windows,
+                    );
+                    let tokens = PackedTokens::pack(&tokens);
+                    Some((
+                        key,
+                        tokens.map(|tokens| CachedLine { hash, tokens }),
+                    ))
+                })
+                .collect();
+            (lines, windows)
+        };
+        let tokenized: Vec<_> = if lines.len() <= chunk_size {
+            vec![tokenize_chunk(0, lines)]
+        } else {
+            thread::scope(|s| {
+                let workers: Vec<_> = lines
+                    .chunks(chunk_size)
+                    .enumerate()
+                    .map(|(i, chunk)| s.spawn(move || tokenize_chunk(i, chunk)))
+                    .collect();
+                workers
+                    .into_iter()
+                    .map(|worker| worker.join().unwrap())
+                    .collect()
+            })
+        };
+        let n_parsed = tokenized
+            .iter()
+            .map(|(lines, _)| lines.len())
+            .sum::<usize>() as u64;
+        self.stats.tokenize_time += start.elapsed();
+        self.stats.lines_parsed += n_parsed;
+        self.stats.misses += n_parsed;
+        self.stats.hits += lines.len() as u64 - n_parsed;
+        let mut filled = Filled::default();
+        let mut parsed_lines = vec![];
+        for (lines, windows) in tokenized {
+            self.merge_windows(windows);
+            parsed_lines.extend(lines);
+        }
+        for (key, cached) in parsed_lines {
+            let accepted = cached.is_some_and(|cached| {
+                let weight = cached.weight();
+                self.lines.insert(key, cached, weight).is_none()
+            });
+            if accepted {
+                filled.cached += 1;
+            } else {
+                filled.skipped += 1;
+            }
+        }
+        filled
+    }
+
+    /// Update the cache after lines `first..last_old` (0-indexed, end
+    /// exclusive) in buffer `bufnr` have been replaced by lines
+    /// `first..last_new`. The replaced lines are dropped, and the lines below
+    /// are moved along, so that they remain reusable.
+    pub fn on_lines(
+        &mut self,
+        bufnr: usize,
+        first: usize,
+        last_old: usize,
+        last_new: usize,
+    ) {
+        self.lines.rekey(|&(b, lnum, into_word)| {
+            // `lnum` is 1-indexed.
+            if b != bufnr || lnum <= first {
+                Some((b, lnum, into_word))
+            } else if lnum <= last_old {
+                None
+            } else {
+                Some((b, lnum - last_old + last_new, into_word))
+            }
+        });
+    }
+}
+
+/// The windows of long lines seen by [`tokenize_line`], to be merged into
+/// [`TokenCache::windows`].
+#[derive(Default)]
+struct WindowsSeen {
+    /// Keys of the windows found in the cache.
+    found: Vec<WindowKey>,
+    /// The windows tokenized, which are not in the cache.
+    tokenized: HashMap<WindowKey, PackedTokens>,
+}
+
+/// Tokenize `line` like [`Tokenizer::parse_str1`]. Long lines are split into
+/// windows at stable boundaries, and the tokens of the windows found in
+/// `cached` or in `seen` are reused, so that an edit to a long line costs
+/// tokenizing only the windows around the edit. The windows are recorded in
+/// `seen` rather than cached, so that lines may be tokenized against the
+/// same cache on many threads.
+fn tokenize_line<C: JiebaPlaceholder>(
+    tokenizer: &Tokenizer<C>,
+    cached: &LruCache<WindowKey, PackedTokens>,
+    line: &str,
+    into_word: bool,
+    seen: &mut WindowsSeen,
+) -> Vec<Token> {
+    if line.len() <= LONG_LINE_LEN || cached.capacity() == 0 {
+        return tokenizer.parse_str1(line, into_word);
+    }
+    let mut tokens = vec![];
+    for window in tokenizer.split_windows(line, MIN_WINDOW_LEN, into_word) {
+        let text = &line[window.clone()];
+        let key = (hash_line(text), into_word);
+        let first = tokens.len();
+        if let Some(packed) = cached.peek(&key) {
+            seen.found.push(key);
+            tokens.extend(LineTokens::Packed(packed).iter());
+        } else if let Some(packed) = seen.tokenized.get(&key) {
+            tokens.extend(LineTokens::Packed(packed).iter());
+        } else {
+            let parsed = tokenizer.parse_str(text, into_word);
+            if let Some(packed) = PackedTokens::pack(&parsed) {
+                seen.tokenized.insert(key, packed);
+            }
+            tokens.extend(parsed);
+        }
+        // The columns are indexed from 1.
+        for t in tokens[first..].iter_mut() {
+            t.shift(window.start + 1);
+        }
+    }
+    tokens
+}
+
+/// Tokenize `line` like [`Tokenizer::parse_str1`], but only around column
+/// `col` (1-indexed), from about [`MIN_WINDOW_LEN`] bytes before it to as
+/// many after it. Return the tokens, and the columns (1-indexed, end
+/// exclusive) where a motion sees them as those of the whole line, i.e. past
+/// the first token and before the last one, unless they end the line.
+fn tokenize_around<C: JiebaPlaceholder>(
+    tokenizer: &Tokenizer<C>,
+    line: &str,
+    col: usize,
+    into_word: bool,
+) -> (Vec<Token>, Range<usize>) {
+    let at = col.saturating_sub(1).min(line.len());
+    let mut start = at.saturating_sub(MIN_WINDOW_LEN);
+    while !line.is_char_boundary(start) {
+        start -= 1;
+    }
+    let mut end = (at + MIN_WINDOW_LEN).min(line.len());
+    while !line.is_char_boundary(end) {
+        end += 1;
+    }
+    let window = tokenizer.snap_window(line, start..end, into_word);
+    let mut tokens =
+        tokenizer.parse_str_window(line, window.clone(), into_word);
+    for t in tokens.iter_mut() {
+        t.shift(1);
+    }
+    let first = match tokens.first() {
+        Some(t) if window.start > 0 => t.last_char1(),
+        _ => 0,
+    };
+    let last = match tokens.last() {
+        Some(t) if window.end < line.len() => t.first_char(),
+        _ => usize::MAX,
+    };
+    (tokens, first..last)
 }
 
 /// A buffer that caches parsed tokens.
 pub struct ParsedBuffer<'b, 'p, B: ?Sized, C> {
     buffer: &'b B,
     tokenizer: &'p Tokenizer<C>,
+    cache: &'p mut TokenCache,
+    /// Buffer number of `buffer`, retrieved on first use.
+    bufnr: Option<usize>,
     into_word: bool,
+    /// Lines in `cache` that have been checked against `buffer`.
+    validated_lines: HashSet<usize>,
+    /// Lines that do not fit in `cache`, that cannot be packed, or that are
+    /// tokenized in part.
     parsed_lines: HashMap<usize, Vec<Token>>,
+    /// Whether to tokenize around the focus of `cache`.
+    around_focus: bool,
 }
 
 impl<'b, 'p, B: ?Sized, C> ParsedBuffer<'b, 'p, B, C> {
     pub fn new(
         buffer: &'b B,
         tokenizer: &'p Tokenizer<C>,
+        cache: &'p mut TokenCache,
         into_word: bool,
     ) -> Self {
         Self {
             buffer,
             tokenizer,
+            cache,
+            bufnr: None,
             into_word,
+            validated_lines: HashSet::new(),
             parsed_lines: HashMap::new(),
+            around_focus: false,
         }
     }
+
+    /// Tokenize the focused line of the cache, if long and missing from the
+    /// cache, only around the focus. See [`TokenCache::focus`].
+    pub(crate) fn around_focus(mut self) -> Self {
+        self.around_focus = true;
+        self
+    }
 }
 
 impl<'b, 'p, B: BufferLike + ?Sized, C> BufferLike
@@ -58,28 +516,158 @@ impl<'b, 'p, B: BufferLike + ?Sized, C> BufferLike
         self.buffer.getline(lnum)
     }
 
+    fn with_line<R, F: FnOnce(&str) -> R>(
+        &self,
+        lnum: usize,
+        f: F,
+    ) -> Result<R, Self::Error> {
+        self.buffer.with_line(lnum, f)
+    }
+
     fn lines(&self) -> Result<usize, Self::Error> {
         self.buffer.lines()
     }
+
+    fn bufnr(&self) -> Result<usize, Self::Error> {
+        self.buffer.bufnr()
+    }
+}
+
+impl<'b, 'p, B: BufferLike + ?Sized, C: JiebaPlaceholder>
+    ParsedBuffer<'b, 'p, B, C>
+{
+    fn line_key(&mut self, lnum: usize) -> Result<LineKey, B::Error> {
+        let bufnr = match self.bufnr {
+            Some(bufnr) => bufnr,
+            None => *self.bufnr.insert(self.buffer.bufnr()?),
+        };
+        Ok((bufnr, lnum, self.into_word))
+    }
+
+    /// Make sure that line `lnum` is tokenized and stored in either the
+    /// cache or [`ParsedBuffer::parsed_lines`].
+    fn parse_line(
+        &mut self,
+        lnum: usize,
+        key: &LineKey,
+    ) -> Result<(), B::Error> {
+        let focus = match &mut self.cache.focus {
+            Some(focus) if self.around_focus => {
+                focus.strayed |= focus.lnum != lnum;
+                Some(focus.col).filter(|_| focus.lnum == lnum)
+            }
+            _ => None,
+        };
+        if self.parsed_lines.contains_key(&lnum)
+            || (self.validated_lines.contains(&lnum)
+                && self.cache.lines.contains_key(key))
+        {
+            return Ok(());
+        }
+        let tokenizer = self.tokenizer;
+        let cache = &mut *self.cache;
+        let into_word = self.into_word;
+        // The line is borrowed from the buffer, and tokenized only if the
+        // cached tokens are outdated.
+        let start = Instant::now();
+        let fetch_span = tokenizer.tracing().span("fetch_line");
+        let parsed = self.buffer.with_line(lnum, |line| {
+            drop(fetch_span);
+            // Tokenization, if any, starts where the fetch ends.
+            let fetched = Instant::now();
+            cache.stats.fetch_time += fetched - start;
+            let hash = hash_line(line);
+            let is_cached = cache
+                .lines
+                .get(key)
+                .is_some_and(|cached| cached.hash == hash);
+            if is_cached {
+                cache.stats.hits += 1;
+                return None;
+            }
+            cache.stats.misses += 1;
+            cache.stats.lines_parsed += 1;
+            let parsed = {
+                let _span = tokenizer.tracing().span("parse_str1");
+                match focus {
+                    Some(col) if line.len() > LONG_LINE_LEN => {
+                        let (tokens, trusted) =
+                            tokenize_around(tokenizer, line, col, into_word);
+                        if let Some(focus) = &mut cache.focus {
+                            focus.trusted = Some(trusted);
+                        }
+                        Parsed::Part(tokens)
+                    }
+                    _ => Parsed::Whole(
+                        hash,
+                        cache.tokenize(tokenizer, line, into_word),
+                    ),
+                }
+            };
+            cache.stats.tokenize_time += fetched.elapsed();
+            Some(parsed)
+        })?;
+        match parsed {
+            // Kept out of the cache, which holds whole lines only.
+            Some(Parsed::Part(tokens)) => {
+                self.parsed_lines.insert(lnum, tokens);
+            }
+            Some(Parsed::Whole(hash, tokens)) => {
+                let rejected = match PackedTokens::pack(&tokens) {
+                    Some(packed) => {
+                        let cached = CachedLine {
+                            hash,
+                            tokens: packed,
+                        };
+                        let weight = cached.weight();
+                        cache.lines.insert(*key, cached, weight).is_some()
+                    }
+                    None => {
+                        // Drop the outdated tokens, if any.
+                        cache.lines.remove(key);
+                        true
+                    }
+                };
+                if rejected {
+                    self.parsed_lines.insert(lnum, tokens);
+                }
+            }
+            None => {}
+        }
+        self.validated_lines.insert(lnum);
+        Ok(())
+    }
+}
+
+/// A line tokenized by [`ParsedBuffer::parse_line`], either as a whole along
+/// with the hash of the line, or in part.
+enum Parsed {
+    Whole(u64, Vec<Token>),
+    Part(Vec<Token>),
 }
 
 impl<'b, 'p, B: BufferLike + ?Sized, C: JiebaPlaceholder> ParsedBufferLike
     for ParsedBuffer<'b, 'p, B, C>
 {
-    fn getline_parsed(&mut self, lnum: usize) -> Result<&[Token], B::Error> {
-        if !self.parsed_lines.contains_key(&lnum) {
-            let line = self.buffer.getline(lnum)?;
-            let parsed_line = self.tokenizer.parse_str1(&line, self.into_word);
-            self.parsed_lines.insert(lnum, parsed_line);
+    fn getline_parsed(
+        &mut self,
+        lnum: usize,
+    ) -> Result<LineTokens<'_>, B::Error> {
+        let key = self.line_key(lnum)?;
+        self.parse_line(lnum, &key)?;
+        if let Some(tokens) = self.parsed_lines.get(&lnum) {
+            return Ok(LineTokens::Plain(tokens));
         }
-        Ok(self.parsed_lines.get(&lnum).unwrap())
+        Ok(LineTokens::Packed(
+            &self.cache.lines.get(&key).unwrap().tokens,
+        ))
     }
 }
 
 #[cfg(test)]
 mod pre_tokenized_buffer {
     use crate::BufferLike;
-    use crate::token::{Token, TokenLike, TokenType};
+    use crate::token::{LineTokens, Token, TokenLike, TokenType};
 
     use super::ParsedBufferLike;
 
@@ -147,11 +735,356 @@ mod pre_tokenized_buffer {
         fn getline_parsed(
             &mut self,
             lnum: usize,
-        ) -> Result<&[Token], Self::Error> {
-            self.getline_parsed_helper(lnum)
+        ) -> Result<LineTokens<'_>, Self::Error> {
+            Ok(LineTokens::Plain(self.getline_parsed_helper(lnum)?))
         }
     }
 }
 
 #[cfg(test)]
 pub use pre_tokenized_buffer::PreTokenizedBuffer;
+
+#[cfg(test)]
+mod tests {
+    use std::cell::Cell;
+    use std::rc::Rc;
+    use std::slice;
+    use std::sync::Arc;
+    use std::sync::atomic::{AtomicUsize, Ordering};
+
+    use crate::BufferLike;
+    use crate::motion::core::position::Position;
+    use crate::token::jieba::KeywordCutter;
+    use crate::token::{JiebaPlaceholder, LineTokens, TokenLike, Tokenizer};
+
+    use super::{Filled, ParsedBuffer, ParsedBufferLike, TokenCache};
+
+    /// Cut each char apart, and count the number of cuts.
+    struct CountingCutter(Rc<Cell<usize>>);
+
+    impl JiebaPlaceholder for CountingCutter {
+        fn cut_hmm_into_char_counts(&self, sentence: &str) -> Vec<usize> {
+            self.0.set(self.0.get() + 1);
+            sentence.chars().map(|_| 1).collect()
+        }
+    }
+
+    fn new_tokenizer() -> (Tokenizer<CountingCutter>, Rc<Cell<usize>>) {
+        let cuts = Rc::new(Cell::new(0));
+        let mut tokenizer =
+            Tokenizer::new(CountingCutter(cuts.clone()), "@,48-57,_,192-255");
+        // Count the cuts of every line tokenized.
+        tokenizer.set_cut_memo_capacity(0);
+        (tokenizer, cuts)
+    }
+
+    #[test]
+    fn test_token_cache_reused_across_motions() {
+        let (tokenizer, cuts) = new_tokenizer();
+        let mut cache = TokenCache::default();
+        let mut buffer: Vec<String> = vec!["你好 world".into(), "再见".into()];
+        let expected = tokenizer.parse_str1(&buffer[0], true);
+        cuts.set(0);
+
+        let mut pb = ParsedBuffer::new(&buffer, &tokenizer, &mut cache, true);
+        assert_eq!(pb.getline_parsed(1).unwrap().to_vec(), expected);
+        assert_eq!(pb.getline_parsed(1).unwrap().to_vec(), expected);
+        assert_eq!(cuts.get(), 1);
+
+        let mut pb = ParsedBuffer::new(&buffer, &tokenizer, &mut cache, true);
+        assert_eq!(pb.getline_parsed(1).unwrap().to_vec(), expected);
+        assert_eq!(cuts.get(), 1);
+
+        // `WORD`s are cached apart from `word`s.
+        let mut pb = ParsedBuffer::new(&buffer, &tokenizer, &mut cache, false);
+        pb.getline_parsed(1).unwrap();
+        assert_eq!(cuts.get(), 2);
+
+        // Changed lines are tokenized again.
+        buffer[0] = "世界".into();
+        let expected = tokenizer.parse_str1(&buffer[0], true);
+        cuts.set(0);
+        let mut pb = ParsedBuffer::new(&buffer, &tokenizer, &mut cache, true);
+        assert_eq!(pb.getline_parsed(1).unwrap().to_vec(), expected);
+        assert_eq!(cuts.get(), 1);
+    }
+
+    #[test]
+    fn test_token_cache_on_lines() {
+        let (tokenizer, cuts) = new_tokenizer();
+        let mut cache = TokenCache::default();
+        let mut buffer: Vec<String> =
+            vec!["你好".into(), "再见".into(), "世界".into()];
+        let mut pb = ParsedBuffer::new(&buffer, &tokenizer, &mut cache, true);
+        for lnum in 1..=3 {
+            pb.getline_parsed(lnum).unwrap();
+        }
+        assert_eq!(cuts.get(), 3);
+
+        // Replace the second line with two lines.
+        buffer.splice(1..2, ["早上".into(), "好".into()]);
+        cache.on_lines(0, 1, 2, 3);
+        let expected: Vec<_> = buffer
+            .iter()
+            .map(|line| tokenizer.parse_str1(line, true))
+            .collect();
+        cuts.set(0);
+        let mut pb = ParsedBuffer::new(&buffer, &tokenizer, &mut cache, true);
+        for lnum in 1..=4 {
+            assert_eq!(
+                pb.getline_parsed(lnum).unwrap().to_vec(),
+                expected[lnum - 1]
+            );
+        }
+        // Only the two new lines are tokenized again.
+        assert_eq!(cuts.get(), 2);
+
+        // Lines of other buffers are left as is.
+        cache.on_lines(1, 0, 4, 0);
+        cuts.set(0);
+        let mut pb = ParsedBuffer::new(&buffer, &tokenizer, &mut cache, true);
+        for lnum in 1..=4 {
+            pb.getline_parsed(lnum).unwrap();
+        }
+        assert_eq!(cuts.get(), 0);
+    }
+
+    /// A buffer that only lends its lines out.
+    struct LendingBuffer(Vec<String>);
+
+    impl BufferLike for LendingBuffer {
+        type Error = ();
+
+        fn getline(&self, _lnum: usize) -> Result<String, Self::Error> {
+            panic!("lines should not be copied");
+        }
+
+        fn with_line<R, F: FnOnce(&str) -> R>(
+            &self,
+            lnum: usize,
+            f: F,
+        ) -> Result<R, Self::Error> {
+            self.0.with_line(lnum, f)
+        }
+
+        fn lines(&self) -> Result<usize, Self::Error> {
+            self.0.lines()
+        }
+    }
+
+    #[test]
+    fn test_parsed_buffer_borrows_lines() {
+        let (tokenizer, _) = new_tokenizer();
+        let mut cache = TokenCache::default();
+        let buffer = LendingBuffer(vec!["你好 world".into()]);
+        let expected = tokenizer.parse_str1(&buffer.0[0], true);
+        for _ in 0..2 {
+            let mut pb =
+                ParsedBuffer::new(&buffer, &tokenizer, &mut cache, true);
+            assert_eq!(pb.getline_parsed(1).unwrap().to_vec(), expected);
+        }
+    }
+
+    #[test]
+    fn test_token_cache_disabled() {
+        let (tokenizer, cuts) = new_tokenizer();
+        let mut cache = TokenCache::new(0);
+        let buffer: Vec<String> = vec!["你好 world".into()];
+        let expected = tokenizer.parse_str1(&buffer[0], true);
+        cuts.set(0);
+        for _ in 0..2 {
+            let mut pb =
+                ParsedBuffer::new(&buffer, &tokenizer, &mut cache, true);
+            assert_eq!(pb.getline_parsed(1).unwrap().to_vec(), expected);
+            assert_eq!(pb.getline_parsed(1).unwrap().to_vec(), expected);
+        }
+        assert_eq!(cuts.get(), 2);
+    }
+
+    #[test]
+    fn test_token_cache_fill() {
+        let tokenizer = Tokenizer::new(
+            KeywordCutter::new(["你好".into(), "世界".into()]),
+            "@,48-57,_,192-255",
+        );
+        let mut buffer: Vec<String> = (0..10)
+            .map(|i| format!("你好世界 foo{}，再见", i))
+            .collect();
+        for threads in [0, 1, 3, 20] {
+            let mut cache = TokenCache::default();
+            assert_eq!(
+                cache.fill(&tokenizer, 0, 1, &buffer, true, threads),
+                Filled {
+                    cached: 10,
+                    skipped: 0,
+                },
+            );
+            for (i, line) in buffer.iter().enumerate() {
+                let cached = cache.lines.peek(&(0, i + 1, true)).unwrap();
+                assert_eq!(
+                    LineTokens::Packed(&cached.tokens).to_vec(),
+                    tokenizer.parse_str1(line, true),
+                );
+            }
+            assert!(!cache.lines.contains_key(&(0, 1, false)));
+        }
+
+        // Only the lines changed are tokenized again.
+        let mut cache = TokenCache::default();
+        cache.fill(&tokenizer, 0, 1, &buffer, true, 2);
+        buffer[4] = "世界".into();
+        assert_eq!(cache.fill(&tokenizer, 0, 1, &buffer, true, 2).cached, 1);
+        let mut pb = ParsedBuffer::new(&buffer, &tokenizer, &mut cache, true);
+        assert_eq!(
+            pb.getline_parsed(5).unwrap().to_vec(),
+            tokenizer.parse_str1("世界", true),
+        );
+
+        // Lines may start anywhere in the buffer.
+        assert_eq!(
+            cache.fill(&tokenizer, 0, 5, &buffer[4..], true, 2),
+            Filled::default(),
+        );
+        assert_eq!(
+            cache.fill(&tokenizer, 1, 5, &buffer[4..], true, 2).cached,
+            6
+        );
+        assert!(cache.lines.contains_key(&(1, 10, true)));
+        assert!(!cache.lines.contains_key(&(1, 4, true)));
+
+        // Lines too heavy for the cache are tokenized but not cached.
+        let mut cache = TokenCache::new(1);
+        let filled = cache.fill(&tokenizer, 0, 1, &buffer, true, 2);
+        assert_eq!(filled.cached, 0);
+        assert_eq!(filled.skipped, 10);
+        assert_eq!(cache.stats().lines_parsed, 10);
+    }
+
+    #[test]
+    fn test_token_cache_long_line_edited() {
+        let (tokenizer, cuts) = new_tokenizer();
+        let mut cache = TokenCache::default();
+        let mut buffer: Vec<String> = vec![
+            (0..300)
+                .map(|i| format!("你好{}，中国人 foo(bar{})。", i, i * 37))
+                .collect(),
+        ];
+        assert!(buffer[0].len() > super::LONG_LINE_LEN);
+        let mut pb = ParsedBuffer::new(&buffer, &tokenizer, &mut cache, true);
+        pb.getline_parsed(1).unwrap();
+        let n_cuts = cuts.get();
+
+        let at = buffer[0].find("你好150").unwrap();
+        buffer[0].insert_str(at, "再见");
+        let expected = tokenizer.parse_str1(&buffer[0], true);
+        cuts.set(0);
+        let mut pb = ParsedBuffer::new(&buffer, &tokenizer, &mut cache, true);
+        assert_eq!(pb.getline_parsed(1).unwrap().to_vec(), expected);
+        assert!(cuts.get() * 4 < n_cuts, "{} of {} cuts", cuts.get(), n_cuts);
+    }
+
+    /// Cut each char apart, and count the number of cuts from any thread.
+    struct SyncCountingCutter(Arc<AtomicUsize>);
+
+    impl JiebaPlaceholder for SyncCountingCutter {
+        fn cut_hmm_into_char_counts(&self, sentence: &str) -> Vec<usize> {
+            self.0.fetch_add(1, Ordering::Relaxed);
+            sentence.chars().map(|_| 1).collect()
+        }
+    }
+
+    #[test]
+    fn test_token_cache_fill_long_line_edited() {
+        let cuts = Arc::new(AtomicUsize::new(0));
+        let mut tokenizer = Tokenizer::new(
+            SyncCountingCutter(cuts.clone()),
+            "@,48-57,_,192-255",
+        );
+        tokenizer.set_cut_memo_capacity(0);
+        let long_line: String = (0..300)
+            .map(|i| format!("你好{}，中国人 foo(bar{})。", i, i * 37))
+            .collect();
+        let mut buffer = vec![long_line.clone(), long_line];
+        let mut cache = TokenCache::default();
+        cache.fill(&tokenizer, 0, 1, &buffer, true, 2);
+        let n_cuts = cuts.swap(0, Ordering::Relaxed);
+
+        // Both lines are tokenized anew, but from the windows cached before.
+        for line in buffer.iter_mut() {
+            let at = line.find("你好150").unwrap();
+            line.insert_str(at, "再见");
+        }
+        cache.fill(&tokenizer, 0, 1, &buffer, true, 2);
+        let n = cuts.load(Ordering::Relaxed);
+        assert!(n * 4 < n_cuts, "{} of {} cuts", n, n_cuts);
+        let expected = tokenizer.parse_str1(&buffer[0], true);
+        for lnum in 1..=2 {
+            let cached = cache.lines.peek(&(0, lnum, true)).unwrap();
+            assert_eq!(LineTokens::Packed(&cached.tokens).to_vec(), expected);
+        }
+    }
+
+    #[test]
+    fn test_parsed_buffer_around_focus() {
+        let (tokenizer, cuts) = new_tokenizer();
+        let buffer: Vec<String> = vec![
+            (0..300)
+                .map(|i| format!("你好{}，中国人 foo(bar{})。", i, i * 37))
+                .collect(),
+            "再见".into(),
+        ];
+        let expected = tokenizer.parse_str1(&buffer[0], true);
+        let n_cuts = cuts.replace(0);
+        let at = buffer[0].find("你好150").unwrap() + 1;
+
+        // Only the tokens around the focus are tokenized, and not cached.
+        let mut cache = TokenCache::default();
+        cache.focus(1, at);
+        let mut pb = ParsedBuffer::new(&buffer, &tokenizer, &mut cache, true)
+            .around_focus();
+        let tokens = pb.getline_parsed(1).unwrap().to_vec();
+        assert!(cuts.get() * 4 < n_cuts, "{} of {} cuts", cuts.get(), n_cuts);
+        let first = expected.iter().position(|t| *t == tokens[0]).unwrap();
+        assert_eq!(tokens, expected[first..first + tokens.len()]);
+        assert!(tokens[0].first_char() < at);
+        assert!(at < tokens.last().unwrap().last_char1());
+        assert!(cache.unfocus(Some(&[Position::new(1, at)])));
+        assert!(!cache.lines.contains_key(&(0, 1, true)));
+
+        // Motions that reach past the tokens or look up other lines may have
+        // seen them wrong.
+        let end = tokens.last().unwrap().last_char1();
+        for (reached, other_line) in [
+            (Some(Position::new(1, at)), true),
+            (Some(Position::new(1, end)), false),
+            (Some(Position::new(1, 1)), false),
+            (None, false),
+        ] {
+            cache.focus(1, at);
+            let mut pb =
+                ParsedBuffer::new(&buffer, &tokenizer, &mut cache, true)
+                    .around_focus();
+            pb.getline_parsed(1).unwrap();
+            if other_line {
+                pb.getline_parsed(2).unwrap();
+            }
+            assert!(!cache.unfocus(reached.as_ref().map(slice::from_ref)));
+        }
+
+        // Lines are tokenized as a whole unless asked otherwise.
+        cache.focus(1, at);
+        let mut pb = ParsedBuffer::new(&buffer, &tokenizer, &mut cache, true);
+        assert_eq!(pb.getline_parsed(1).unwrap().to_vec(), expected);
+        pb.getline_parsed(2).unwrap();
+        assert!(cache.unfocus(Some(&[Position::new(2, 1)])));
+
+        // And so are the lines found in the cache.
+        cuts.set(0);
+        cache.focus(1, at);
+        let mut pb = ParsedBuffer::new(&buffer, &tokenizer, &mut cache, true)
+            .around_focus();
+        assert_eq!(pb.getline_parsed(1).unwrap().to_vec(), expected);
+        assert_eq!(cuts.get(), 0);
+        assert!(cache.unfocus(Some(&[Position::new(1, 1)])));
+    }
+}
@@ -24,7 +24,7 @@
 use std::cmp::Ordering;
 use std::iter::{Rev, Skip, Take};
 
-use crate::token::{Token, TokenLike};
+use crate::token::{LineTokens, Token, TokenLike};
 
 pub trait TokenLikeExt: TokenLike {
     // This is how we define the cursor being "on" a token:
@@ -146,20 +146,19 @@ impl From<Token> for GToken {
 
 /// Get the index of the token in `tokens` where `col` is contained. Return
 /// None if `col` is at the Eol of `tokens`.
-fn index_tokens(tokens: &[Token], col: usize) -> Option<usize> {
+fn index_tokens(tokens: LineTokens<'_>, col: usize) -> Option<usize> {
     tokens.binary_search_by(|t| t.cmp(col)).ok()
 }
 
 /// Get the index of the token in `tokens` where `col` is contained. Return
 /// `tokens.len()` if `col` is at the Eol of `tokens`. Panics otherwise.
-fn index_tokens_extended(tokens: &[Token], col: usize) -> usize {
+fn index_tokens_extended(tokens: LineTokens<'_>, col: usize) -> usize {
     match index_tokens(tokens, col) {
         Some(i) => i,
         None => {
             // If `col_at_eol` is true, it means `col` lies on/off the Eol of
             // current lnum.
-            let col_at_eol =
-                col == tokens.last().map_or(1, TokenLike::last_char1);
+            let col_at_eol = col == tokens.last().map_or(1, |t| t.last_char1());
             if !col_at_eol {
                 panic!(
                     "col ({}) too large when index_tokens_extended for tokens: {:?}",
@@ -171,8 +170,10 @@ fn index_tokens_extended(tokens: &[Token], col: usize) -> usize {
     }
 }
 
+/// Iterator over the tokens of a line followed by the Eol. The tokens are
+/// unpacked one at a time, so that packed lines are iterated as is.
 pub struct ExtendedInlineTokensIter<'p> {
-    line: &'p [Token],
+    line: LineTokens<'p>,
     left_index: usize,
     right_index_compl: usize,
     eol: GToken,
@@ -180,9 +181,9 @@ pub struct ExtendedInlineTokensIter<'p> {
 }
 
 impl<'p> ExtendedInlineTokensIter<'p> {
-    pub fn new(line: &'p [Token]) -> Self {
+    pub fn new(line: LineTokens<'p>) -> Self {
         let n = line.len();
-        let eol = GToken::Eol(line.last().map_or(1, TokenLike::last_char1));
+        let eol = GToken::Eol(line.last().map_or(1, |t| t.last_char1()));
         Self {
             line,
             left_index: 0,
@@ -221,7 +222,7 @@ impl<'p> Iterator for ExtendedInlineTokensIter<'p> {
         }
 
         let item = if self.left_index < self.line.len() {
-            Some(GToken::T(self.line[self.left_index]))
+            Some(GToken::T(self.line.get(self.left_index)))
         } else if self.left_index == self.line.len() {
             Some(self.eol)
         } else {
@@ -257,7 +258,7 @@ impl<'p> DoubleEndedIterator for ExtendedInlineTokensIter<'p> {
 
         let right_index = self.n - self.right_index_compl;
         let item = if right_index < self.line.len() {
-            Some(GToken::T(self.line[right_index]))
+            Some(GToken::T(self.line.get(right_index)))
         } else if right_index == self.line.len() {
             Some(self.eol)
         } else {
@@ -19,3 +19,5 @@ pub mod failure;
 pub mod iter;
 pub mod motion;
 pub mod position;
+pub mod skip;
+pub mod word_count;
@@ -0,0 +1,190 @@
+// Copyright 2026 Kaiwen Wu. All Rights Reserved.
+//
+// Licensed under the Apache License, Version 2.0 (the "License"); you may not
+// use this file except in compliance with the License. You may obtain a copy
+// of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+// WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+// License for the specific language governing permissions and limitations
+// under the License.
+
+//! Skipping whole lines in word motions with large counts.
+
+use crate::token::{LineTokens, Token, TokenLike, TokenType};
+
+use super::buffer::ParsedBufferLike;
+use super::position::Position;
+
+/// The part of words a word motion stops at.
+#[derive(Debug, Clone, Copy)]
+pub enum StopAt {
+    WordStart,
+    WordEnd,
+}
+
+impl StopAt {
+    fn col(self, token: &Token) -> usize {
+        match self {
+            Self::WordStart => token.first_char(),
+            Self::WordEnd => token.last_char(),
+        }
+    }
+}
+
+/// The direction of a word motion.
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub enum Direction {
+    Forward,
+    Backward,
+}
+
+/// The unit motions skipped by [`skip_lines`].
+#[derive(Debug, Default, Clone, Copy, PartialEq, Eq)]
+pub struct Skipped {
+    /// The number of unit motions skipped.
+    pub count: u64,
+    /// True if the cursor lands on an empty line.
+    pub on_empty_line: bool,
+}
+
+/// The number of stops in a line other than the cursor line.
+fn count_stops(tokens: LineTokens<'_>, empty: bool) -> u64 {
+    if tokens.is_empty() {
+        empty as u64
+    } else {
+        tokens.word_count() as u64
+    }
+}
+
+/// Move `cursor` over at most `max_count` unit motions of a word motion
+/// going in `direction`, which stops at `stop_at` of each word token and,
+/// if `empty` is true, on empty lines. The unit motions are counted line by
+/// line with [`LineTokens::word_count`], so that only the lines that
+/// `cursor` passes are visited, without going through their tokens. Return
+/// the unit motions skipped, which leave `cursor` on a stop; the rest of
+/// the motion, which ends in the next line with stops, is left to the unit
+/// motions.
+///
+/// `cursor` must be where the unit motions would find the next stop after
+/// `cursor.col` in its line, and the unit motions must not fail while there
+/// is a stop ahead.
+pub fn skip_lines<B: ParsedBufferLike + ?Sized>(
+    buffer: &mut B,
+    cursor: &mut Position,
+    max_count: u64,
+    direction: Direction,
+    stop_at: StopAt,
+    empty: bool,
+) -> Result<Skipped, B::Error> {
+    let n_lines = buffer.lines()?;
+    let ahead = |col: usize| match direction {
+        Direction::Forward => col > cursor.col,
+        Direction::Backward => col < cursor.col,
+    };
+    let mut count = buffer
+        .getline_parsed(cursor.lnum)?
+        .iter()
+        .filter(|t| t.ty == TokenType::Word && ahead(stop_at.col(t)))
+        .count() as u64;
+    if count > max_count {
+        return Ok(Skipped::default());
+    }
+    let mut dest_lnum = (count > 0).then_some(cursor.lnum);
+    let mut lnum = cursor.lnum;
+    loop {
+        let next_lnum = match direction {
+            Direction::Forward if lnum < n_lines => lnum + 1,
+            Direction::Backward if lnum > 1 => lnum - 1,
+            _ => break,
+        };
+        let n = count_stops(buffer.getline_parsed(next_lnum)?, empty);
+        if count + n > max_count {
+            break;
+        }
+        count += n;
+        lnum = next_lnum;
+        if n > 0 {
+            dest_lnum = Some(lnum);
+        }
+    }
+
+    let Some(dest_lnum) = dest_lnum else {
+        return Ok(Skipped::default());
+    };
+    let tokens = buffer.getline_parsed(dest_lnum)?;
+    let mut words = tokens.iter().filter(|t| t.ty == TokenType::Word);
+    // The cursor lands on the farthest stop of the line.
+    let dest_word = match direction {
+        Direction::Forward => words.next_back(),
+        Direction::Backward => words.next(),
+    };
+    cursor.lnum = dest_lnum;
+    cursor.col = match dest_word {
+        Some(t) => stop_at.col(&t),
+        // An empty line.
+        None => 1,
+    };
+    cursor.off = 0;
+    Ok(Skipped {
+        count,
+        on_empty_line: tokens.is_empty(),
+    })
+}
+
+#[cfg(test)]
+pub mod test_buffers {
+    use crate::token::{Token, TokenType};
+
+    use super::super::buffer::PreTokenizedBuffer;
+    use super::super::position::Position;
+
+    /// A xorshift generator, so that the random buffers are the same in
+    /// every run.
+    struct Rng(u64);
+
+    impl Rng {
+        fn below(&mut self, n: u64) -> u64 {
+            self.0 ^= self.0 << 13;
+            self.0 ^= self.0 >> 7;
+            self.0 ^= self.0 << 17;
+            self.0 % n
+        }
+    }
+
+    /// Random buffers of word tokens, space tokens, empty lines and lines of
+    /// spaces only, along with every cursor position in them.
+    pub fn random_buffers() -> Vec<(PreTokenizedBuffer, Vec<Position>)> {
+        let mut rng = Rng(0x2545_f491_4f6c_dd1d);
+        let mut buffers = vec![];
+        for _ in 0..200 {
+            let mut lines = vec![];
+            let mut cursors = vec![];
+            for lnum in 1..=1 + rng.below(7) as usize {
+                let mut line = vec![];
+                let mut col = 1;
+                let mut prev_space = false;
+                for _ in 0..rng.below(5) {
+                    let ty = if !prev_space && rng.below(3) == 0 {
+                        TokenType::Space
+                    } else {
+                        TokenType::Word
+                    };
+                    prev_space = ty == TokenType::Space;
+                    let end = col + 1 + rng.below(3) as usize;
+                    line.push(Token::new(col, col + 1, end - 1, end, ty));
+                    col = end;
+                }
+                for col in 1..col.max(2) {
+                    cursors.push(Position::new(lnum, col));
+                }
+                lines.push(line);
+            }
+            buffers.push((PreTokenizedBuffer::new(1, lines), cursors));
+        }
+        buffers
+    }
+}
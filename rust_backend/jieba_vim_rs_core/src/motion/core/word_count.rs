@@ -0,0 +1,214 @@
+// Copyright 2026 Kaiwen Wu. All Rights Reserved.
+//
+// Licensed under the Apache License, Version 2.0 (the "License"); you may not
+// use this file except in compliance with the License. You may obtain a copy
+// of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+// WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+// License for the specific language governing permissions and limitations
+// under the License.
+
+//! Word counts of the lines of a buffer, indexed by prefix sums.
+
+use std::collections::BTreeSet;
+use std::iter;
+use std::ops::Range;
+
+use crate::fenwick::Fenwick;
+
+/// The word count of a line, along with the hash of the line counted.
+#[derive(Clone, Copy)]
+struct CountedLine {
+    hash: u64,
+    count: u64,
+}
+
+/// The word counts of the lines of a buffer, with prefix sums over them.
+/// The lines changed since they were counted are marked dirty, so that once
+/// the dirty lines in a range are checked, the words in the range are summed
+/// in O(log n). Each count is kept with the hash of the line counted, so that
+/// a dirty line found unchanged need not be counted again.
+pub struct LineWordCounts {
+    /// Word count of each line (indexed from 0), or `None` if the line is
+    /// not counted yet, or has been replaced since it was counted.
+    counts: Vec<Option<CountedLine>>,
+    /// Prefix sums of `counts`, where `None` counts as zero.
+    words: Fenwick,
+    /// The lines whose counts are to be checked against the buffer.
+    dirty: BTreeSet<usize>,
+    /// Whether `words` is to be rebuilt from `counts`, after lines are
+    /// inserted or deleted.
+    outdated: bool,
+}
+
+impl LineWordCounts {
+    /// Create the word counts of a buffer of `n_lines` lines, none counted.
+    pub fn new(n_lines: usize) -> Self {
+        Self {
+            counts: vec![None; n_lines],
+            words: Fenwick::from_values([]),
+            dirty: (0..n_lines).collect(),
+            outdated: true,
+        }
+    }
+
+    fn rebuild(&mut self) {
+        if self.outdated {
+            self.words = Fenwick::from_values(
+                self.counts.iter().map(|c| c.map_or(0, |c| c.count)),
+            );
+            self.outdated = false;
+        }
+    }
+
+    /// Resize to `n_lines` lines, after the buffer has changed without
+    /// notice. Since any line may have changed, all lines are marked dirty.
+    pub fn resize(&mut self, n_lines: usize) {
+        if n_lines != self.counts.len() {
+            self.counts.resize(n_lines, None);
+            self.dirty = (0..n_lines).collect();
+            self.outdated = true;
+        }
+    }
+
+    /// The dirty lines in `range`.
+    pub fn dirty(&self, range: Range<usize>) -> Vec<usize> {
+        self.dirty.range(range).copied().collect()
+    }
+
+    /// Whether line `i` has been counted with hash `hash`.
+    pub fn is_counted(&self, i: usize, hash: u64) -> bool {
+        self.counts[i].is_some_and(|c| c.hash == hash)
+    }
+
+    /// Mark line `i` clean, after finding its count up to date.
+    pub fn clean(&mut self, i: usize) {
+        self.dirty.remove(&i);
+    }
+
+    /// Set the word count of line `i`, whose hash is `hash`, and mark the
+    /// line clean.
+    pub fn set(&mut self, i: usize, hash: u64, count: u64) {
+        self.rebuild();
+        if let Some(c) = self.counts[i] {
+            self.words.add(i, -(c.count as i64));
+        }
+        self.counts[i] = Some(CountedLine { hash, count });
+        self.words.add(i, count as i64);
+        self.dirty.remove(&i);
+    }
+
+    /// The total word count of the lines in `range`, whose dirty lines
+    /// should have been checked.
+    pub fn sum(&mut self, range: Range<usize>) -> u64 {
+        self.rebuild();
+        self.words.range_sum(range)
+    }
+
+    /// Update the word counts after lines `first..last_old` (0-indexed, end
+    /// exclusive) have been replaced by lines `first..last_new`. The
+    /// replaced lines are marked dirty, and the counts of the lines below
+    /// are moved along.
+    pub fn on_lines(&mut self, first: usize, last_old: usize, last_new: usize) {
+        if last_old > self.counts.len() {
+            // The counts are out of sync with the buffer.
+            *self = Self::new(0);
+        } else if last_old == last_new {
+            // The counts are kept, since the lines may well be found
+            // unchanged.
+            self.dirty.extend(first..last_old);
+        } else {
+            self.counts.splice(
+                first..last_old,
+                iter::repeat_n(None, last_new.saturating_sub(first)),
+            );
+            let below = self.dirty.split_off(&first);
+            self.dirty.extend(first..last_new);
+            self.dirty.extend(
+                below
+                    .range(last_old..)
+                    .map(|&i| i - last_old + last_new.max(first)),
+            );
+            self.outdated = true;
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::LineWordCounts;
+
+    /// Check the dirty lines in `range` against hash `i` of line `i`, and
+    /// return those not counted with it.
+    fn check(
+        counts: &mut LineWordCounts,
+        range: std::ops::Range<usize>,
+    ) -> Vec<usize> {
+        let mut uncounted = vec![];
+        for i in counts.dirty(range) {
+            if counts.is_counted(i, i as u64) {
+                counts.clean(i);
+            } else {
+                uncounted.push(i);
+            }
+        }
+        uncounted
+    }
+
+    #[test]
+    fn test_line_word_counts() {
+        let mut counts = LineWordCounts::new(5);
+        assert_eq!(counts.counts.len(), 5);
+        assert_eq!(check(&mut counts, 1..4), vec![1, 2, 3]);
+        for (i, n) in [(1, 2), (2, 0), (3, 7)] {
+            counts.set(i, i as u64, n);
+        }
+        assert!(counts.dirty(1..4).is_empty());
+        assert_eq!(counts.dirty(0..5), vec![0, 4]);
+        assert_eq!(counts.sum(1..4), 9);
+
+        // Line 2 is changed, and changed back.
+        counts.on_lines(2, 3, 3);
+        assert_eq!(counts.dirty(1..4), vec![2]);
+        assert!(check(&mut counts, 1..4).is_empty());
+        assert_eq!(counts.sum(1..4), 9);
+
+        // Line 2 is changed.
+        counts.on_lines(2, 3, 3);
+        assert!(!counts.is_counted(2, 99));
+        counts.set(2, 99, 4);
+        assert_eq!(counts.sum(1..4), 13);
+        counts.set(2, 2, 4);
+
+        // Line 2 is replaced by two lines.
+        counts.on_lines(2, 3, 4);
+        assert_eq!(counts.counts.len(), 6);
+        assert_eq!(counts.dirty(0..6), vec![0, 2, 3, 5]);
+        assert_eq!(check(&mut counts, 1..3), vec![2]);
+        assert!(counts.is_counted(4, 3));
+        counts.set(2, 2, 1);
+        counts.set(3, 3, 1);
+        assert_eq!(counts.sum(1..5), 11);
+
+        // Lines 1 and 2 are deleted.
+        counts.on_lines(1, 3, 1);
+        assert_eq!(counts.counts.len(), 4);
+        assert_eq!(counts.dirty(0..4), vec![0, 3]);
+        assert!(counts.is_counted(1, 3));
+        assert_eq!(counts.sum(1..3), 8);
+
+        // Lines are appended without notice.
+        counts.resize(6);
+        assert_eq!(counts.counts.len(), 6);
+        assert_eq!(counts.dirty(0..6), vec![0, 1, 2, 3, 4, 5]);
+        assert_eq!(counts.sum(0..6), 8);
+
+        // A change out of sync with the buffer.
+        counts.on_lines(3, 9, 9);
+        assert_eq!(counts.counts.len(), 0);
+    }
+}
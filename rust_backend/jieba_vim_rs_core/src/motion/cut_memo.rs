@@ -0,0 +1,245 @@
+// Copyright 2026 Kaiwen Wu. All Rights Reserved.
+//
+// Licensed under the Apache License, Version 2.0 (the "License"); you may not
+// use this file except in compliance with the License. You may obtain a copy
+// of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+// WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+// License for the specific language governing permissions and limitations
+// under the License.
+
+use std::fs::{self, File};
+use std::io::{self, BufReader, BufWriter, Read, Write};
+use std::path::{Path, PathBuf};
+use std::process;
+
+use super::api::WordMotion;
+
+impl<C> WordMotion<C> {
+    /// Load the snapshot of the memo of jieba cut results saved under `dir`
+    /// by [`save_cut_memo_snapshot`](WordMotion::save_cut_memo_snapshot) with
+    /// the jieba dictionary at `dict_path` (the default dictionary if `None`)
+    /// and the same `cutter_id`. Return `false` if there is no such snapshot
+    /// yet.
+    pub fn load_cut_memo_snapshot(
+        &mut self,
+        dir: &Path,
+        dict_path: Option<&Path>,
+        cutter_id: &str,
+    ) -> io::Result<bool> {
+        let path = snapshot_path(dir, dict_path, cutter_id)?;
+        let file = match File::open(&path) {
+            Ok(file) => file,
+            Err(err) if err.kind() == io::ErrorKind::NotFound => {
+                return Ok(false);
+            }
+            Err(err) => return Err(err),
+        };
+        let mut reader = BufReader::new(file);
+        if read_snapshot_key(&mut reader)? != snapshot_key(cutter_id) {
+            return Ok(false);
+        }
+        self.load_cut_memo(&mut reader)?;
+        Ok(true)
+    }
+
+    /// Save the memo of jieba cut results as a snapshot under `dir`, keyed by
+    /// the jieba dictionary at `dict_path` (the default dictionary if `None`)
+    /// and by `cutter_id`, which names the jieba implementation and the cut
+    /// mode that made the cut results. The snapshot is written to a
+    /// temporary file, synced to disk and then renamed into place, so that
+    /// other Vim instances never load a partial snapshot, even after a crash.
+    pub fn save_cut_memo_snapshot(
+        &self,
+        dir: &Path,
+        dict_path: Option<&Path>,
+        cutter_id: &str,
+    ) -> io::Result<()> {
+        fs::create_dir_all(dir)?;
+        let path = snapshot_path(dir, dict_path, cutter_id)?;
+        let tmp_path = path.with_extension(format!("{}.tmp", process::id()));
+        let result = File::create(&tmp_path).and_then(|file| {
+            let mut writer = BufWriter::new(file);
+            write_snapshot_key(&mut writer, &snapshot_key(cutter_id))?;
+            self.save_cut_memo(&mut writer)?;
+            writer
+                .into_inner()
+                .map_err(io::IntoInnerError::into_error)?
+                .sync_all()?;
+            fs::rename(&tmp_path, &path)
+        });
+        if result.is_err() {
+            let _ = fs::remove_file(&tmp_path);
+        }
+        result
+    }
+}
+
+/// Key written at the head of a snapshot, which must match for the snapshot
+/// to be loaded, so that a snapshot is only ever loaded by the jieba that
+/// made it, even if two of them end up at the same path.
+fn snapshot_key(cutter_id: &str) -> String {
+    format!(
+        "jieba_vim_rs_core {} {}",
+        env!("CARGO_PKG_VERSION"),
+        cutter_id
+    )
+}
+
+/// Write `key` as its little-endian `u32` byte length followed by its bytes.
+fn write_snapshot_key<W: Write>(writer: &mut W, key: &str) -> io::Result<()> {
+    let len = u32::try_from(key.len())
+        .map_err(|err| io::Error::new(io::ErrorKind::InvalidInput, err))?;
+    writer.write_all(&len.to_le_bytes())?;
+    writer.write_all(key.as_bytes())
+}
+
+/// Read the key written by [`write_snapshot_key`]. A key that is not UTF-8
+/// is read lossily, so that it simply fails to match.
+fn read_snapshot_key<R: Read>(reader: &mut R) -> io::Result<String> {
+    let mut len = [0; 4];
+    reader.read_exact(&mut len)?;
+    let mut key = vec![];
+    reader
+        .take(u32::from_le_bytes(len) as u64)
+        .read_to_end(&mut key)?;
+    Ok(String::from_utf8_lossy(&key).into_owned())
+}
+
+/// Path of the snapshot of the cut memo under `dir`. It is keyed by the
+/// version of this crate, `cutter_id` and the content of the jieba
+/// dictionary at `dict_path` (the default dictionary if `None`), so that
+/// snapshots of different jiebas do not overwrite each other.
+fn snapshot_path(
+    dir: &Path,
+    dict_path: Option<&Path>,
+    cutter_id: &str,
+) -> io::Result<PathBuf> {
+    // FNV-1a, which unlike `DefaultHasher` is stable across builds.
+    let mut hash: u64 = 0xcbf29ce484222325;
+    let dict = match dict_path {
+        Some(dict_path) => fs::read(dict_path)?,
+        None => vec![],
+    };
+    // The id is hashed with its length, so that it cannot run into the
+    // dictionary.
+    let id_len = (cutter_id.len() as u64).to_le_bytes();
+    for &byte in id_len.iter().chain(cutter_id.as_bytes()).chain(&dict) {
+        hash ^= byte as u64;
+        hash = hash.wrapping_mul(0x100000001b3);
+    }
+    Ok(dir.join(format!(
+        "cut_memo-{}-{:016x}.bin",
+        env!("CARGO_PKG_VERSION"),
+        hash
+    )))
+}
+
+#[cfg(test)]
+mod tests {
+    use std::env;
+    use std::fs;
+    use std::process;
+
+    use super::{snapshot_key, snapshot_path, write_snapshot_key};
+    use crate::motion::WordMotion;
+    use crate::token::Tokenizer;
+    use crate::token::jieba::KeywordCutter;
+
+    fn word_motion() -> WordMotion<KeywordCutter> {
+        WordMotion::new(Tokenizer::new(
+            KeywordCutter::new(["你好".into(), "世界".into()]),
+            "@,48-57,_,192-255",
+        ))
+    }
+
+    #[test]
+    fn test_cut_memo_snapshot() {
+        let dir = env::temp_dir()
+            .join(format!("jieba_vim_rs_core-cut_memo-{}", process::id()));
+        let dict_path = dir.join("dict.txt");
+        fs::create_dir_all(&dir).unwrap();
+        fs::write(&dict_path, "你好 1\n").unwrap();
+
+        let mut wm = word_motion();
+        assert!(!wm.load_cut_memo_snapshot(&dir, None, "a").unwrap());
+        let buffer: Vec<String> = vec!["你好世界".into()];
+        wm.nmap(&buffer, b"w", [0, 1, 1, 0, 1], 1).unwrap();
+        wm.save_cut_memo_snapshot(&dir, None, "a").unwrap();
+
+        // No temporary file is left next to the dictionary and the snapshot.
+        assert_eq!(fs::read_dir(&dir).unwrap().count(), 2);
+
+        let mut wm = word_motion();
+        assert!(wm.load_cut_memo_snapshot(&dir, None, "a").unwrap());
+        assert_eq!(wm.cut_memo_stats().entries, 1);
+        // A snapshot made with another dictionary is not loaded.
+        let mut wm = word_motion();
+        assert!(
+            !wm.load_cut_memo_snapshot(&dir, Some(&dict_path), "a")
+                .unwrap()
+        );
+        // Nor is a snapshot made by another jieba.
+        assert!(!wm.load_cut_memo_snapshot(&dir, None, "b").unwrap());
+        assert_eq!(wm.cut_memo_stats().entries, 0);
+
+        fs::remove_dir_all(&dir).unwrap();
+    }
+
+    #[test]
+    fn test_cut_memo_snapshot_key_mismatch() {
+        let dir = env::temp_dir()
+            .join(format!("jieba_vim_rs_core-snapshot_key-{}", process::id()));
+        fs::create_dir_all(&dir).unwrap();
+
+        let mut wm = word_motion();
+        let buffer: Vec<String> = vec!["你好世界".into()];
+        wm.nmap(&buffer, b"w", [0, 1, 1, 0, 1], 1).unwrap();
+        let mut memo = vec![];
+        wm.save_cut_memo(&mut memo).unwrap();
+
+        // A snapshot at the path of "a" but written by "b" is rejected.
+        let path = snapshot_path(&dir, None, "a").unwrap();
+        let mut snapshot = vec![];
+        write_snapshot_key(&mut snapshot, &snapshot_key("b")).unwrap();
+        snapshot.extend_from_slice(&memo);
+        fs::write(&path, &snapshot).unwrap();
+        let mut wm = word_motion();
+        assert!(!wm.load_cut_memo_snapshot(&dir, None, "a").unwrap());
+        assert_eq!(wm.cut_memo_stats().entries, 0);
+
+        let mut snapshot = vec![];
+        write_snapshot_key(&mut snapshot, &snapshot_key("a")).unwrap();
+        snapshot.extend_from_slice(&memo);
+        fs::write(&path, &snapshot).unwrap();
+        assert!(wm.load_cut_memo_snapshot(&dir, None, "a").unwrap());
+        assert_eq!(wm.cut_memo_stats().entries, 1);
+
+        fs::remove_dir_all(&dir).unwrap();
+    }
+
+    #[test]
+    fn test_snapshot_path_keyed_by_dict() {
+        let dir = env::temp_dir()
+            .join(format!("jieba_vim_rs_core-snapshot_path-{}", process::id()));
+        fs::create_dir_all(&dir).unwrap();
+        let dict_a = dir.join("a.txt");
+        let dict_b = dir.join("b.txt");
+        fs::write(&dict_a, "你好 1\n").unwrap();
+        fs::write(&dict_b, "世界 1\n").unwrap();
+
+        let path_a = snapshot_path(&dir, Some(&dict_a), "a").unwrap();
+        assert_eq!(path_a.parent(), Some(dir.as_path()));
+        assert_ne!(path_a, snapshot_path(&dir, Some(&dict_b), "a").unwrap());
+        assert_ne!(path_a, snapshot_path(&dir, None, "a").unwrap());
+        assert_ne!(path_a, snapshot_path(&dir, Some(&dict_a), "b").unwrap());
+        fs::write(&dict_b, "你好 1\n").unwrap();
+        assert_eq!(path_a, snapshot_path(&dir, Some(&dict_b), "a").unwrap());
+
+        fs::remove_dir_all(&dir).unwrap();
+    }
+}
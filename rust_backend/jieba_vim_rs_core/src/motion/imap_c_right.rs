@@ -16,7 +16,6 @@ use crate::BufferLike;
 use crate::token::JiebaPlaceholder;
 
 use super::api::{ImapOutput, WordMotion};
-use super::core::buffer::ParsedBuffer;
 use super::core::motion::Motion;
 use super::core::position::Position;
 use super::primitives::text_object::ForwardWord;
@@ -29,11 +28,11 @@ impl<C: JiebaPlaceholder> WordMotion<C> {
     ///
     /// Equivalent to `W` in normal mode, except that the motion never fails.
     pub fn imap_ctrl_right<B: BufferLike + ?Sized>(
-        &self,
+        &mut self,
         buffer: &B,
         mut cursor: Position,
     ) -> Result<ImapOutput, B::Error> {
-        let mut buffer = ParsedBuffer::new(buffer, &self.tokenizer, false);
+        let mut buffer = self.parsed_buffer(buffer, false);
         let mut motion_eol = ForwardWord::new(true);
         let mut motion_noeol = ForwardWord::new(false);
         let mut cursor_copy = cursor;
@@ -17,18 +17,17 @@ use crate::motion::core::motion::Motion;
 use crate::token::JiebaPlaceholder;
 
 use super::api::{ImapOutput, WordMotion};
-use super::core::buffer::ParsedBuffer;
 use super::core::position::Position;
 use super::primitives::text_object::PreviousWord;
 
 impl<C: JiebaPlaceholder> WordMotion<C> {
     /// Delete the word before the cursor.
     pub fn imap_ctrl_w<B: BufferLike + ?Sized>(
-        &self,
+        &mut self,
         buffer: &B,
         mut cursor: Position,
     ) -> Result<ImapOutput, B::Error> {
-        let mut buffer = ParsedBuffer::new(buffer, &self.tokenizer, true);
+        let mut buffer = self.parsed_buffer(buffer, true);
         let mut motion = PreviousWord::default();
         let _ = motion.map(&mut buffer, 1, &mut cursor)?;
         Ok(ImapOutput { cursor })
@@ -16,7 +16,6 @@ use crate::BufferLike;
 use crate::token::JiebaPlaceholder;
 
 use super::api::{ImapOutput, WordMotion};
-use super::core::buffer::ParsedBuffer;
 use super::core::motion::Motion;
 use super::core::position::Position;
 use super::primitives::text_object::BackwardWord;
@@ -29,11 +28,11 @@ impl<C: JiebaPlaceholder> WordMotion<C> {
     ///
     /// Equivalent to `b` in normal mode, except that the motion never fails.
     pub fn imap_shift_left<B: BufferLike + ?Sized>(
-        &self,
+        &mut self,
         buffer: &B,
         mut cursor: Position,
     ) -> Result<ImapOutput, B::Error> {
-        let mut buffer = ParsedBuffer::new(buffer, &self.tokenizer, true);
+        let mut buffer = self.parsed_buffer(buffer, true);
         let mut motion = BackwardWord::new(false);
         let _ = motion.map(&mut buffer, 1, &mut cursor)?;
         Ok(ImapOutput { cursor })
@@ -14,6 +14,7 @@
 
 mod api;
 pub(crate) mod core;
+mod cut_memo;
 mod imap_c_left;
 mod imap_c_right;
 mod imap_c_w;
@@ -30,7 +31,11 @@ mod omap_ge;
 mod omap_iw;
 mod omap_w;
 pub(crate) mod policy;
+mod preview;
 pub(crate) mod primitives;
+mod stats;
+mod tokenize_lines;
+mod word_count;
 mod xmap_aw;
 mod xmap_b;
 mod xmap_e;
@@ -39,4 +44,9 @@ mod xmap_iw;
 mod xmap_w;
 
 pub use api::WordMotion;
-pub use api::ffi::{ImapOutput, NmapOutput, OmapOutput, XmapOutput};
+pub use api::ffi::{
+    ImapOutput, NmapOutput, OmapOutput, TokenizedLines, XmapOutput,
+};
+pub use core::buffer::{Filled, ParseStats};
+pub use stats::MotionStats;
+pub use tokenize_lines::TokenizeLinesError;
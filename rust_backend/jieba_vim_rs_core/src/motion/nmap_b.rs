@@ -16,7 +16,6 @@ use crate::BufferLike;
 use crate::token::JiebaPlaceholder;
 
 use super::api::{NmapOutput, WordMotion};
-use super::core::buffer::ParsedBuffer;
 use super::core::motion::Motion;
 use super::core::position::Position;
 use super::primitives::text_object::BackwardWord;
@@ -40,13 +39,13 @@ impl<C: JiebaPlaceholder> WordMotion<C> {
     /// - If there is no previous word to the left of current cursor, jump to
     ///   the first character of the first token in the buffer.
     pub fn nmap_b<B: BufferLike + ?Sized>(
-        &self,
+        &mut self,
         buffer: &B,
         mut cursor: Position,
         count: u64,
         word: bool,
     ) -> Result<NmapOutput, B::Error> {
-        let mut buffer = ParsedBuffer::new(buffer, &self.tokenizer, word);
+        let mut buffer = self.parsed_buffer(buffer, word);
         let mut motion = BackwardWord::new(false);
         let s = motion.map(&mut buffer, count, &mut cursor)?;
         Ok(NmapOutput {
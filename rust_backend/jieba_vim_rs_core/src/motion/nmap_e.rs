@@ -16,7 +16,6 @@ use crate::BufferLike;
 use crate::token::JiebaPlaceholder;
 
 use super::api::{NmapOutput, WordMotion};
-use super::core::buffer::ParsedBuffer;
 use super::core::motion::Motion;
 use super::core::position::Position;
 use super::policy::adjust_cursor::AdjustCursor;
@@ -40,13 +39,13 @@ impl<C: JiebaPlaceholder> WordMotion<C> {
     ///   last character of the last token in the buffer. And the motion should
     ///   be taken as a failure.
     pub fn nmap_e<B: BufferLike + ?Sized>(
-        &self,
+        &mut self,
         buffer: &B,
         mut cursor: Position,
         count: u64,
         word: bool,
     ) -> Result<NmapOutput, B::Error> {
-        let mut buffer = ParsedBuffer::new(buffer, &self.tokenizer, word);
+        let mut buffer = self.parsed_buffer(buffer, word);
         let mut motion = EndWord::new(false, false);
         let s = motion.map(&mut buffer, count, &mut cursor)?;
         cursor.adjust_cursor(&mut buffer)?;
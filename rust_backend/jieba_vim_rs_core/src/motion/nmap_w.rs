@@ -16,7 +16,6 @@ use crate::BufferLike;
 use crate::token::JiebaPlaceholder;
 
 use super::api::{NmapOutput, WordMotion};
-use super::core::buffer::ParsedBuffer;
 use super::core::motion::Motion;
 use super::core::position::Position;
 use super::policy::adjust_cursor::AdjustCursor;
@@ -41,13 +40,13 @@ impl<C: JiebaPlaceholder> WordMotion<C> {
     /// - If there is no next word to the right of current cursor, jump to the
     ///   last character of the last token in the buffer.
     pub fn nmap_w<B: BufferLike + ?Sized>(
-        &self,
+        &mut self,
         buffer: &B,
         mut cursor: Position,
         count: u64,
         word: bool,
     ) -> Result<NmapOutput, B::Error> {
-        let mut buffer = ParsedBuffer::new(buffer, &self.tokenizer, word);
+        let mut buffer = self.parsed_buffer(buffer, word);
         let mut motion = ForwardWord::new(false);
         let s = motion.map(&mut buffer, count, &mut cursor)?;
         cursor.adjust_cursor(&mut buffer)?;
@@ -16,7 +16,6 @@ use crate::BufferLike;
 use crate::token::JiebaPlaceholder;
 
 use super::api::{OmapOutput, WordMotion};
-use super::core::buffer::ParsedBuffer;
 use super::core::motion::{Motion, MotionState};
 use super::core::position::{OperatorRange, Position};
 use super::policy::d_special::DSpecial;
@@ -27,14 +26,14 @@ use super::primitives::text_object::CurrentWord;
 
 impl<C: JiebaPlaceholder> WordMotion<C> {
     pub fn omap_aw<B: BufferLike + ?Sized>(
-        &self,
+        &mut self,
         buffer: &B,
         cursor: Position,
         count: u64,
         word: bool,
         operator: &[u8],
     ) -> Result<OmapOutput, B::Error> {
-        let mut buffer = ParsedBuffer::new(buffer, &self.tokenizer, word);
+        let mut buffer = self.parsed_buffer(buffer, word);
         // The exclusiveness is subject to the buffer context. Setting it
         // to an arbitrary value (exclusive here) won't affect its final
         // exclusiveness.
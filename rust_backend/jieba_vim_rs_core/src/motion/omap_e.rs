@@ -16,7 +16,6 @@ use crate::BufferLike;
 use crate::token::JiebaPlaceholder;
 
 use super::api::{OmapOutput, WordMotion};
-use super::core::buffer::ParsedBuffer;
 use super::core::motion::Motion;
 use super::core::position::{OperatorRange, Position};
 use super::policy::adjust_cursor::AdjustCursor;
@@ -43,14 +42,14 @@ impl<C: JiebaPlaceholder> WordMotion<C> {
     /// - If there is no next word to the right of current cursor, jump to the
     ///   last character of the last token in the buffer.
     pub fn omap_e<B: BufferLike + ?Sized>(
-        &self,
+        &mut self,
         buffer: &B,
         cursor_pos: Position,
         count: u64,
         word: bool,
         operator: &[u8],
     ) -> Result<OmapOutput, B::Error> {
-        let mut buffer = ParsedBuffer::new(buffer, &self.tokenizer, word);
+        let mut buffer = self.parsed_buffer(buffer, word);
         let mut orng = OperatorRange::new_inclusive(cursor_pos, operator);
         orng.langle.off = 0;
         orng.cursor = orng.langle;
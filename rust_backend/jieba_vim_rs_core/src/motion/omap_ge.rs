@@ -16,7 +16,6 @@ use crate::BufferLike;
 use crate::token::JiebaPlaceholder;
 
 use super::api::{OmapOutput, WordMotion};
-use super::core::buffer::ParsedBuffer;
 use super::core::motion::{Motion, MotionState};
 use super::core::position::{OperatorRange, Position};
 use super::policy::d_special::DSpecial;
@@ -42,14 +41,14 @@ impl<C: JiebaPlaceholder> WordMotion<C> {
     /// - If there is no previous word to the left of current cursor, jump to
     ///   the first character of the first token in the buffer.
     pub fn omap_ge<B: BufferLike + ?Sized>(
-        &self,
+        &mut self,
         buffer: &B,
         cursor_pos: Position,
         count: u64,
         word: bool,
         operator: &[u8],
     ) -> Result<OmapOutput, B::Error> {
-        let mut buffer = ParsedBuffer::new(buffer, &self.tokenizer, word);
+        let mut buffer = self.parsed_buffer(buffer, word);
         let mut orng = OperatorRange::new_inclusive(cursor_pos, operator);
         orng.langle.off = 0;
         let mut motion_rangle = BackwardEndWord::new(false);
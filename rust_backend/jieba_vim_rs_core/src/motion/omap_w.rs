@@ -16,7 +16,7 @@ use crate::BufferLike;
 use crate::token::{JiebaPlaceholder, TokenType};
 
 use super::api::{MotionType, OmapOutput, WordMotion};
-use super::core::buffer::{ParsedBuffer, ParsedBufferLike};
+use super::core::buffer::ParsedBufferLike;
 use super::core::iter::{ExtendedInlineTokensIter, GToken};
 use super::core::motion::Motion;
 use super::core::position::{OperatorRange, Position};
@@ -51,14 +51,14 @@ impl<C: JiebaPlaceholder> WordMotion<C> {
     ///   is interpreted as change-word, and a word does not include the
     ///   following white space (see also cw). (**)
     pub fn omap_w<B: BufferLike + ?Sized>(
-        &self,
+        &mut self,
         buffer: &B,
         cursor: Position,
         count: u64,
         word: bool,
         operator: &[u8],
     ) -> Result<OmapOutput, B::Error> {
-        let mut buffer = ParsedBuffer::new(buffer, &self.tokenizer, word);
+        let mut buffer = self.parsed_buffer(buffer, word);
         let mut orng = OperatorRange::new_exclusive(cursor, operator);
         orng.langle.off = 0;
         orng.cursor = orng.langle;
@@ -0,0 +1,167 @@
+// Copyright 2026 Kaiwen Wu. All Rights Reserved.
+//
+// Licensed under the Apache License, Version 2.0 (the "License"); you may not
+// use this file except in compliance with the License. You may obtain a copy
+// of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+// WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+// License for the specific language governing permissions and limitations
+// under the License.
+
+use std::time::Instant;
+
+use crate::BufferLike;
+use crate::token::JiebaPlaceholder;
+
+use super::api::{WordMotion, ffi};
+use super::core::buffer::ParsedBufferLike;
+use super::core::motion::Motion;
+use super::core::position::Position;
+use super::policy::adjust_cursor::AdjustCursor;
+use super::primitives::text_object::{
+    BackwardEndWord, BackwardWord, EndWord, ForwardWord,
+};
+
+/// Move `cursor` by one step of nmap `motion`, as in `nmap` with count 1.
+fn step<B: ParsedBufferLike + ?Sized>(
+    buffer: &mut B,
+    motion: &[u8],
+    cursor: &mut Position,
+) -> Result<(), B::Error> {
+    match motion {
+        b"w" | b"W" => {
+            ForwardWord::new(false).map(buffer, 1, cursor)?;
+            cursor.adjust_cursor(buffer)?;
+        }
+        b"b" | b"B" => {
+            BackwardWord::new(false).map(buffer, 1, cursor)?;
+        }
+        b"e" | b"E" => {
+            EndWord::new(false, false).map(buffer, 1, cursor)?;
+            cursor.adjust_cursor(buffer)?;
+        }
+        b"ge" | b"gE" => {
+            BackwardEndWord::new(false).map(buffer, 1, cursor)?;
+        }
+        _ => unreachable!("invalid motion key sequence: {:?}", motion),
+    }
+    Ok(())
+}
+
+impl<C: JiebaPlaceholder> WordMotion<C> {
+    /// Preview the stops of nmap `motion` (one of `w`, `W`, `e`, `E`, `b`,
+    /// `B`, `ge`, `gE`) from `cursor` (_, lnum, col, _). Return the (lnum, col)
+    /// of the stops in order. To preview current line only, `preview_limit`
+    /// should be zero; otherwise at most `preview_limit` stops are returned.
+    ///
+    /// The stops are the same as those of repeated `nmap` calls with count 1,
+    /// but all lines are tokenized at most once.
+    pub fn preview_nmap<B: BufferLike + ?Sized>(
+        &mut self,
+        buffer: &B,
+        motion: &[u8],
+        cursor: ffi::Position,
+        preview_limit: usize,
+    ) -> Result<Vec<(usize, usize)>, B::Error> {
+        let start = Instant::now();
+        let tracing = self.tokenizer.tracing().clone();
+        let _span = tracing.span("preview_nmap");
+        let positions =
+            self.preview_stops(buffer, motion, cursor, preview_limit)?;
+        self.record_call("preview_nmap", motion, start);
+        Ok(positions)
+    }
+
+    /// The stops returned by [`preview_nmap`](WordMotion::preview_nmap),
+    /// without counting the call.
+    fn preview_stops<B: BufferLike + ?Sized>(
+        &mut self,
+        buffer: &B,
+        motion: &[u8],
+        cursor: ffi::Position,
+        preview_limit: usize,
+    ) -> Result<Vec<(usize, usize)>, B::Error> {
+        let word = match motion {
+            b"w" | b"b" | b"e" | b"ge" => true,
+            b"W" | b"B" | b"E" | b"gE" => false,
+            _ => unreachable!("invalid motion key sequence: {:?}", motion),
+        };
+        let [_, lnum, col, _] = cursor;
+        let start = Position::new(lnum, col);
+        let stops = |wm: &mut Self| {
+            let mut buffer = wm.parsed_buffer(buffer, word);
+            let mut cursor = start;
+            let mut positions = vec![];
+            while preview_limit == 0 || positions.len() < preview_limit {
+                let mut next_cursor = Position {
+                    lnum: cursor.lnum,
+                    col: cursor.col,
+                    off: 0,
+                };
+                step(&mut buffer, motion, &mut next_cursor)?;
+                // Reaches either beginning of file or end of file.
+                if (next_cursor.lnum, next_cursor.col)
+                    == (cursor.lnum, cursor.col)
+                {
+                    break;
+                }
+                // Reaches either previous line or next line.
+                if preview_limit == 0 && next_cursor.lnum != cursor.lnum {
+                    break;
+                }
+                positions.push((next_cursor.lnum, next_cursor.col));
+                cursor = next_cursor;
+            }
+            Ok(positions)
+        };
+        self.focused(start, stops, |positions| {
+            positions
+                .iter()
+                .map(|&(lnum, col)| Position::new(lnum, col))
+                .collect()
+        })
+    }
+
+    /// Same as [`preview_nmap`](WordMotion::preview_nmap), but return the
+    /// stops as (lnum, col, len) in batches of at most `batch_size`, where
+    /// `len` is the byte length of the character at the stop. Each batch can
+    /// be passed to Vim's `matchaddpos()` as is.
+    pub fn preview_nmap_batched<B: BufferLike + ?Sized>(
+        &mut self,
+        buffer: &B,
+        motion: &[u8],
+        cursor: ffi::Position,
+        preview_limit: usize,
+        batch_size: usize,
+    ) -> Result<Vec<Vec<[usize; 3]>>, B::Error> {
+        let start = Instant::now();
+        let tracing = self.tokenizer.tracing().clone();
+        let _span = tracing.span("preview_nmap_batched");
+        let positions =
+            self.preview_stops(buffer, motion, cursor, preview_limit)?;
+        let mut stops = Vec::with_capacity(positions.len());
+        // Visit each line once for all the stops in it.
+        for run in positions.chunk_by(|a, b| a.0 == b.0) {
+            let lnum = run[0].0;
+            buffer.with_line(lnum, |line| {
+                stops.extend(run.iter().map(|&(_, col)| {
+                    let len = line
+                        .get(col - 1..)
+                        .and_then(|rest| rest.chars().next())
+                        .map_or(1, char::len_utf8);
+                    [lnum, col, len]
+                }));
+            })?;
+        }
+        let batches = stops
+            .chunks(batch_size.max(1))
+            .map(|batch| batch.to_vec())
+            .collect();
+        self.record_call("preview_nmap_batched", motion, start);
+        Ok(batches)
+    }
+}
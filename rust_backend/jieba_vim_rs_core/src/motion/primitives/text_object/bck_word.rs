@@ -39,6 +39,56 @@ impl BackwardWord {
 
 impl Motion<Position> for BackwardWord {
     fn map<B: ParsedBufferLike + ?Sized>(
+        &mut self,
+        buffer: &mut B,
+        mut count: u64,
+        cursor: &mut Position,
+    ) -> Result<MotionState, B::Error> {
+        if count <= 1 {
+            return self.map_unit_by_unit(buffer, count, cursor);
+        }
+        // The first unit motion moves to the start of a word or to an empty
+        // line, after which the lines passed over in whole are skipped.
+        let mut unit_motion = UnitBackwardWord { stop: self.stop };
+        let mut state = Tolerable::default();
+        if let Some(absorbing_state) =
+            state.update(unit_motion.unit_map(buffer, cursor)?)
+        {
+            return Ok(absorbing_state);
+        }
+        count -= 1;
+        let skipped = skip_lines(
+            buffer,
+            cursor,
+            count,
+            Direction::Backward,
+            StopAt::WordStart,
+            true,
+        )?;
+        if skipped.count > 0 {
+            count -= skipped.count;
+            // `Tolerable` ends up in the state of the last unit motion
+            // skipped.
+            state.update(if skipped.on_empty_line {
+                ExtendedMotionState::SemiFailure
+            } else {
+                ExtendedMotionState::Success
+            });
+        }
+        while count > 0 {
+            if let Some(absorbing_state) =
+                state.update(unit_motion.unit_map(buffer, cursor)?)
+            {
+                return Ok(absorbing_state);
+            }
+            count -= 1;
+        }
+        Ok(state.finalize())
+    }
+}
+
+impl BackwardWord {
+    fn map_unit_by_unit<B: ParsedBufferLike + ?Sized>(
         &mut self,
         buffer: &mut B,
         count: u64,
@@ -218,6 +268,29 @@ impl Chain<BackwardWord> for Decl {
 mod tests {
     use super::*;
 
+    #[test]
+    fn test_backward_word_skip_lines_same_as_unit_by_unit() -> Result<(), ()> {
+        for (mut b, cursors) in random_buffers() {
+            for stop in [false, true] {
+                for &cursor in &cursors {
+                    for count in 1..=12 {
+                        let mut expected = cursor;
+                        let expected_state = BackwardWord::new(stop)
+                            .map_unit_by_unit(&mut b, count, &mut expected)?;
+                        let mut actual = cursor;
+                        let state = BackwardWord::new(stop).map(
+                            &mut b,
+                            count,
+                            &mut actual,
+                        )?;
+                        assert_eq!((state, actual), (expected_state, expected));
+                    }
+                }
+            }
+        }
+        Ok(())
+    }
+
     #[test]
     fn test_backward_word_count1_stop() -> Result<(), ()> {
         let mut bck = BackwardWord::new(true);
@@ -42,6 +42,44 @@ impl EndWord {
 
 impl Motion<Position> for EndWord {
     fn map<B: ParsedBufferLike + ?Sized>(
+        &mut self,
+        buffer: &mut B,
+        mut count: u64,
+        cursor: &mut Position,
+    ) -> Result<MotionState, B::Error> {
+        if count <= 1 {
+            return self.map_unit_by_unit(buffer, count, cursor);
+        }
+        // The first unit motion moves to the end of a word, after which the
+        // lines passed over in whole are skipped.
+        let mut unit_motion = UnitEndWord {
+            stop: self.stop,
+            empty: self.empty,
+        };
+        let mut state = Intolerable::default();
+        if let Some(absorbing_state) =
+            state.update(unit_motion.unit_map(buffer, cursor)?)
+        {
+            return Ok(absorbing_state);
+        }
+        count -= 1;
+        let skipped = skip_lines(
+            buffer,
+            cursor,
+            count,
+            Direction::Forward,
+            StopAt::WordEnd,
+            self.empty,
+        )?;
+        count -= skipped.count;
+        // Every unit motion so far has succeeded, which is the initial state
+        // of `Intolerable`.
+        Markovian::new(unit_motion).map(buffer, count, cursor)
+    }
+}
+
+impl EndWord {
+    fn map_unit_by_unit<B: ParsedBufferLike + ?Sized>(
         &mut self,
         buffer: &mut B,
         count: u64,
@@ -295,6 +333,31 @@ impl Chain<EndWord> for Incl {
 mod tests {
     use super::*;
 
+    #[test]
+    fn test_end_word_skip_lines_same_as_unit_by_unit() -> Result<(), ()> {
+        for (mut b, cursors) in random_buffers() {
+            for (stop, empty) in
+                [(false, false), (true, false), (false, true), (true, true)]
+            {
+                for &cursor in &cursors {
+                    for count in 1..=12 {
+                        let mut expected = cursor;
+                        let expected_state = EndWord::new(stop, empty)
+                            .map_unit_by_unit(&mut b, count, &mut expected)?;
+                        let mut actual = cursor;
+                        let state = EndWord::new(stop, empty).map(
+                            &mut b,
+                            count,
+                            &mut actual,
+                        )?;
+                        assert_eq!((state, actual), (expected_state, expected));
+                    }
+                }
+            }
+        }
+        Ok(())
+    }
+
     #[test]
     fn test_end_word_count1_stop_empty() -> Result<(), ()> {
         let mut e = EndWord::new(true, true);
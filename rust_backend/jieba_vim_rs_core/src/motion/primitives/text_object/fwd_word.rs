@@ -43,6 +43,30 @@ impl Motion<Position> for ForwardWord {
         buffer: &mut B,
         mut count: u64,
         cursor: &mut Position,
+    ) -> Result<MotionState, B::Error> {
+        // Skip the lines passed over in whole, leaving the last unit motion,
+        // which may stop at Eol, to `UnitForwardWord`.
+        if count > 1 {
+            let skipped = skip_lines(
+                buffer,
+                cursor,
+                count - 1,
+                Direction::Forward,
+                StopAt::WordStart,
+                true,
+            )?;
+            count -= skipped.count;
+        }
+        self.map_unit_by_unit(buffer, count, cursor)
+    }
+}
+
+impl ForwardWord {
+    fn map_unit_by_unit<B: ParsedBufferLike + ?Sized>(
+        &mut self,
+        buffer: &mut B,
+        mut count: u64,
+        cursor: &mut Position,
     ) -> Result<MotionState, B::Error> {
         let mut state = SemiTolerable::default();
         while count > 0 {
@@ -240,6 +264,29 @@ impl Chain<ForwardWord> for Incl {
 mod tests {
     use super::*;
 
+    #[test]
+    fn test_forward_word_skip_lines_same_as_unit_by_unit() -> Result<(), ()> {
+        for (mut b, cursors) in random_buffers() {
+            for eol in [false, true] {
+                for &cursor in &cursors {
+                    for count in 1..=12 {
+                        let mut expected = cursor;
+                        let expected_state = ForwardWord::new(eol)
+                            .map_unit_by_unit(&mut b, count, &mut expected)?;
+                        let mut actual = cursor;
+                        let state = ForwardWord::new(eol).map(
+                            &mut b,
+                            count,
+                            &mut actual,
+                        )?;
+                        assert_eq!((state, actual), (expected_state, expected));
+                    }
+                }
+            }
+        }
+        Ok(())
+    }
+
     #[test]
     fn test_forward_word_count1_noeol() -> Result<(), ()> {
         let mut b = PreTokenizedBuffer::new(
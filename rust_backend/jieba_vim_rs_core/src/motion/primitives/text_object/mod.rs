@@ -39,6 +39,9 @@ use super::core::motion::{
     MotionState, UnitMotion,
 };
 use super::core::position::{OperatorRange, Position, VisualRange};
+#[cfg(test)]
+use super::core::skip::test_buffers::random_buffers;
+use super::core::skip::{Direction, StopAt, skip_lines};
 use super::misc::{Dec, Decl, Incl};
 
 /// Construct a vec of ASCII tokens to be used in tests.
@@ -0,0 +1,159 @@
+// Copyright 2026 Kaiwen Wu. All Rights Reserved.
+//
+// Licensed under the Apache License, Version 2.0 (the "License"); you may not
+// use this file except in compliance with the License. You may obtain a copy
+// of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+// WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+// License for the specific language governing permissions and limitations
+// under the License.
+
+//! Counters and timers of [`WordMotion`].
+
+use std::collections::BTreeMap;
+use std::time::{Duration, Instant};
+
+use super::api::WordMotion;
+use super::core::buffer::ParseStats;
+
+/// Counters and timers of a [`WordMotion`] since it was created or since
+/// [`reset_stats`](WordMotion::reset_stats).
+#[derive(Debug, Default, Clone, PartialEq, Eq)]
+pub struct MotionStats {
+    /// Number of calls of each kind, keyed by the method and the motion key
+    /// sequence, if any, e.g. `"nmap w"` or `"word_count"`. Calls that fail
+    /// on a buffer error are left out, as bindings may retry them.
+    pub calls: BTreeMap<String, u64>,
+    /// Time spent in the calls.
+    pub call_time: Duration,
+    /// Counters and timers of the lines tokenized through the cache.
+    pub parse: ParseStats,
+    /// Time spent in jieba, which is part of
+    /// [`tokenize_time`](ParseStats::tokenize_time).
+    pub cut_time: Duration,
+}
+
+impl MotionStats {
+    /// The number of calls of all kinds.
+    pub fn total_calls(&self) -> u64 {
+        self.calls.values().sum()
+    }
+}
+
+/// The calls counted by [`WordMotion`], keyed by the method and then by the
+/// motion key sequence, so that counting a call of a kind seen before
+/// allocates nothing.
+#[derive(Debug, Default)]
+pub(super) struct CallStats {
+    counts: BTreeMap<&'static str, BTreeMap<Vec<u8>, u64>>,
+    time: Duration,
+}
+
+impl<C> WordMotion<C> {
+    /// Get the counters and timers since the motion was created or since
+    /// [`reset_stats`](WordMotion::reset_stats).
+    pub fn stats(&self) -> MotionStats {
+        let mut calls = BTreeMap::new();
+        for (method, counts) in &self.stats.counts {
+            for (motion, &n) in counts {
+                let kind = if motion.is_empty() {
+                    method.to_string()
+                } else {
+                    format!("{} {}", method, motion.escape_ascii())
+                };
+                calls.insert(kind, n);
+            }
+        }
+        MotionStats {
+            calls,
+            call_time: self.stats.time,
+            parse: self.cache.stats(),
+            cut_time: self.tokenizer.cut_memo_stats().cut_time,
+        }
+    }
+
+    /// Reset the counters and timers. The hit/miss counters of the cut memo
+    /// are left alone, as they tell whether the memo is worth saving.
+    pub fn reset_stats(&mut self) {
+        self.stats = CallStats::default();
+        self.cache.reset_stats();
+        self.tokenizer.reset_cut_time();
+    }
+
+    /// Count a call of `method` with `motion`, which started at `start`.
+    pub(super) fn record_call(
+        &mut self,
+        method: &'static str,
+        motion: &[u8],
+        start: Instant,
+    ) {
+        let counts = self.stats.counts.entry(method).or_default();
+        match counts.get_mut(motion) {
+            Some(n) => *n += 1,
+            None => {
+                counts.insert(motion.to_vec(), 1);
+            }
+        }
+        self.stats.time += start.elapsed();
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use crate::motion::WordMotion;
+    use crate::token::Tokenizer;
+    use crate::token::jieba::KeywordCutter;
+
+    #[test]
+    fn test_stats() {
+        let mut wm = WordMotion::new(Tokenizer::new(
+            KeywordCutter::new(["你好".into(), "世界".into()]),
+            "@,48-57,_,192-255",
+        ));
+        let buffer: Vec<String> =
+            vec!["foo 你好世界".into(), "".into(), "bar".into()];
+
+        wm.nmap(&buffer, b"w", [0, 1, 1, 0, 1], 3).unwrap();
+        wm.nmap(&buffer, b"w", [0, 1, 1, 0, 1], 1).unwrap();
+        wm.omap(&buffer, b"e", [0, 1, 1, 0, 1], 1, b"d").unwrap();
+        wm.word_count(&buffer, 1, 3, true).unwrap();
+        wm.preview_nmap_batched(&buffer, b"w", [0, 1, 1, 0], 0, 10)
+            .unwrap();
+        let stats = wm.stats();
+        assert_eq!(stats.calls["nmap w"], 2);
+        assert_eq!(stats.calls["omap e"], 1);
+        assert_eq!(stats.calls["word_count"], 1);
+        assert_eq!(stats.calls["preview_nmap_batched w"], 1);
+        assert!(!stats.calls.contains_key("preview_nmap w"));
+        assert_eq!(stats.total_calls(), 5);
+        assert!(!stats.cut_time.is_zero());
+        // Each line is tokenized once, and found in the cache afterwards.
+        assert_eq!(stats.parse.lines_parsed, 3);
+        assert_eq!(stats.parse.misses, 3);
+        assert!(stats.parse.hits > 0);
+        assert_eq!(stats.parse.evictions, 0);
+
+        wm.reset_stats();
+        let stats = wm.stats();
+        assert!(stats.calls.is_empty());
+        assert_eq!(stats.parse, Default::default());
+        assert!(stats.cut_time.is_zero());
+    }
+
+    #[test]
+    fn test_stats_cut_time_without_memo() {
+        let mut wm = WordMotion::new(Tokenizer::new(
+            KeywordCutter::new(["你好".into(), "世界".into()]),
+            "@,48-57,_,192-255",
+        ));
+        wm.set_cut_memo_capacity(0);
+        let buffer: Vec<String> = vec!["你好世界".into()];
+
+        wm.nmap(&buffer, b"w", [0, 1, 1, 0, 1], 1).unwrap();
+        assert!(!wm.stats().cut_time.is_zero());
+    }
+}
@@ -0,0 +1,112 @@
+// Copyright 2026 Kaiwen Wu. All Rights Reserved.
+//
+// Licensed under the Apache License, Version 2.0 (the "License"); you may not
+// use this file except in compliance with the License. You may obtain a copy
+// of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+// WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+// License for the specific language governing permissions and limitations
+// under the License.
+
+use std::time::Instant;
+
+use crate::BufferLike;
+use crate::token::{JiebaPlaceholder, TokenLike, TokenType};
+
+use super::api::{WordMotion, ffi};
+use super::core::buffer::{ParsedBuffer, ParsedBufferLike};
+
+/// Error of [`WordMotion::tokenize_lines`].
+#[derive(Debug, PartialEq, Eq)]
+pub enum TokenizeLinesError<E> {
+    /// Failed to read the buffer.
+    Buffer(E),
+    /// The bounds of the tokens up to line `lnum` (1-indexed) do not fit in
+    /// `u32`, i.e. the line or the lines tokenized are too long.
+    TooLong { lnum: usize },
+}
+
+impl<C: JiebaPlaceholder> WordMotion<C> {
+    /// Tokenize lines `first..=last` (1-indexed) of `buffer` into `word`s if
+    /// `word` is `true`, otherwise into `WORD`s, and return the bounds of the
+    /// non-space tokens. `last` is clamped to the number of lines. The lines
+    /// are tokenized through the cache, which they fill as a side effect.
+    pub fn tokenize_lines<B: BufferLike + ?Sized>(
+        &mut self,
+        buffer: &B,
+        first: usize,
+        last: usize,
+        word: bool,
+    ) -> Result<ffi::TokenizedLines, TokenizeLinesError<B::Error>> {
+        let start = Instant::now();
+        let tracing = self.tokenizer.tracing().clone();
+        let _span = tracing.span("tokenize_lines");
+        let last =
+            last.min(buffer.lines().map_err(TokenizeLinesError::Buffer)?);
+        let mut buffer =
+            ParsedBuffer::new(buffer, &self.tokenizer, &mut self.cache, word);
+        let mut bounds = vec![];
+        let mut index = vec![0];
+        for lnum in first.max(1)..=last {
+            let to_u32 = |n: usize| {
+                u32::try_from(n)
+                    .map_err(|_| TokenizeLinesError::TooLong { lnum })
+            };
+            let tokens = buffer
+                .getline_parsed(lnum)
+                .map_err(TokenizeLinesError::Buffer)?;
+            for token in tokens.iter() {
+                if token.ty == TokenType::Word {
+                    // Columns are indexed from 1.
+                    bounds.push(to_u32(token.first_char() - 1)?);
+                    bounds.push(to_u32(token.last_char1() - 1)?);
+                }
+            }
+            index.push(to_u32(bounds.len() / 2)?);
+        }
+        self.record_call("tokenize_lines", b"", start);
+        Ok(ffi::TokenizedLines { bounds, index })
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use crate::motion::WordMotion;
+    use crate::token::Tokenizer;
+    use crate::token::jieba::KeywordCutter;
+
+    #[test]
+    fn test_tokenize_lines() {
+        let mut wm = WordMotion::new(Tokenizer::new(
+            KeywordCutter::new(["你好".into(), "世界".into()]),
+            "@,48-57,_,192-255",
+        ));
+        let buffer: Vec<String> = vec![
+            "foo, bar".into(),
+            "".into(),
+            "  你好世界 x".into(),
+            "baz".into(),
+        ];
+
+        let lines = wm.tokenize_lines(&buffer, 1, 3, true).unwrap();
+        assert_eq!(lines.bounds, vec![0, 3, 3, 4, 5, 8, 2, 8, 8, 14, 15, 16]);
+        assert_eq!(lines.index, vec![0, 3, 3, 6]);
+
+        let lines = wm.tokenize_lines(&buffer, 1, 3, false).unwrap();
+        assert_eq!(lines.bounds, vec![0, 4, 5, 8, 2, 8, 8, 14, 15, 16]);
+        assert_eq!(lines.index, vec![0, 2, 2, 5]);
+
+        // `last` is clamped.
+        let lines = wm.tokenize_lines(&buffer, 4, 99, true).unwrap();
+        assert_eq!(lines.bounds, vec![0, 3]);
+        assert_eq!(lines.index, vec![0, 1]);
+
+        let lines = wm.tokenize_lines(&buffer, 3, 2, true).unwrap();
+        assert!(lines.bounds.is_empty());
+        assert_eq!(lines.index, vec![0]);
+    }
+}
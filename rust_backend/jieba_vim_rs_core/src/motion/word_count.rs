@@ -0,0 +1,215 @@
+// Copyright 2026 Kaiwen Wu. All Rights Reserved.
+//
+// Licensed under the Apache License, Version 2.0 (the "License"); you may not
+// use this file except in compliance with the License. You may obtain a copy
+// of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+// WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+// License for the specific language governing permissions and limitations
+// under the License.
+
+use std::time::Instant;
+
+use crate::BufferLike;
+use crate::token::JiebaPlaceholder;
+
+use super::api::WordMotion;
+use super::core::buffer::{ParsedBuffer, ParsedBufferLike, hash_line};
+use super::core::word_count::LineWordCounts;
+
+impl<C: JiebaPlaceholder> WordMotion<C> {
+    /// Count the `word`s, or `WORD`s if `word` is `false`, in lines
+    /// `first..=last` (1-indexed) of `buffer`, i.e. the non-space tokens that
+    /// |w| or |W| stops at, so that a run of 汉字 counts as the words jieba
+    /// cuts it into. `last` is clamped to the number of lines.
+    ///
+    /// The word count of each line is kept along with the hash of the line,
+    /// with prefix sums over the buffer. Only the lines not counted yet, or
+    /// changed since, are hashed, and of those only the lines whose hashes
+    /// have changed are tokenized, so that over lines left unchanged the
+    /// count is a prefix sum query in O(log n). The changes are learnt from
+    /// [`on_lines`](WordMotion::on_lines), which also lets the counts of the
+    /// lines below the inserted and deleted lines be kept, and from the
+    /// number of lines, whose change without notice has all lines checked
+    /// again. Since buffers without a buffer number (i.e. of number 0) get
+    /// no notice, all their lines are checked on every call.
+    pub fn word_count<B: BufferLike + ?Sized>(
+        &mut self,
+        buffer: &B,
+        first: usize,
+        last: usize,
+        word: bool,
+    ) -> Result<u64, B::Error> {
+        let start = Instant::now();
+        let tracing = self.tokenizer.tracing().clone();
+        let _span = tracing.span("word_count");
+        let n_lines = buffer.lines()?;
+        let first = first.max(1);
+        let last = last.min(n_lines);
+        if first > last {
+            self.record_call("word_count", b"", start);
+            return Ok(0);
+        }
+        let bufnr = buffer.bufnr()?;
+        let counts = self
+            .word_counts
+            .entry((bufnr, word))
+            .or_insert_with(|| LineWordCounts::new(n_lines));
+        counts.resize(n_lines);
+        // Lines are indexed from 0 in `counts`.
+        let range = first - 1..last;
+        let dirty = if bufnr == 0 {
+            range.clone().collect()
+        } else {
+            counts.dirty(range.clone())
+        };
+        let mut uncounted = vec![];
+        for i in dirty {
+            let hash = buffer.with_line(i + 1, hash_line)?;
+            if counts.is_counted(i, hash) {
+                counts.clean(i);
+            } else {
+                uncounted.push((i, hash));
+            }
+        }
+        if !uncounted.is_empty() {
+            let mut buffer = ParsedBuffer::new(
+                buffer,
+                &self.tokenizer,
+                &mut self.cache,
+                word,
+            );
+            for (i, hash) in uncounted {
+                let n = buffer.getline_parsed(i + 1)?.word_count();
+                counts.set(i, hash, n as u64);
+            }
+        }
+        let n = counts.sum(range);
+        self.record_call("word_count", b"", start);
+        Ok(n)
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use crate::BufferLike;
+    use crate::motion::WordMotion;
+    use crate::token::Tokenizer;
+    use crate::token::jieba::KeywordCutter;
+
+    #[test]
+    fn test_word_count() {
+        let mut wm = WordMotion::new(Tokenizer::new(
+            KeywordCutter::new(["你好".into(), "世界".into()]),
+            "@,48-57,_,192-255",
+        ));
+        let mut buffer: Vec<String> = vec![
+            "foo, bar".into(),
+            "".into(),
+            "  你好世界 x".into(),
+            "baz".into(),
+        ];
+
+        assert_eq!(wm.word_count(&buffer, 1, 4, true).unwrap(), 7);
+        assert_eq!(wm.word_count(&buffer, 1, 4, false).unwrap(), 6);
+        assert_eq!(wm.word_count(&buffer, 3, 3, true).unwrap(), 3);
+        // `last` is clamped.
+        assert_eq!(wm.word_count(&buffer, 2, 99, true).unwrap(), 4);
+        assert_eq!(wm.word_count(&buffer, 3, 2, true).unwrap(), 0);
+
+        // Line 2 is changed.
+        buffer[1] = "世界".into();
+        wm.on_lines(0, 1, 2, 2);
+        assert_eq!(wm.word_count(&buffer, 1, 4, true).unwrap(), 8);
+
+        // Line 1 is deleted.
+        buffer.remove(0);
+        wm.on_lines(0, 0, 1, 0);
+        assert_eq!(wm.word_count(&buffer, 1, 3, true).unwrap(), 5);
+
+        // A line is appended without notice.
+        buffer.push("qux 你好".into());
+        assert_eq!(wm.word_count(&buffer, 1, 4, true).unwrap(), 7);
+    }
+
+    /// A buffer of buffer number 1, which gets notices of its changes.
+    struct NumberedBuffer(Vec<String>);
+
+    impl BufferLike for NumberedBuffer {
+        type Error = ();
+
+        fn getline(&self, lnum: usize) -> Result<String, ()> {
+            self.0.getline(lnum)
+        }
+
+        fn lines(&self) -> Result<usize, ()> {
+            self.0.lines()
+        }
+
+        fn bufnr(&self) -> Result<usize, ()> {
+            Ok(1)
+        }
+    }
+
+    #[test]
+    fn test_word_count_checks_only_changed_lines() {
+        let mut wm = WordMotion::new(Tokenizer::new(
+            KeywordCutter::new([]),
+            "@,48-57,_,192-255",
+        ));
+        let mut buffer =
+            NumberedBuffer(vec!["foo bar".into(), "baz".into(), "x".into()]);
+        assert_eq!(wm.word_count(&buffer, 1, 3, true).unwrap(), 4);
+
+        // A change of the same number of lines without notice goes unseen,
+        // since the lines counted are not checked again.
+        buffer.0[0] = "p q r s".into();
+        assert_eq!(wm.word_count(&buffer, 1, 3, true).unwrap(), 4);
+        wm.on_lines(1, 0, 1, 1);
+        assert_eq!(wm.word_count(&buffer, 1, 3, true).unwrap(), 6);
+
+        // A change of the number of lines without notice is seen.
+        buffer.0[1] = "one two".into();
+        buffer.0.push("y".into());
+        assert_eq!(wm.word_count(&buffer, 1, 4, true).unwrap(), 8);
+
+        // Notices of other buffers are ignored.
+        buffer.0[3] = "y z".into();
+        wm.on_lines(2, 3, 4, 4);
+        assert_eq!(wm.word_count(&buffer, 1, 4, true).unwrap(), 8);
+        wm.on_lines(1, 3, 4, 4);
+        assert_eq!(wm.word_count(&buffer, 1, 4, true).unwrap(), 9);
+    }
+
+    #[test]
+    fn test_word_count_edited_without_notice() {
+        let mut wm = WordMotion::new(Tokenizer::new(
+            KeywordCutter::new(["你好".into()]),
+            "@,48-57,_,192-255",
+        ));
+        let mut buffer: Vec<String> = vec!["foo bar baz".into(), "x".into()];
+        assert_eq!(wm.word_count(&buffer, 1, 2, true).unwrap(), 4);
+        buffer[0] = "p q r s".into();
+        assert_eq!(wm.word_count(&buffer, 1, 2, true).unwrap(), 5);
+        buffer[1] = "你好你好".into();
+        assert_eq!(wm.word_count(&buffer, 1, 2, true).unwrap(), 6);
+    }
+
+    #[test]
+    fn test_word_count_buffers_of_same_bufnr() {
+        let mut wm = WordMotion::new(Tokenizer::new(
+            KeywordCutter::new([]),
+            "@,48-57,_,192-255",
+        ));
+        // Plain lists of lines all have buffer number 0.
+        let buffer1: Vec<String> = vec!["foo bar baz".into(), "x".into()];
+        let buffer2: Vec<String> = vec!["one".into(), "two".into()];
+        assert_eq!(wm.word_count(&buffer1, 1, 2, true).unwrap(), 4);
+        assert_eq!(wm.word_count(&buffer2, 1, 2, true).unwrap(), 2);
+        assert_eq!(wm.word_count(&buffer1, 1, 2, true).unwrap(), 4);
+    }
+}
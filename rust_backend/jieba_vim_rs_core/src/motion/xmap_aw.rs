@@ -16,14 +16,13 @@ use crate::BufferLike;
 use crate::token::JiebaPlaceholder;
 
 use super::api::{VisualMode, WordMotion, XmapOutput};
-use super::core::buffer::ParsedBuffer;
 use super::core::motion::Motion;
 use super::core::position::{Position, VisualRange};
 use super::primitives::text_object::CurrentWord;
 
 impl<C: JiebaPlaceholder> WordMotion<C> {
     pub fn xmap_aw<B: BufferLike + ?Sized>(
-        &self,
+        &mut self,
         buffer: &B,
         visualmode: VisualMode,
         visual_begin: Position,
@@ -31,7 +30,7 @@ impl<C: JiebaPlaceholder> WordMotion<C> {
         count: u64,
         word: bool,
     ) -> Result<XmapOutput, B::Error> {
-        let mut buffer = ParsedBuffer::new(buffer, &self.tokenizer, word);
+        let mut buffer = self.parsed_buffer(buffer, word);
         let mut motion = CurrentWord::new(true);
         let mut vrng = VisualRange {
             langle: visual_begin,
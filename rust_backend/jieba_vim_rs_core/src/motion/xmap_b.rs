@@ -16,7 +16,6 @@ use crate::BufferLike;
 use crate::token::JiebaPlaceholder;
 
 use super::api::{VisualMode, WordMotion, XmapOutput};
-use super::core::buffer::ParsedBuffer;
 use super::core::motion::Motion;
 use super::core::position::Position;
 use super::primitives::text_object::BackwardWord;
@@ -40,7 +39,7 @@ impl<C: JiebaPlaceholder> WordMotion<C> {
     /// - If there is no previous word to the left of current cursor, jump to
     ///   the first character of the first token in the buffer.
     pub fn xmap_b<B: BufferLike + ?Sized>(
-        &self,
+        &mut self,
         buffer: &B,
         visualmode: VisualMode,
         visual_begin: Position,
@@ -48,7 +47,7 @@ impl<C: JiebaPlaceholder> WordMotion<C> {
         count: u64,
         word: bool,
     ) -> Result<XmapOutput, B::Error> {
-        let mut buffer = ParsedBuffer::new(buffer, &self.tokenizer, word);
+        let mut buffer = self.parsed_buffer(buffer, word);
         let mut motion = BackwardWord::new(false);
         let s = motion.map(&mut buffer, count, &mut visual_end)?;
         let prevent_change = s.into_prevent_change();
@@ -16,7 +16,6 @@ use crate::BufferLike;
 use crate::token::JiebaPlaceholder;
 
 use super::api::{VisualMode, WordMotion, XmapOutput};
-use super::core::buffer::ParsedBuffer;
 use super::core::motion::Motion;
 use super::core::position::Position;
 use super::primitives::text_object::EndWord;
@@ -40,7 +39,7 @@ impl<C: JiebaPlaceholder> WordMotion<C> {
     ///   character to the right of the last character of the last token in the
     ///   buffer. And the motion should be taken as a failure.
     pub fn xmap_e<B: BufferLike + ?Sized>(
-        &self,
+        &mut self,
         buffer: &B,
         visualmode: VisualMode,
         visual_begin: Position,
@@ -48,7 +47,7 @@ impl<C: JiebaPlaceholder> WordMotion<C> {
         count: u64,
         word: bool,
     ) -> Result<XmapOutput, B::Error> {
-        let mut buffer = ParsedBuffer::new(buffer, &self.tokenizer, word);
+        let mut buffer = self.parsed_buffer(buffer, word);
         let mut motion = EndWord::new(false, false);
         let s = motion.map(&mut buffer, count, &mut visual_end)?;
         let prevent_change = s.into_prevent_change();
@@ -17,7 +17,7 @@
 use super::isk::WordPredicate;
 
 /// Character types.
-#[derive(Debug)]
+#[derive(Debug, PartialEq, Eq, Clone, Copy)]
 pub enum CharType {
     /// Whitespace characters.
     Space,
@@ -40,7 +40,7 @@ pub enum CharType {
 }
 
 /// Word character types.
-#[derive(Debug)]
+#[derive(Debug, PartialEq, Eq, Clone, Copy)]
 pub enum WordCharType {
     /// 汉字 characters. Note that 汉字 are words only when '@' is included in
     /// the `'iskeyword'` Vim option.
@@ -50,7 +50,7 @@ pub enum WordCharType {
 }
 
 /// Non-word character types.
-#[derive(Debug)]
+#[derive(Debug, PartialEq, Eq, Clone, Copy)]
 pub enum NonWordCharType {
     /// 汉字 characters, when '@' is not included in the `'iskeyword'` Vim
     /// option.
@@ -179,7 +179,17 @@ macro_rules! RIGHT_PUNC {
 // === END OF QUOTES FROM Thomas Roten ===
 
 /// Categorize a char into [`CharType`], according to [`WordPredicate`].
+/// Chars in the BMP are looked up in the [`CharClassTable`] of
+/// `word_predicate`.
 pub fn categorize_char(c: char, word_predicate: &WordPredicate) -> CharType {
+    match word_predicate.char_class_table().get(c) {
+        Some(ty) => ty,
+        None => categorize_char_slow(c, word_predicate),
+    }
+}
+
+/// Same as [`categorize_char`], but without the lookup table.
+fn categorize_char_slow(c: char, word_predicate: &WordPredicate) -> CharType {
     match c {
         SPACE!() => CharType::Space,
         COMBINING_DIACRITICAL_MARK!() => CharType::CombiningDiacriticalMark,
@@ -222,11 +232,91 @@ pub fn categorize_char(c: char, word_predicate: &WordPredicate) -> CharType {
     }
 }
 
+/// Number of code points covered by [`CharClassTable`], i.e. the BMP.
+const TABLE_LEN: usize = 0x10000;
+
+/// The [`CharType`]s of all chars in the BMP under a [`WordPredicate`],
+/// packed as two 4-bit codes per byte.
+pub struct CharClassTable(Box<[u8]>);
+
+impl CharClassTable {
+    pub fn new(word_predicate: &WordPredicate) -> Self {
+        let mut table = vec![0u8; TABLE_LEN / 2].into_boxed_slice();
+        // Surrogates are not chars, and are left as zeros.
+        for c in (0..TABLE_LEN as u32).filter_map(char::from_u32) {
+            let i = c as usize;
+            let code = encode(categorize_char_slow(c, word_predicate));
+            table[i / 2] |= code << (i % 2 * 4);
+        }
+        Self(table)
+    }
+
+    /// Look up the type of `c`. Return `None` if `c` is out of the BMP.
+    pub fn get(&self, c: char) -> Option<CharType> {
+        let i = c as usize;
+        let byte = *self.0.get(i / 2)?;
+        Some(decode(byte >> (i % 2 * 4) & 0xf))
+    }
+}
+
+fn encode(ty: CharType) -> u8 {
+    match ty {
+        CharType::Space => 0,
+        CharType::Word(WordCharType::Hanzi) => 1,
+        CharType::Word(WordCharType::Other) => 2,
+        CharType::NonWord(NonWordCharType::Hanzi) => 3,
+        CharType::NonWord(NonWordCharType::RightPunc) => 4,
+        CharType::NonWord(NonWordCharType::Other) => 5,
+        CharType::CombiningDiacriticalMark => 6,
+        CharType::Emoji => 7,
+    }
+}
+
+fn decode(code: u8) -> CharType {
+    match code {
+        0 => CharType::Space,
+        1 => CharType::Word(WordCharType::Hanzi),
+        2 => CharType::Word(WordCharType::Other),
+        3 => CharType::NonWord(NonWordCharType::Hanzi),
+        4 => CharType::NonWord(NonWordCharType::RightPunc),
+        5 => CharType::NonWord(NonWordCharType::Other),
+        6 => CharType::CombiningDiacriticalMark,
+        7 => CharType::Emoji,
+        _ => unreachable!("invalid char type code: {}", code),
+    }
+}
+
 #[cfg(test)]
 mod tests {
     use crate::token::isk::WordPredicate;
 
-    use super::{CharType, NonWordCharType, WordCharType, categorize_char};
+    use super::{
+        CharType, NonWordCharType, TABLE_LEN, WordCharType, categorize_char,
+        categorize_char_slow,
+    };
+
+    #[test]
+    fn test_char_class_table_same_as_slow() {
+        for isk in ["", "a-z", "@,^A-Z,48-57", "48-57,>", "@,48-57,_,192-255"] {
+            let wp = WordPredicate::from_isk_opt(isk.as_bytes()).unwrap();
+            for c in (0..TABLE_LEN as u32).filter_map(char::from_u32) {
+                assert_eq!(
+                    categorize_char(c, &wp),
+                    categorize_char_slow(c, &wp),
+                    "isk={:?} c={:?}",
+                    isk,
+                    c,
+                );
+            }
+            for c in ['\u{10000}', '\u{1f600}', '\u{20000}', char::MAX] {
+                assert!(wp.char_class_table().get(c).is_none());
+                assert_eq!(
+                    categorize_char(c, &wp),
+                    categorize_char_slow(c, &wp)
+                );
+            }
+        }
+    }
 
     #[test]
     fn test_categorize_char() {
@@ -14,15 +14,31 @@
 
 //! Figure out which letters are words, based on `'iskeyword'` Vim option.
 
+use std::fmt;
+use std::sync::OnceLock;
+
+use super::char::CharClassTable;
 use super::utils::Set256;
 
 /// Predicate for whether an ASCII or unicode is a word.
-#[derive(Debug)]
 pub struct WordPredicate {
     /// Set of ASCII characters.
     ascii_set: Set256,
     /// True if '@' is included.
     include_alphabetic: bool,
+    /// Char types under this predicate, built on first use. Since the
+    /// predicate is replaced as a whole whenever `'iskeyword'` changes, the
+    /// table never goes stale.
+    char_class_table: OnceLock<CharClassTable>,
+}
+
+impl fmt::Debug for WordPredicate {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        f.debug_struct("WordPredicate")
+            .field("ascii_set", &self.ascii_set)
+            .field("include_alphabetic", &self.include_alphabetic)
+            .finish_non_exhaustive()
+    }
 }
 
 trait Cursor<T> {
@@ -48,6 +64,7 @@ impl WordPredicate {
         Self {
             ascii_set: Set256::default(),
             include_alphabetic: false,
+            char_class_table: OnceLock::new(),
         }
     }
 
@@ -217,6 +234,12 @@ impl WordPredicate {
     pub fn is_unicode_alphabet_word(&self) -> bool {
         self.include_alphabetic
     }
+
+    /// The [`CharClassTable`] under this predicate.
+    pub(super) fn char_class_table(&self) -> &CharClassTable {
+        self.char_class_table
+            .get_or_init(|| CharClassTable::new(self))
+    }
 }
 
 impl TryFrom<&[u8]> for WordPredicate {
@@ -0,0 +1,279 @@
+// Copyright 2026 Kaiwen Wu. All Rights Reserved.
+//
+// Licensed under the Apache License, Version 2.0 (the "License"); you may not
+// use this file except in compliance with the License. You may obtain a copy
+// of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+// WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+// License for the specific language governing permissions and limitations
+// under the License.
+
+//! This module defines the memo of jieba cut results.
+
+use std::io::{self, Read, Write};
+use std::mem;
+use std::sync::Mutex;
+use std::sync::atomic::{AtomicU64, Ordering};
+use std::time::Duration;
+
+use crate::lru::LruCache;
+
+/// Leading bytes of a saved [`CutMemo`], including the format version.
+const SNAPSHOT_MAGIC: &[u8; 8] = b"JVCUTS\x00\x01";
+
+/// Default capacity of [`CutMemo`] in bytes.
+pub const DEFAULT_CUT_MEMO_CAPACITY: usize = 4 * 1024 * 1024;
+
+/// Counters of a [`CutMemo`].
+#[derive(Debug, PartialEq, Eq, Clone, Copy)]
+pub struct CutMemoStats {
+    /// Number of lookups answered by the memo.
+    pub hits: u64,
+    /// Number of lookups that fell through to jieba.
+    pub misses: u64,
+    /// Number of memoized 汉字 runs.
+    pub entries: usize,
+    /// Estimated number of bytes taken by the memo.
+    pub size: usize,
+    /// Time spent in jieba, whether through the memo or not.
+    pub cut_time: Duration,
+}
+
+/// A bounded memo from 汉字 runs to the char counts of their cut result. The
+/// least recently used runs are evicted when the memo grows beyond capacity.
+pub struct CutMemo {
+    cuts: Mutex<LruCache<String, Vec<usize>>>,
+    hits: AtomicU64,
+    misses: AtomicU64,
+    /// Nanoseconds spent in jieba, reset by
+    /// [`reset_cut_time`](CutMemo::reset_cut_time).
+    cut_nanos: AtomicU64,
+}
+
+impl Default for CutMemo {
+    fn default() -> Self {
+        Self::new(DEFAULT_CUT_MEMO_CAPACITY)
+    }
+}
+
+impl CutMemo {
+    /// Create a memo that takes at most around `capacity` bytes. Zero
+    /// `capacity` disables the memo.
+    pub fn new(capacity: usize) -> Self {
+        Self {
+            cuts: Mutex::new(LruCache::new(capacity)),
+            hits: AtomicU64::new(0),
+            misses: AtomicU64::new(0),
+            cut_nanos: AtomicU64::new(0),
+        }
+    }
+
+    pub fn set_capacity(&mut self, capacity: usize) {
+        self.cuts.get_mut().unwrap().set_capacity(capacity);
+    }
+
+    /// Return the memoized char counts of `run`, or compute them with `cut`
+    /// and memoize the result. The memo is not locked while calling `cut`.
+    #[cfg(test)]
+    pub fn get_or_cut<F>(&self, run: &str, cut: F) -> Vec<usize>
+    where
+        F: FnOnce() -> Vec<usize>,
+    {
+        let mut counts = vec![];
+        self.get_or_cut_into(run, cut, &mut counts);
+        counts
+    }
+
+    /// Same as [`get_or_cut`](CutMemo::get_or_cut), but write the char counts
+    /// into `counts`, which is cleared first, so that nothing is allocated if
+    /// `run` is memoized.
+    pub fn get_or_cut_into<F>(&self, run: &str, cut: F, counts: &mut Vec<usize>)
+    where
+        F: FnOnce() -> Vec<usize>,
+    {
+        counts.clear();
+        if let Some(memoized) = self.cuts.lock().unwrap().get(run) {
+            self.hits.fetch_add(1, Ordering::Relaxed);
+            counts.extend_from_slice(memoized);
+            return;
+        }
+        self.misses.fetch_add(1, Ordering::Relaxed);
+        let cut_counts = cut();
+        counts.extend_from_slice(&cut_counts);
+        let weight = weight(run, &cut_counts);
+        self.cuts
+            .lock()
+            .unwrap()
+            .insert(run.to_string(), cut_counts, weight);
+    }
+
+    /// Write the memoized cut results to `writer`, from the least recently
+    /// used to the most recently used. The format is [`SNAPSHOT_MAGIC`]
+    /// followed by, for each 汉字 run, its byte length, its bytes, the number
+    /// of words it is cut into and the char count of each word, where all
+    /// numbers are little-endian `u32`.
+    pub fn save<W: Write>(&self, writer: &mut W) -> io::Result<()> {
+        let cuts = self.cuts.lock().unwrap();
+        writer.write_all(SNAPSHOT_MAGIC)?;
+        for (run, counts) in cuts.iter() {
+            write_u32(writer, run.len())?;
+            writer.write_all(run.as_bytes())?;
+            write_u32(writer, counts.len())?;
+            for &count in counts {
+                write_u32(writer, count)?;
+            }
+        }
+        Ok(())
+    }
+
+    /// Memoize the cut results written by [`save`](CutMemo::save) into
+    /// `reader`. The memo is left unchanged if `reader` is not a valid
+    /// snapshot.
+    pub fn load<R: Read>(&mut self, reader: &mut R) -> io::Result<()> {
+        let mut buf = Vec::new();
+        reader.read_to_end(&mut buf)?;
+        let entries = parse_snapshot(&buf).ok_or_else(|| {
+            io::Error::new(io::ErrorKind::InvalidData, "invalid cut memo")
+        })?;
+        let cuts = self.cuts.get_mut().unwrap();
+        for (run, counts) in entries {
+            let weight = weight(&run, &counts);
+            cuts.insert(run, counts, weight);
+        }
+        Ok(())
+    }
+
+    pub fn stats(&self) -> CutMemoStats {
+        let cuts = self.cuts.lock().unwrap();
+        CutMemoStats {
+            hits: self.hits.load(Ordering::Relaxed),
+            misses: self.misses.load(Ordering::Relaxed),
+            entries: cuts.len(),
+            size: cuts.weight(),
+            cut_time: Duration::from_nanos(
+                self.cut_nanos.load(Ordering::Relaxed),
+            ),
+        }
+    }
+
+    /// Add `elapsed` to the time spent in jieba.
+    pub fn add_cut_time(&self, elapsed: Duration) {
+        self.cut_nanos
+            .fetch_add(elapsed.as_nanos() as u64, Ordering::Relaxed);
+    }
+
+    /// Reset the time spent in jieba. Unlike the hit/miss counters, which
+    /// tell whether the memo has changed since it was loaded, the time is
+    /// only ever reported.
+    pub fn reset_cut_time(&self) {
+        self.cut_nanos.store(0, Ordering::Relaxed);
+    }
+}
+
+/// The estimated number of bytes taken by a memoized cut result.
+fn weight(run: &str, counts: &[usize]) -> usize {
+    mem::size_of::<(String, Vec<usize>)>()
+        + run.len()
+        + mem::size_of_val(counts)
+}
+
+fn write_u32<W: Write>(writer: &mut W, n: usize) -> io::Result<()> {
+    let n = u32::try_from(n)
+        .map_err(|err| io::Error::new(io::ErrorKind::InvalidInput, err))?;
+    writer.write_all(&n.to_le_bytes())
+}
+
+/// Parse the cut results saved by [`CutMemo::save`]. Return `None` if `buf`
+/// is malformed, or if a cut result does not add up to its 汉字 run.
+fn parse_snapshot(buf: &[u8]) -> Option<Vec<(String, Vec<usize>)>> {
+    fn read_u32(buf: &mut &[u8]) -> Option<usize> {
+        let (n, rest) = buf.split_first_chunk::<4>()?;
+        *buf = rest;
+        Some(u32::from_le_bytes(*n) as usize)
+    }
+
+    let mut buf = buf.strip_prefix(SNAPSHOT_MAGIC)?;
+    let mut entries = vec![];
+    while !buf.is_empty() {
+        let len = read_u32(&mut buf)?;
+        let (run, rest) = buf.split_at_checked(len)?;
+        buf = rest;
+        let run = std::str::from_utf8(run).ok()?;
+        let n = read_u32(&mut buf)?;
+        let counts = (0..n)
+            .map(|_| read_u32(&mut buf))
+            .collect::<Option<Vec<_>>>()?;
+        if counts.iter().sum::<usize>() != run.chars().count() {
+            return None;
+        }
+        entries.push((run.to_string(), counts));
+    }
+    Some(entries)
+}
+
+#[cfg(test)]
+mod tests {
+    use super::CutMemo;
+
+    #[test]
+    fn test_cut_memo() {
+        let memo = CutMemo::default();
+        assert_eq!(memo.get_or_cut("你好世界", || vec![2, 2]), vec![2, 2]);
+        assert_eq!(memo.get_or_cut("你好世界", || unreachable!()), vec![2, 2]);
+        assert_eq!(memo.get_or_cut("再见", || vec![2]), vec![2]);
+        let stats = memo.stats();
+        assert_eq!(stats.hits, 1);
+        assert_eq!(stats.misses, 2);
+        assert_eq!(stats.entries, 2);
+        assert!(stats.size > 0);
+    }
+
+    #[test]
+    fn test_cut_memo_disabled() {
+        let memo = CutMemo::new(0);
+        assert_eq!(memo.get_or_cut("你好", || vec![2]), vec![2]);
+        assert_eq!(memo.get_or_cut("你好", || vec![1, 1]), vec![1, 1]);
+        let stats = memo.stats();
+        assert_eq!(stats.hits, 0);
+        assert_eq!(stats.misses, 2);
+        assert_eq!(stats.entries, 0);
+    }
+
+    #[test]
+    fn test_cut_memo_save_load() {
+        let memo = CutMemo::default();
+        memo.get_or_cut("你好世界", || vec![2, 2]);
+        memo.get_or_cut("再见", || vec![2]);
+        let mut snapshot = vec![];
+        memo.save(&mut snapshot).unwrap();
+
+        let mut memo = CutMemo::default();
+        memo.load(&mut snapshot.as_slice()).unwrap();
+        assert_eq!(memo.get_or_cut("你好世界", || unreachable!()), vec![2, 2]);
+        assert_eq!(memo.get_or_cut("再见", || unreachable!()), vec![2]);
+        assert_eq!(memo.stats().entries, 2);
+    }
+
+    #[test]
+    fn test_cut_memo_load_invalid() {
+        let memo = CutMemo::default();
+        memo.get_or_cut("你好", || vec![2]);
+        let mut snapshot = vec![];
+        memo.save(&mut snapshot).unwrap();
+
+        let mut memo = CutMemo::default();
+        // Truncated.
+        let truncated = &snapshot[..snapshot.len() - 1];
+        assert!(memo.load(&mut &truncated[..]).is_err());
+        // Not adding up to the run.
+        let n = snapshot.len();
+        snapshot[n - 4..].copy_from_slice(&3u32.to_le_bytes());
+        assert!(memo.load(&mut snapshot.as_slice()).is_err());
+        assert!(memo.load(&mut &b"garbage"[..]).is_err());
+        assert_eq!(memo.stats().entries, 0);
+    }
+}
@@ -15,9 +15,14 @@
 mod char;
 mod isk;
 pub(crate) mod jieba;
+mod memo;
+mod packed;
 mod tokenize;
 mod utils;
+mod window;
 
 pub use jieba::JiebaPlaceholder;
+pub use memo::CutMemoStats;
+pub use packed::{LineTokens, PackedTokens};
 pub use tokenize::{Token, TokenLike, TokenType, Tokenizer};
 use utils::ascii_or;
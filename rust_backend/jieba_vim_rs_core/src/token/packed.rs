@@ -0,0 +1,273 @@
+// Copyright 2026 Kaiwen Wu. All Rights Reserved.
+//
+// Licensed under the Apache License, Version 2.0 (the "License"); you may not
+// use this file except in compliance with the License. You may obtain a copy
+// of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+// WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+// License for the specific language governing permissions and limitations
+// under the License.
+
+//! This module defines the compact storage of tokenized lines.
+
+use std::fmt::{self, Debug};
+use std::mem;
+
+use super::tokenize::{Token, TokenLike, TokenType};
+
+/// Bits of [`PackedTokens::meta`] taken by a char width.
+const WIDTH_BITS: u32 = 3;
+const WIDTH_MASK: u8 = (1 << WIDTH_BITS) - 1;
+/// The bit of [`PackedTokens::meta`] set for [`TokenType::Space`].
+const SPACE_BIT: u8 = 1 << (2 * WIDTH_BITS);
+
+/// A tokenized line stored as a struct of arrays. Since the tokens of a line
+/// are contiguous, the start of a token is the end of the token before it,
+/// so only the end of each token is stored, as a `u32`, along with one byte
+/// packing the byte lengths of its first and last chars and its type. Each
+/// token thus takes 5 bytes instead of `size_of::<Token>()`. The number of
+/// word tokens is stored as well, so that word motions with large counts can
+/// skip the line without going through its tokens.
+#[derive(PartialEq, Eq, Clone)]
+pub struct PackedTokens {
+    /// The [`first_char`](TokenLike::first_char) of the first token.
+    start: u32,
+    /// The [`last_char1`](TokenLike::last_char1) of each token.
+    ends: Vec<u32>,
+    /// The byte length of the first char (lowest [`WIDTH_BITS`] bits) and
+    /// that of the last char (next [`WIDTH_BITS`] bits) of each token, and
+    /// [`SPACE_BIT`] if the token is a space token.
+    meta: Vec<u8>,
+    /// The number of [`TokenType::Word`] tokens.
+    n_words: u32,
+}
+
+impl PackedTokens {
+    /// Pack `tokens`. Return `None` if the tokens are not contiguous, or if
+    /// the line is too long to be indexed by `u32`.
+    pub fn pack(tokens: &[Token]) -> Option<Self> {
+        let start = match tokens.first() {
+            Some(t) => u32::try_from(t.first_char()).ok()?,
+            None => 0,
+        };
+        let mut ends = Vec::with_capacity(tokens.len());
+        let mut meta = Vec::with_capacity(tokens.len());
+        let mut prev_end = start as usize;
+        let mut n_words = 0;
+        for t in tokens {
+            if t.first_char() != prev_end {
+                return None;
+            }
+            let first_width = u8::try_from(t.first_char1() - t.first_char())
+                .ok()
+                .filter(|&w| w <= WIDTH_MASK)?;
+            let last_width = u8::try_from(t.last_char1() - t.last_char())
+                .ok()
+                .filter(|&w| w <= WIDTH_MASK)?;
+            let space = match t.ty {
+                TokenType::Space => SPACE_BIT,
+                TokenType::Word => {
+                    n_words += 1;
+                    0
+                }
+            };
+            ends.push(u32::try_from(t.last_char1()).ok()?);
+            meta.push(first_width | last_width << WIDTH_BITS | space);
+            prev_end = t.last_char1();
+        }
+        Some(Self {
+            start,
+            ends,
+            meta,
+            n_words,
+        })
+    }
+
+    pub fn len(&self) -> usize {
+        self.ends.len()
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.ends.is_empty()
+    }
+
+    /// The number of [`TokenType::Word`] tokens.
+    pub fn word_count(&self) -> usize {
+        self.n_words as usize
+    }
+
+    /// Unpack the `i`-th token.
+    pub fn get(&self, i: usize) -> Token {
+        let first_char = match i {
+            0 => self.start,
+            _ => self.ends[i - 1],
+        } as usize;
+        let last_char1 = self.ends[i] as usize;
+        let meta = self.meta[i];
+        let first_width = (meta & WIDTH_MASK) as usize;
+        let last_width = (meta >> WIDTH_BITS & WIDTH_MASK) as usize;
+        let ty = if meta & SPACE_BIT != 0 {
+            TokenType::Space
+        } else {
+            TokenType::Word
+        };
+        Token::new(
+            first_char,
+            first_char + first_width,
+            last_char1 - last_width,
+            last_char1,
+            ty,
+        )
+    }
+
+    /// Estimated number of bytes taken on the heap.
+    pub fn heap_size(&self) -> usize {
+        self.ends.capacity() * mem::size_of::<u32>()
+            + self.meta.capacity() * mem::size_of::<u8>()
+    }
+}
+
+impl Debug for PackedTokens {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        Debug::fmt(&LineTokens::Packed(self), f)
+    }
+}
+
+/// The tokens of a line, either packed or not, that can be indexed without
+/// unpacking the whole line.
+#[derive(Clone, Copy)]
+pub enum LineTokens<'a> {
+    Packed(&'a PackedTokens),
+    Plain(&'a [Token]),
+}
+
+impl<'a> LineTokens<'a> {
+    pub fn len(&self) -> usize {
+        match self {
+            Self::Packed(tokens) => tokens.len(),
+            Self::Plain(tokens) => tokens.len(),
+        }
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.len() == 0
+    }
+
+    /// Get the `i`-th token. Panics if `i` is out of bounds.
+    pub fn get(&self, i: usize) -> Token {
+        match self {
+            Self::Packed(tokens) => tokens.get(i),
+            Self::Plain(tokens) => tokens[i],
+        }
+    }
+
+    /// The number of [`TokenType::Word`] tokens, without unpacking packed
+    /// tokens.
+    pub fn word_count(&self) -> usize {
+        match self {
+            Self::Packed(tokens) => tokens.word_count(),
+            Self::Plain(tokens) => {
+                tokens.iter().filter(|t| t.ty == TokenType::Word).count()
+            }
+        }
+    }
+
+    pub fn last(&self) -> Option<Token> {
+        self.len().checked_sub(1).map(|i| self.get(i))
+    }
+
+    pub fn iter(&self) -> impl DoubleEndedIterator<Item = Token> + 'a {
+        let tokens = *self;
+        (0..tokens.len()).map(move |i| tokens.get(i))
+    }
+
+    /// Same as [`slice::binary_search_by`].
+    pub fn binary_search_by<F>(&self, mut f: F) -> Result<usize, usize>
+    where
+        F: FnMut(&Token) -> std::cmp::Ordering,
+    {
+        use std::cmp::Ordering::*;
+
+        let mut lo = 0;
+        let mut hi = self.len();
+        while lo < hi {
+            let mid = lo + (hi - lo) / 2;
+            match f(&self.get(mid)) {
+                Less => lo = mid + 1,
+                Greater => hi = mid,
+                Equal => return Ok(mid),
+            }
+        }
+        Err(lo)
+    }
+
+    pub fn to_vec(&self) -> Vec<Token> {
+        self.iter().collect()
+    }
+}
+
+impl Debug for LineTokens<'_> {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        f.debug_list().entries(self.iter()).finish()
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::{LineTokens, PackedTokens};
+    use crate::token::jieba::KeywordCutter;
+    use crate::token::{Token, TokenLike, TokenType, Tokenizer};
+
+    #[test]
+    fn test_pack_round_trip() {
+        let tokenizer =
+            Tokenizer::new(KeywordCutter::new([]), "@,48-57,_,192-255");
+        for line in [
+            "",
+            " ",
+            "foo, bar",
+            "  (baz)  abc  ",
+            "你好世界，foo 中文",
+            "\t\u{301}x\u{301}\u{20ac} \u{1f600}",
+        ] {
+            for into_word in [true, false] {
+                let tokens = tokenizer.parse_str1(line, into_word);
+                let packed = PackedTokens::pack(&tokens).unwrap();
+                assert_eq!(packed.len(), tokens.len());
+                assert_eq!(
+                    packed.word_count(),
+                    LineTokens::Plain(&tokens).word_count()
+                );
+                assert_eq!(LineTokens::Packed(&packed).to_vec(), tokens);
+            }
+        }
+    }
+
+    #[test]
+    fn test_pack_not_contiguous() {
+        let tokens = [
+            Token::new(1, 2, 1, 2, TokenType::Word),
+            Token::new(3, 4, 3, 4, TokenType::Word),
+        ];
+        assert_eq!(PackedTokens::pack(&tokens), None);
+    }
+
+    #[test]
+    fn test_binary_search_by() {
+        let tokens: Vec<_> = (1..10)
+            .map(|i| Token::new(i, i + 1, i, i + 1, TokenType::Word))
+            .collect();
+        let packed = PackedTokens::pack(&tokens).unwrap();
+        for col in 0..12 {
+            let cmp = |t: &Token| t.first_char().cmp(&col);
+            assert_eq!(
+                LineTokens::Packed(&packed).binary_search_by(cmp),
+                tokens.binary_search_by(cmp),
+            );
+        }
+    }
+}
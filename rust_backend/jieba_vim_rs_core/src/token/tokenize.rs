@@ -15,15 +15,29 @@
 //! This module defines the tokens, and the tokenizer.
 
 use std::fmt::{self, Debug};
+use std::io::{self, Read, Write};
+use std::sync::{Arc, Mutex};
+use std::time::Instant;
+
+use crate::trace::{Tracer, Tracing};
 
 use super::JiebaPlaceholder;
 use super::char::{self, CharType, NonWordCharType, WordCharType};
 use super::isk::WordPredicate;
+use super::memo::{CutMemo, CutMemoStats};
 
 /// The tokenizer.
 pub struct Tokenizer<C> {
     word_predicate: WordPredicate,
     jieba: C,
+    /// Cut results of 汉字 runs, shared by all lines tokenized.
+    cut_memo: CutMemo,
+    /// Buffers reused across the lines tokenized, one for each thread that
+    /// has been tokenizing at the same time.
+    scratch: Mutex<Vec<ParseScratch>>,
+    /// Tracer of the phases of tokenization and of the motions using the
+    /// tokenizer.
+    tracing: Tracing,
 }
 
 impl<C> Tokenizer<C> {
@@ -35,6 +49,9 @@ impl<C> Tokenizer<C> {
         Ok(Self {
             word_predicate: word_predicate.try_into()?,
             jieba,
+            cut_memo: CutMemo::default(),
+            scratch: Mutex::default(),
+            tracing: Tracing::default(),
         })
     }
 
@@ -51,6 +68,9 @@ impl<C> Tokenizer<C> {
         Self {
             word_predicate: word_predicate.try_into().unwrap(),
             jieba,
+            cut_memo: CutMemo::default(),
+            scratch: Mutex::default(),
+            tracing: Tracing::default(),
         }
     }
 
@@ -65,11 +85,56 @@ impl<C> Tokenizer<C> {
     pub fn get_word_predicate_mut(&mut self) -> &mut WordPredicate {
         &mut self.word_predicate
     }
+
+    /// Set the maximum number of bytes taken by the memo of jieba cut
+    /// results. Zero `capacity` disables the memo.
+    pub fn set_cut_memo_capacity(&mut self, capacity: usize) {
+        self.cut_memo.set_capacity(capacity);
+    }
+
+    /// Get the hit/miss counters and the size of the memo of jieba cut
+    /// results.
+    pub fn cut_memo_stats(&self) -> CutMemoStats {
+        self.cut_memo.stats()
+    }
+
+    /// Set the tracer of the phases of tokenization, or disable tracing if
+    /// `tracer` is `None`.
+    pub fn set_tracer(&mut self, tracer: Option<Arc<dyn Tracer>>) {
+        self.tracing = Tracing::new(tracer);
+    }
+
+    pub fn tracing(&self) -> &Tracing {
+        &self.tracing
+    }
+
+    /// Reset the time spent in jieba reported by
+    /// [`cut_memo_stats`](Tokenizer::cut_memo_stats).
+    pub fn reset_cut_time(&self) {
+        self.cut_memo.reset_cut_time();
+    }
+
+    /// Save the memo of jieba cut results to `writer`.
+    pub fn save_cut_memo<W: Write>(&self, writer: &mut W) -> io::Result<()> {
+        self.cut_memo.save(writer)
+    }
+
+    /// Load the jieba cut results saved by
+    /// [`save_cut_memo`](Tokenizer::save_cut_memo) into the memo. The cut
+    /// results must have been made by the same jieba dictionary.
+    pub fn load_cut_memo<R: Read>(&mut self, reader: &mut R) -> io::Result<()> {
+        self.cut_memo.load(reader)
+    }
 }
 
+/// Every call into jieba goes through here, so that it is traced and timed.
 impl<C: JiebaPlaceholder> JiebaPlaceholder for Tokenizer<C> {
     fn cut_hmm_into_char_counts(&self, sentence: &str) -> Vec<usize> {
-        self.jieba.cut_hmm_into_char_counts(sentence)
+        let _span = self.tracing.span("jieba_cut");
+        let start = Instant::now();
+        let counts = self.jieba.cut_hmm_into_char_counts(sentence);
+        self.cut_memo.add_cut_time(start.elapsed());
+        counts
     }
 }
 
@@ -148,6 +213,10 @@ struct CharToken {
 impl_token_like_from_col!(CharToken);
 
 impl<C> Tokenizer<C> {
+    pub(super) fn categorize_char(&self, ch: char) -> CharType {
+        char::categorize_char(ch, &self.word_predicate)
+    }
+
     fn new_char_token(&self, ch: char, start_byte_index: usize) -> CharToken {
         CharToken {
             col: Col {
@@ -156,23 +225,22 @@ impl<C> Tokenizer<C> {
                 incl_end_byte_index: start_byte_index,
                 excl_end_byte_index: start_byte_index + ch.len_utf8(),
             },
-            ty: char::categorize_char(ch, &self.word_predicate),
+            ty: self.categorize_char(ch),
         }
     }
 
-    /// The string `line` should not contain the end-of-line character. Return
-    /// a vec of [`CharToken`]s. An empty returned vec signifies that the
+    /// The string `line` should not contain the end-of-line character. Push
+    /// the [`CharToken`]s of `line` to `chars`. Nothing is pushed if the
     /// `line` is empty. Normally `byte_offset` should be zero.
     fn parse_str_into_chars(
         &self,
         line: &str,
         byte_offset: usize,
-    ) -> Vec<CharToken> {
-        line.char_indices()
-            .map(|(start_byte_index, ch)| {
-                self.new_char_token(ch, start_byte_index + byte_offset)
-            })
-            .collect()
+        chars: &mut Vec<CharToken>,
+    ) {
+        chars.extend(line.char_indices().map(|(start_byte_index, ch)| {
+            self.new_char_token(ch, start_byte_index + byte_offset)
+        }));
     }
 }
 
@@ -303,10 +371,13 @@ enum CharTokenGroupPushError {
 }
 
 impl CharTokenGroupPushError {
-    fn into_vec(self) -> Vec<MaybeImplicitCharTokenGroup> {
+    fn push_into(self, stack: &mut Vec<MaybeImplicitCharTokenGroup>) {
         match self {
-            Self::Singleton(cg) => vec![cg.into()],
-            Self::WithImplicitSpace(iw, cg) => vec![iw.into(), cg.into()],
+            Self::Singleton(cg) => stack.push(cg.into()),
+            Self::WithImplicitSpace(iw, cg) => {
+                stack.push(iw.into());
+                stack.push(cg.into());
+            }
         }
     }
 }
@@ -477,7 +548,9 @@ impl<C> Tokenizer<C> {
         s: &str,
         byte_offset: usize,
     ) -> Option<CharTokenGroup> {
-        let mut it = self.parse_str_into_chars(s, byte_offset).into_iter();
+        let mut chars = vec![];
+        self.parse_str_into_chars(s, byte_offset, &mut chars);
+        let mut it = chars.into_iter();
         it.next().map(|ch| {
             let mut cg = CharTokenGroup::from(ch);
             for ch in it {
@@ -488,16 +561,24 @@ impl<C> Tokenizer<C> {
     }
 }
 
-fn stack_merge<T, U, F>(elements: Vec<T>, mut rule_func: F) -> Vec<U>
+/// Merge `elements` one by one onto the end of `stack`. Each element is
+/// passed to `rule_func` along with the item popped from the top of `stack`,
+/// if any, and `rule_func` pushes the merge result back to `stack`. Items
+/// already in `stack` before the call are never popped.
+fn stack_merge<T, U, I, F>(elements: I, stack: &mut Vec<U>, mut rule_func: F)
 where
-    F: FnMut(Option<U>, T) -> Vec<U>,
+    I: IntoIterator<Item = T>,
+    F: FnMut(Option<U>, T, &mut Vec<U>),
 {
-    let mut stack: Vec<U> = vec![];
+    let base = stack.len();
     for e in elements {
-        let mut merged = rule_func(stack.pop(), e);
-        stack.append(&mut merged);
+        let top = if stack.len() > base {
+            stack.pop()
+        } else {
+            None
+        };
+        rule_func(top, e, stack);
     }
-    stack
 }
 
 fn chain_into_vec<T, I, J>(i: I, j: J) -> Vec<T>
@@ -510,19 +591,23 @@ where
 
 /// Group contiguous [`CharToken`]s of compatible major class into
 /// [`CharTokenGroup`]s, and insert implicit whitespaces in between as needed.
-/// It's guaranteed that the last item of the returned Vec is a
+/// It's guaranteed that the last item pushed to `stack` is a
 /// [`CharTokenGroup`].
 fn group_chars_rule(
     group: Option<MaybeImplicitCharTokenGroup>,
     c: CharToken,
-) -> Vec<MaybeImplicitCharTokenGroup> {
+    stack: &mut Vec<MaybeImplicitCharTokenGroup>,
+) {
     match group {
-        None => vec![CharTokenGroup::from(c).into()],
+        None => stack.push(CharTokenGroup::from(c).into()),
         Some(mut group) => match &mut group {
             MaybeImplicitCharTokenGroup::CharTokenGroup(cg) => {
                 match cg.push(c) {
-                    Err(joined) => chain_into_vec([group], joined.into_vec()),
-                    Ok(()) => vec![group],
+                    Err(joined) => {
+                        stack.push(group);
+                        joined.push_into(stack);
+                    }
+                    Ok(()) => stack.push(group),
                 }
             }
             // This is unreachable because in all cases, the top element of the
@@ -532,84 +617,57 @@ fn group_chars_rule(
     }
 }
 
-/// See [`group_chars_rule`] for details. It's guaranteed that the returned Vec
-/// never starts or ends with an [`ImplicitWhitespace`].
-fn group_chars(chars: Vec<CharToken>) -> Vec<MaybeImplicitCharTokenGroup> {
-    stack_merge(chars, group_chars_rule)
+/// See [`group_chars_rule`] for details. It's guaranteed that the groups
+/// pushed to `groups` never start or end with an [`ImplicitWhitespace`].
+fn group_chars<I: IntoIterator<Item = CharToken>>(
+    chars: I,
+    groups: &mut Vec<MaybeImplicitCharTokenGroup>,
+) {
+    stack_merge(chars, groups, group_chars_rule)
 }
 
 /// If the first [`CharTokenGroup`] is of type
 /// [`CharGroupType::CombiningDiacriticalMark`], convert it to
-/// [`WordCharGroupType::Other`]. Panics if it's an implicit whitespace
-/// instead.
-fn convert_first_cdm_group_rule(
-    prev_group: Option<MaybeImplicitCharTokenGroup>,
-    mut group: MaybeImplicitCharTokenGroup,
-) -> Vec<MaybeImplicitCharTokenGroup> {
-    match prev_group {
-        None => {
-            // If it panics, it should happen here.
-            let cg = group.to_char_token_group_mut().unwrap();
-            if let CharGroupType::CombiningDiacriticalMark = cg.ty {
-                cg.ty = CharGroupType::Word(WordCharGroupType::Other);
-            }
-            vec![group]
+/// [`WordCharGroupType::Other`]. Panics if the first token group is an
+/// implicit whitespace. If this is run after [`group_chars`], the first token
+/// group should never be an implicit whitespace, and thus, panic should not
+/// happen.
+fn convert_first_cdm_group(groups: &mut [MaybeImplicitCharTokenGroup]) {
+    if let Some(group) = groups.first_mut() {
+        // If it panics, it should happen here.
+        let cg = group.to_char_token_group_mut().unwrap();
+        if let CharGroupType::CombiningDiacriticalMark = cg.ty {
+            cg.ty = CharGroupType::Word(WordCharGroupType::Other);
         }
-        Some(prev_group) => vec![prev_group, group],
     }
 }
 
-/// See [`convert_first_cdm_group_rule`] for details. Panics if the first token
-/// group is an implicit whitespace. If this is run after [`group_chars`], the
-/// first token group should never be an implicit whitespace, and thus, panic
-/// should not happen.
-fn convert_first_cdm_group(
-    groups: Vec<MaybeImplicitCharTokenGroup>,
-) -> Vec<MaybeImplicitCharTokenGroup> {
-    stack_merge(groups, convert_first_cdm_group_rule)
-}
-
-/// If the first [`CharTokenGroup`] is of type
-/// [`CharGroupType::CombiningDiacriticalMark`], convert it to
-/// [`WordCharGroupType::Other`]. Contrary to [`convert_first_cdm_group_rule`],
-/// this one never panics.
-fn convert_first_cdm_group_rule2(
-    prev_group: Option<CharTokenGroup>,
-    mut group: CharTokenGroup,
-) -> Vec<CharTokenGroup> {
-    match prev_group {
-        None => {
-            if let CharGroupType::CombiningDiacriticalMark = group.ty {
-                group.ty = CharGroupType::Word(WordCharGroupType::Other);
-            }
-            vec![group]
+/// Same as [`convert_first_cdm_group`], but for [`CharTokenGroup`]s. Contrary
+/// to [`convert_first_cdm_group`], this one never panics.
+fn convert_first_cdm_group2(groups: &mut [CharTokenGroup]) {
+    if let Some(group) = groups.first_mut() {
+        if let CharGroupType::CombiningDiacriticalMark = group.ty {
+            group.ty = CharGroupType::Word(WordCharGroupType::Other);
         }
-        Some(prev_group) => vec![prev_group, group],
     }
 }
 
-/// See [`convert_first_cdm_group_rule2`] for details.
-fn convert_first_cdm_group2(
-    groups: Vec<CharTokenGroup>,
-) -> Vec<CharTokenGroup> {
-    stack_merge(groups, convert_first_cdm_group_rule2)
-}
-
 impl<C> Tokenizer<C> {
-    /// Split `self` into subgroups, whose types will be recategorized. Panics
-    /// if `self.chars.len() != sizes.sum()`.
+    /// Split `self` into subgroups, whose types will be recategorized, and
+    /// push them to `sub_groups`. Panics if `self.chars.len() != sizes.sum()`.
     fn split_into_subgroups(
         &self,
         line: &str,
         char_group: CharTokenGroup,
-        sizes: Vec<usize>,
-    ) -> Vec<CharTokenGroup> {
+        sizes: &[usize],
+        sub_groups: &mut Vec<CharTokenGroup>,
+    ) {
         let token = get_token(line, &char_group);
         assert_eq!(token.chars().count(), sizes.iter().sum::<usize>());
-        let mut sub_groups = Vec::with_capacity(sizes.len());
+        sub_groups.reserve(sizes.len());
         let mut chars = token.chars();
         let mut start = char_group.col.start_byte_index;
-        for sz in sizes {
+        for &sz in sizes {
             let mut sub_chars = (0..sz).map(|_| {
                 // Calling `unwrap()` won't panic, because it has been ensured
                 // that `self.chars.len() == sizes.sum()`.
@@ -629,7 +687,6 @@ impl<C> Tokenizer<C> {
                 sub_groups.push(sub_group);
             }
         }
-        sub_groups
     }
 }
 
@@ -640,9 +697,10 @@ impl<C> Tokenizer<C> {
 fn insert_implicit_whitespace_in_cut_result_rule(
     prev_group: Option<MaybeImplicitCharTokenGroup>,
     group: CharTokenGroup,
-) -> Vec<MaybeImplicitCharTokenGroup> {
+    stack: &mut Vec<MaybeImplicitCharTokenGroup>,
+) {
     match prev_group {
-        None => vec![group.into()],
+        None => stack.push(group.into()),
         Some(mut prev_group) => {
             use CharGroupType::*;
             use WordCharGroupType as W;
@@ -654,11 +712,13 @@ fn insert_implicit_whitespace_in_cut_result_rule(
                 (Word(W::Other), Word(W::Other)) => {
                     // Concatenate `group` after `prev_group`.
                     prev_group_inner.append(group);
-                    vec![prev_group]
+                    stack.push(prev_group);
                 }
                 (Word(_), Word(_)) => {
                     let ispace = ImplicitWhitespace;
-                    vec![prev_group, ispace.into(), group.into()]
+                    stack.push(prev_group);
+                    stack.push(ispace.into());
+                    stack.push(group.into());
                 }
                 _ => panic!("prev_group or group is not word"),
             }
@@ -667,10 +727,13 @@ fn insert_implicit_whitespace_in_cut_result_rule(
 }
 
 /// See [`insert_implicit_whitespace_in_cut_result_rule`] for details.
-fn insert_implicit_whitespace_in_cut_result(
-    groups: Vec<CharTokenGroup>,
-) -> Vec<MaybeImplicitCharTokenGroup> {
-    stack_merge(groups, insert_implicit_whitespace_in_cut_result_rule)
+fn insert_implicit_whitespace_in_cut_result<I>(
+    groups: I,
+    stack: &mut Vec<MaybeImplicitCharTokenGroup>,
+) where
+    I: IntoIterator<Item = CharTokenGroup>,
+{
+    stack_merge(groups, stack, insert_implicit_whitespace_in_cut_result_rule)
 }
 
 /// Assuming `group.ty` is [`WordCharGroupType::Hanzi`], this function goes
@@ -681,26 +744,28 @@ fn insert_implicit_whitespace_in_cut_result(
 /// 3. Revert removal of the combining marks and append combining marks to each
 ///    cut group.
 /// 4. Count the number of chars in each cut group and return.
+///
+/// `marks` and `group_string_no_marks` are scratch buffers.
 fn cut_hanzi_group_and_count_chars<C: JiebaPlaceholder>(
     line: &str,
     group: &CharTokenGroup,
     jieba: &C,
+    marks: &mut Vec<bool>,
+    group_string_no_marks: &mut String,
 ) -> Vec<usize> {
-    let mut marks = Vec::new();
-    let group_string_no_marks: String = get_token(line, group)
-        .chars()
-        .filter(|c| {
-            let is_mark = char::is_combining_diacritical_mark(*c);
-            marks.push(is_mark);
-            !is_mark
-        })
-        .collect();
+    marks.clear();
+    group_string_no_marks.clear();
+    group_string_no_marks.extend(get_token(line, group).chars().filter(|c| {
+        let is_mark = char::is_combining_diacritical_mark(*c);
+        marks.push(is_mark);
+        !is_mark
+    }));
     let cut_char_counts0 = chain_into_vec(
         [0],
-        jieba.cut_hmm_into_char_counts(&group_string_no_marks),
+        jieba.cut_hmm_into_char_counts(group_string_no_marks),
     );
 
-    append_mark_to_cuts(&marks, &cut_char_counts0)
+    append_mark_to_cuts(marks, &cut_char_counts0)
 }
 
 /// The step 3 in [`cut_hanzi_group_and_count_chars`].
@@ -777,50 +842,80 @@ fn append_mark_to_cuts(
 fn cut_hanzi_rule<C: JiebaPlaceholder>(
     prev_group: Option<MaybeImplicitCharTokenGroup>,
     group: MaybeImplicitCharTokenGroup,
+    stack: &mut Vec<MaybeImplicitCharTokenGroup>,
     line: &str,
     tokenizer: &Tokenizer<C>,
-) -> Vec<MaybeImplicitCharTokenGroup> {
+    scratch: &mut CutScratch,
+) {
     use CharGroupType::*;
     use MaybeImplicitCharTokenGroup::*;
     use WordCharGroupType as W;
     match group {
         // If `group` is an implicit whitespace, return as is.
-        ImplicitWhitespace(iw) => chain_into_vec(prev_group, [iw.into()]),
+        ImplicitWhitespace(iw) => {
+            stack.extend(prev_group);
+            stack.push(iw.into());
+        }
         CharTokenGroup(group) => match group.ty {
             Word(W::Hanzi) => {
-                let n_chars =
-                    cut_hanzi_group_and_count_chars(line, &group, tokenizer);
-                let sub_groups =
-                    tokenizer.split_into_subgroups(line, group, n_chars);
+                let CutScratch {
+                    n_chars,
+                    sub_groups,
+                    marks,
+                    group_string_no_marks,
+                } = scratch;
+                tokenizer.cut_memo.get_or_cut_into(
+                    get_token(line, &group),
+                    || {
+                        cut_hanzi_group_and_count_chars(
+                            line,
+                            &group,
+                            tokenizer,
+                            marks,
+                            group_string_no_marks,
+                        )
+                    },
+                    n_chars,
+                );
+                sub_groups.clear();
+                tokenizer
+                    .split_into_subgroups(line, group, n_chars, sub_groups);
                 // In the case where `group` is the first group, it's likely
                 // that the first sub-group is a combining diacritical mark,
                 // and we need to convert it again to a word. This happens
                 // because `split_into_subgroups` recategorizes chars.
-                let sub_groups = if prev_group.is_none() {
-                    convert_first_cdm_group2(sub_groups)
-                } else {
-                    sub_groups
-                };
-                chain_into_vec(
-                    prev_group,
-                    insert_implicit_whitespace_in_cut_result(sub_groups),
-                )
+                if prev_group.is_none() {
+                    convert_first_cdm_group2(sub_groups);
+                }
+                stack.extend(prev_group);
+                insert_implicit_whitespace_in_cut_result(
+                    sub_groups.drain(..),
+                    stack,
+                );
             }
 
             // Otherwise, return as is.
-            _ => chain_into_vec(prev_group, [group.into()]),
+            _ => {
+                stack.extend(prev_group);
+                stack.push(group.into());
+            }
         },
     }
 }
 
 /// See [`cut_hanzi_rule`] for details.
-fn cut_hanzi<C: JiebaPlaceholder>(
-    groups: Vec<MaybeImplicitCharTokenGroup>,
+fn cut_hanzi<C, I>(
+    groups: I,
+    stack: &mut Vec<MaybeImplicitCharTokenGroup>,
     line: &str,
     tokenizer: &Tokenizer<C>,
-) -> Vec<MaybeImplicitCharTokenGroup> {
-    stack_merge(groups, |prev_group, group| {
-        cut_hanzi_rule(prev_group, group, line, tokenizer)
+    scratch: &mut CutScratch,
+) where
+    C: JiebaPlaceholder,
+    I: IntoIterator<Item = MaybeImplicitCharTokenGroup>,
+{
+    stack_merge(groups, stack, |prev_group, group, stack| {
+        cut_hanzi_rule(prev_group, group, stack, line, tokenizer, scratch)
     })
 }
 
@@ -847,10 +942,15 @@ impl Token {
     /// are indexed from 1. This is a quick patch so that the indexing basis
     /// comforms to Vim's rule.
     fn shift1(&mut self) {
-        self.col.start_byte_index += 1;
-        self.col.excl_start_byte_index += 1;
-        self.col.incl_end_byte_index += 1;
-        self.col.excl_end_byte_index += 1;
+        self.shift(1);
+    }
+
+    /// Shift `self` `offset` bytes to the right.
+    pub(crate) fn shift(&mut self, offset: usize) {
+        self.col.start_byte_index += offset;
+        self.col.excl_start_byte_index += offset;
+        self.col.incl_end_byte_index += offset;
+        self.col.excl_end_byte_index += offset;
     }
 }
 
@@ -869,7 +969,6 @@ pub enum TokenType {
 }
 
 impl Token {
-    #[cfg(test)]
     pub(crate) fn new(
         start_byte_index: usize,
         excl_start_byte_index: usize,
@@ -906,34 +1005,44 @@ impl From<CharTokenGroup> for Token {
 fn remove_implicit_whitespace_rule(
     prev_group: Option<CharTokenGroup>,
     group: MaybeImplicitCharTokenGroup,
-) -> Vec<CharTokenGroup> {
+    stack: &mut Vec<CharTokenGroup>,
+) {
     use MaybeImplicitCharTokenGroup::*;
+    stack.extend(prev_group);
     match group {
         // Remove this implicit whitespace.
-        ImplicitWhitespace(_) => prev_group.into_iter().collect(),
+        ImplicitWhitespace(_) => (),
         // Otherwise, return as is.
-        CharTokenGroup(group) => chain_into_vec(prev_group, [group]),
+        CharTokenGroup(group) => stack.push(group),
     }
 }
 
-fn remove_implicit_whitespace(
-    groups: Vec<MaybeImplicitCharTokenGroup>,
-) -> Vec<CharTokenGroup> {
-    stack_merge(groups, remove_implicit_whitespace_rule)
+fn remove_implicit_whitespace<I>(groups: I, stack: &mut Vec<CharTokenGroup>)
+where
+    I: IntoIterator<Item = MaybeImplicitCharTokenGroup>,
+{
+    stack_merge(groups, stack, remove_implicit_whitespace_rule)
 }
 
 impl<C: JiebaPlaceholder> Tokenizer<C> {
-    /// Parse a vec of [`CharToken`]s into `word`s and space.
+    /// Parse the [`CharToken`]s in `scratch.chars` into `word`s and space.
     fn parse_chars_into_words(
         &self,
         line: &str,
-        chars: Vec<CharToken>,
+        scratch: &mut ParseScratch,
     ) -> Vec<Token> {
-        let groups = group_chars(chars);
-        let groups = convert_first_cdm_group(groups);
-        let groups = cut_hanzi(groups, line, self);
-        let groups = remove_implicit_whitespace(groups);
-        groups.into_iter().map(Token::from).collect()
+        let ParseScratch {
+            chars,
+            groups,
+            groups_swap,
+            token_groups,
+            cut,
+        } = scratch;
+        group_chars(chars.drain(..), groups);
+        convert_first_cdm_group(groups);
+        cut_hanzi(groups.drain(..), groups_swap, line, self, cut);
+        remove_implicit_whitespace(groups_swap.drain(..), token_groups);
+        token_groups.drain(..).map(Token::from).collect()
     }
 }
 
@@ -941,9 +1050,10 @@ impl<C: JiebaPlaceholder> Tokenizer<C> {
 fn concat_nonspace_groups_rule(
     prev_group: Option<MaybeImplicitCharTokenGroup>,
     group: MaybeImplicitCharTokenGroup,
-) -> Vec<MaybeImplicitCharTokenGroup> {
+    stack: &mut Vec<MaybeImplicitCharTokenGroup>,
+) {
     match prev_group {
-        None => vec![group],
+        None => stack.push(group),
         Some(mut prev_group) => {
             use CharGroupType::*;
             use MaybeImplicitCharTokenGroup::*;
@@ -953,43 +1063,155 @@ fn concat_nonspace_groups_rule(
                     CharTokenGroup(group_inner),
                 ) => match (&prev_group_inner.ty, &group_inner.ty) {
                     (Space, _) | (_, Space) => {
-                        vec![prev_group, group_inner.into()]
+                        stack.push(prev_group);
+                        stack.push(group_inner.into());
                     }
                     _ => {
                         prev_group_inner.append(group_inner);
-                        vec![prev_group]
+                        stack.push(prev_group);
                     }
                 },
                 (ImplicitWhitespace(_), CharTokenGroup(group_inner)) => {
-                    vec![prev_group, group_inner.into()]
+                    stack.push(prev_group);
+                    stack.push(group_inner.into());
+                }
+                (_, ImplicitWhitespace(iw)) => {
+                    stack.push(prev_group);
+                    stack.push(iw.into());
                 }
-                (_, ImplicitWhitespace(iw)) => vec![prev_group, iw.into()],
             }
         }
     }
 }
 
 /// See [`concat_nonspace_groups_rule`] for details.
-fn concat_nonspace_groups(
-    groups: Vec<MaybeImplicitCharTokenGroup>,
-) -> Vec<MaybeImplicitCharTokenGroup> {
-    stack_merge(groups, concat_nonspace_groups_rule)
+fn concat_nonspace_groups<I>(
+    groups: I,
+    stack: &mut Vec<MaybeImplicitCharTokenGroup>,
+) where
+    I: IntoIterator<Item = MaybeImplicitCharTokenGroup>,
+{
+    stack_merge(groups, stack, concat_nonspace_groups_rule)
 }
 
 impl<C: JiebaPlaceholder> Tokenizer<C> {
-    /// Parse a vec of [`CharToken`]s into `WORD`s and space.
+    /// Parse the [`CharToken`]s in `scratch.chars` into `WORD`s and space.
     #[allow(non_snake_case)]
     fn parse_chars_into_WORDs(
         &self,
         line: &str,
-        chars: Vec<CharToken>,
+        scratch: &mut ParseScratch,
     ) -> Vec<Token> {
-        let groups = group_chars(chars);
-        let groups = convert_first_cdm_group(groups);
-        let groups = cut_hanzi(groups, line, self);
-        let groups = concat_nonspace_groups(groups);
-        let groups = remove_implicit_whitespace(groups);
-        groups.into_iter().map(Token::from).collect()
+        let ParseScratch {
+            chars,
+            groups,
+            groups_swap,
+            token_groups,
+            cut,
+        } = scratch;
+        group_chars(chars.drain(..), groups);
+        convert_first_cdm_group(groups);
+        cut_hanzi(groups.drain(..), groups_swap, line, self, cut);
+        concat_nonspace_groups(groups_swap.drain(..), groups);
+        remove_implicit_whitespace(groups.drain(..), token_groups);
+        token_groups.drain(..).map(Token::from).collect()
+    }
+}
+
+/// Number of items kept in each buffer of [`ParseScratch`] after a line is
+/// parsed. Buffers grown beyond that by a very long line are shrunk, so that
+/// they do not hold the memory of the line forever.
+const MAX_RETAINED_SCRATCH_LEN: usize = 4096;
+
+/// Buffers reused by [`cut_hanzi`].
+#[derive(Default)]
+struct CutScratch {
+    n_chars: Vec<usize>,
+    sub_groups: Vec<CharTokenGroup>,
+    marks: Vec<bool>,
+    group_string_no_marks: String,
+}
+
+/// Buffers passed between the stages of [`Tokenizer::parse_str`] and reused
+/// across lines, so that once they have grown large enough, parsing a line
+/// allocates nothing but the returned tokens (and the cut results of 汉字 runs
+/// not yet in the memo).
+#[derive(Default)]
+struct ParseScratch {
+    chars: Vec<CharToken>,
+    groups: Vec<MaybeImplicitCharTokenGroup>,
+    groups_swap: Vec<MaybeImplicitCharTokenGroup>,
+    token_groups: Vec<CharTokenGroup>,
+    cut: CutScratch,
+}
+
+impl ParseScratch {
+    /// Clear the buffers, and shrink those grown too large.
+    fn release(&mut self) {
+        fn release_vec<T>(v: &mut Vec<T>) {
+            v.clear();
+            v.shrink_to(MAX_RETAINED_SCRATCH_LEN);
+        }
+
+        release_vec(&mut self.chars);
+        release_vec(&mut self.groups);
+        release_vec(&mut self.groups_swap);
+        release_vec(&mut self.token_groups);
+        release_vec(&mut self.cut.n_chars);
+        release_vec(&mut self.cut.sub_groups);
+        release_vec(&mut self.cut.marks);
+        self.cut.group_string_no_marks.clear();
+        self.cut
+            .group_string_no_marks
+            .shrink_to(MAX_RETAINED_SCRATCH_LEN);
+    }
+}
+
+/// Major classes of ASCII characters. See [`Tokenizer::parse_ascii_str`].
+#[derive(PartialEq, Eq, Clone, Copy)]
+enum AsciiClass {
+    Space,
+    Word,
+    NonWord,
+}
+
+impl<C> Tokenizer<C> {
+    /// Fast path of [`parse_str`](Tokenizer::parse_str) for ASCII `line`,
+    /// which yields the same tokens. ASCII characters are never 汉字,
+    /// combining diacritical marks, right-associated punctuations or emojis,
+    /// so the tokens are simply the runs of bytes of the same major class,
+    /// with word and non-word bytes being of the same class in `WORD`s.
+    fn parse_ascii_str(&self, line: &[u8], into_word: bool) -> Vec<Token> {
+        let classify = |byte: u8| match byte {
+            b' ' | b'\t' => AsciiClass::Space,
+            _ if !into_word => AsciiClass::Word,
+            _ if self.word_predicate.is_ascii_word(byte) => AsciiClass::Word,
+            _ => AsciiClass::NonWord,
+        };
+        let mut tokens = vec![];
+        let mut bytes = line.iter().copied().enumerate().peekable();
+        while let Some((start, byte)) = bytes.next() {
+            let class = classify(byte);
+            let mut end = start + 1;
+            while let Some((i, _)) =
+                bytes.next_if(|&(_, byte)| classify(byte) == class)
+            {
+                end = i + 1;
+            }
+            tokens.push(Token {
+                col: Col {
+                    start_byte_index: start,
+                    excl_start_byte_index: start + 1,
+                    incl_end_byte_index: end - 1,
+                    excl_end_byte_index: end,
+                },
+                ty: match class {
+                    AsciiClass::Space => TokenType::Space,
+                    _ => TokenType::Word,
+                },
+            });
+        }
+        tokens
     }
 }
 
@@ -998,12 +1220,27 @@ impl<C: JiebaPlaceholder> Tokenizer<C> {
     /// tokens will be interpretable as `word`s; otherwise, they will be
     /// `WORD`s. The columns of the resulting [`Token`]s are indexed from 0.
     pub fn parse_str(&self, line: &str, into_word: bool) -> Vec<Token> {
-        let chars = self.parse_str_into_chars(line, 0);
-        if into_word {
-            self.parse_chars_into_words(line, chars)
-        } else {
-            self.parse_chars_into_WORDs(line, chars)
+        if line.is_ascii() {
+            return self.parse_ascii_str(line.as_bytes(), into_word);
         }
+        self.parse_str_general(line, into_word)
+    }
+
+    /// [`parse_str`](Tokenizer::parse_str) without the ASCII fast path.
+    fn parse_str_general(&self, line: &str, into_word: bool) -> Vec<Token> {
+        // The pool is locked only to take out and put back the buffers, so
+        // that threads parsing at the same time do not wait on each other.
+        let mut scratch =
+            self.scratch.lock().unwrap().pop().unwrap_or_default();
+        self.parse_str_into_chars(line, 0, &mut scratch.chars);
+        let tokens = if into_word {
+            self.parse_chars_into_words(line, &mut scratch)
+        } else {
+            self.parse_chars_into_WORDs(line, &mut scratch)
+        };
+        scratch.release();
+        self.scratch.lock().unwrap().push(scratch);
+        tokens
     }
 
     /// Call [`shift1`](Token::shift1) patch after
@@ -1070,7 +1307,8 @@ mod tests {
                 ty: CharGroupType::Word(WordCharGroupType::Other),
             }
         );
-        let groups = tokenizer.split_into_subgroups("hello", cg, vec![2, 2, 1]);
+        let mut groups = vec![];
+        tokenizer.split_into_subgroups("hello", cg, &[2, 2, 1], &mut groups);
         assert_eq!(
             groups,
             vec![
@@ -1162,6 +1400,71 @@ mod tests {
             "", false;
     );
 
+    /// Test whether the ASCII fast path agrees with the general path.
+    macro_rules! def_parse_ascii_str_tests {
+        ($($test_name:ident: $isk:literal, $into_word:literal);*$(;)?) => {
+            $(
+                proptest! {
+                    #![proptest_config(ProptestConfig::with_cases(10000))]
+                    #[test]
+                    #[allow(non_snake_case)]
+                    fn $test_name(s in "[\\t -~]*") {
+                        let tokenizer = Tokenizer::new(KeywordCutter::new([]), $isk);
+                        assert_eq!(
+                            tokenizer.parse_ascii_str(s.as_bytes(), $into_word),
+                            tokenizer.parse_str_general(&s, $into_word)
+                        );
+                    }
+                }
+            )*
+        };
+    }
+
+    def_parse_ascii_str_tests!(
+        parse_ascii_str_same_as_general_word_default_isk:
+            "@,48-57,_,192-255",
+            true;
+        parse_ascii_str_same_as_general_WORD_default_isk:
+            "@,48-57,_,192-255",
+            false;
+        parse_ascii_str_same_as_general_word_digit_punc_isk:
+            r#"48-57,!,",#,$,%,&,',(,),*,+,,,-,.,/,:,;,<,=,>,?,@-@,[,\,],_,`,{,|,},~,^"#,
+            true;
+        parse_ascii_str_same_as_general_word_empty_isk:
+            "", true;
+    );
+
+    #[test]
+    fn test_parse_ascii_str_same_as_general_exhaustive() {
+        let alphabet = ['a', '_', '9', ' ', '\t', ',', '(', '#', '*', '@'];
+        for isk in ["@,48-57,_,192-255", "48-57,#,@-@", ""] {
+            let tokenizer = Tokenizer::new(KeywordCutter::new([]), isk);
+            let mut lines = vec![String::new()];
+            for _ in 0..4 {
+                lines = lines
+                    .iter()
+                    .flat_map(|line| {
+                        alphabet.iter().map(move |c| format!("{}{}", line, c))
+                    })
+                    .collect();
+                for line in lines.iter() {
+                    for into_word in [true, false] {
+                        assert_eq!(
+                            tokenizer
+                                .parse_ascii_str(line.as_bytes(), into_word),
+                            tokenizer.parse_str_general(line, into_word),
+                            "isk={:?} line={:?} into_word={}",
+                            isk,
+                            line,
+                            into_word,
+                        );
+                    }
+                }
+            }
+            assert!(tokenizer.parse_str("", true).is_empty());
+        }
+    }
+
     #[test]
     fn test_parse_str_tokens_are_nonempty_contiguous_word_default_isk_failed_1()
     {
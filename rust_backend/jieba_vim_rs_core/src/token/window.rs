@@ -0,0 +1,307 @@
+// Copyright 2026 Kaiwen Wu. All Rights Reserved.
+//
+// Licensed under the Apache License, Version 2.0 (the "License"); you may not
+// use this file except in compliance with the License. You may obtain a copy
+// of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+// WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+// License for the specific language governing permissions and limitations
+// under the License.
+
+//! This module defines the tokenization of a line window by window. A window
+//! is bounded by stable boundaries, where the tokens of the line never cross,
+//! so that the tokens of the window are those of the line.
+
+use std::iter;
+use std::ops::Range;
+
+use super::JiebaPlaceholder;
+use super::char::{CharType, NonWordCharType};
+use super::tokenize::{Token, Tokenizer};
+
+/// Classes of chars that never join into one token. Combining diacritical
+/// marks have no class, as they join the char before them.
+#[derive(PartialEq, Eq)]
+enum BoundaryClass {
+    Space,
+    Word,
+    NonWordHanzi,
+    NonWordOther,
+    Emoji,
+}
+
+fn boundary_class(ty: CharType, into_word: bool) -> Option<BoundaryClass> {
+    use BoundaryClass as B;
+    match ty {
+        CharType::CombiningDiacriticalMark => None,
+        CharType::Space => Some(B::Space),
+        // `WORD`s are split only by spaces.
+        _ if !into_word => Some(B::Word),
+        CharType::Word(_) => Some(B::Word),
+        CharType::NonWord(NonWordCharType::Hanzi) => Some(B::NonWordHanzi),
+        CharType::NonWord(_) => Some(B::NonWordOther),
+        CharType::Emoji => Some(B::Emoji),
+    }
+}
+
+/// Bits of the hash of the chars around a stable boundary that must be zero
+/// for the boundary to end a window in [`Tokenizer::split_windows`], i.e.
+/// one in 8 stable boundaries qualifies.
+const WINDOW_END_BITS: u32 = 3;
+
+/// Whether the stable boundary between `prev` and `next` may end a window.
+/// This depends on nothing but the two chars, so that the window ends stay
+/// put when the line is edited elsewhere.
+fn is_window_end(prev: char, next: char) -> bool {
+    let h = (u32::from(prev).wrapping_mul(0x9e37_79b9) ^ u32::from(next))
+        .wrapping_mul(0x85eb_ca6b);
+    h >> (u32::BITS - WINDOW_END_BITS) == 0
+}
+
+impl<C> Tokenizer<C> {
+    /// Whether a line is tokenized apart between chars `prev` and `next`
+    /// whatever the chars around them.
+    fn is_stable_pair(&self, prev: char, next: char, into_word: bool) -> bool {
+        match (
+            boundary_class(self.categorize_char(prev), into_word),
+            boundary_class(self.categorize_char(next), into_word),
+        ) {
+            (Some(prev), Some(next)) => prev != next,
+            _ => false,
+        }
+    }
+
+    /// Whether byte index `i` of `line` is a stable boundary, i.e. the
+    /// tokens of `line` are those of `line[..i]` followed by those of
+    /// `line[i..]`. Both ends of `line` are stable boundaries.
+    fn is_stable_boundary(
+        &self,
+        line: &str,
+        i: usize,
+        into_word: bool,
+    ) -> bool {
+        match (line[..i].chars().next_back(), line[i..].chars().next()) {
+            (Some(prev), Some(next)) => {
+                self.is_stable_pair(prev, next, into_word)
+            }
+            _ => true,
+        }
+    }
+
+    /// Widen `range`, whose ends are byte indices of `line` at char
+    /// boundaries, to the nearest stable boundaries, so that the tokens of
+    /// `line` within the returned window are those of the window alone.
+    pub fn snap_window(
+        &self,
+        line: &str,
+        range: Range<usize>,
+        into_word: bool,
+    ) -> Range<usize> {
+        let start = iter::once(range.start)
+            .chain(line[..range.start].char_indices().rev().map(|(i, _)| i))
+            .find(|&i| self.is_stable_boundary(line, i, into_word))
+            .unwrap_or(0);
+        let end = line[range.end..]
+            .char_indices()
+            .map(|(i, _)| range.end + i)
+            .find(|&i| self.is_stable_boundary(line, i, into_word))
+            .unwrap_or(line.len());
+        start..end
+    }
+
+    /// Split `line` into contiguous windows ending at stable boundaries.
+    /// Each window but the last spans at least `min_len` bytes, and ends at
+    /// the first stable boundary after that which qualifies by the chars
+    /// around it, or at any stable boundary once the window spans
+    /// `4 * min_len` bytes. As the window ends are picked by the content
+    /// around them rather than by their offsets, an edit to `line` changes
+    /// only the windows around the edit.
+    pub fn split_windows(
+        &self,
+        line: &str,
+        min_len: usize,
+        into_word: bool,
+    ) -> Vec<Range<usize>> {
+        let mut windows = vec![];
+        let mut start = 0;
+        let mut prev = None;
+        for (i, next) in line.char_indices() {
+            if let Some(prev) = prev {
+                let len = i - start;
+                if len >= min_len
+                    && (len >= 4 * min_len || is_window_end(prev, next))
+                    && self.is_stable_pair(prev, next, into_word)
+                {
+                    windows.push(start..i);
+                    start = i;
+                }
+            }
+            prev = Some(next);
+        }
+        if start < line.len() {
+            windows.push(start..line.len());
+        }
+        windows
+    }
+}
+
+impl<C: JiebaPlaceholder> Tokenizer<C> {
+    /// Parse `line[window]` like [`parse_str`](Tokenizer::parse_str), with
+    /// the columns of the resulting [`Token`]s indexed from 0 in `line`. For
+    /// the tokens to be those of `line`, the ends of `window` should be
+    /// stable boundaries, e.g. those returned by
+    /// [`snap_window`](Tokenizer::snap_window).
+    pub fn parse_str_window(
+        &self,
+        line: &str,
+        window: Range<usize>,
+        into_word: bool,
+    ) -> Vec<Token> {
+        let mut tokens = self.parse_str(&line[window.clone()], into_word);
+        for t in tokens.iter_mut() {
+            t.shift(window.start);
+        }
+        tokens
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use crate::token::jieba::KeywordCutter;
+    use crate::token::{TokenLike, Tokenizer};
+
+    /// Chars of every class, including combining diacritical marks, right
+    /// punctuations and non-ASCII spaces.
+    const ALPHABET: [char; 10] = [
+        ' ',
+        'a',
+        '.',
+        '中',
+        '国',
+        '，',
+        '\u{301}',
+        '\u{1f600}',
+        '\u{3000}',
+        '\u{200d}',
+    ];
+
+    /// All strings of at most `max_len` chars from [`ALPHABET`].
+    fn all_strings(max_len: usize) -> Vec<String> {
+        let mut strings = vec![String::new()];
+        let mut last = vec![String::new()];
+        for _ in 0..max_len {
+            last = last
+                .iter()
+                .flat_map(|s| {
+                    ALPHABET.iter().map(move |&c| {
+                        let mut s = s.clone();
+                        s.push(c);
+                        s
+                    })
+                })
+                .collect();
+            strings.extend(last.iter().cloned());
+        }
+        strings
+    }
+
+    #[test]
+    fn test_parse_str_window_same_as_parse_str_exhaustive() {
+        for isk in ["@,48-57,_,192-255", ""] {
+            let tokenizer =
+                Tokenizer::new(KeywordCutter::new(["中国".into()]), isk);
+            for line in all_strings(4) {
+                let offsets: Vec<_> = line
+                    .char_indices()
+                    .map(|(i, _)| i)
+                    .chain([line.len()])
+                    .collect();
+                for into_word in [true, false] {
+                    let tokens = tokenizer.parse_str(&line, into_word);
+                    for (k, &start) in offsets.iter().enumerate() {
+                        for &end in &offsets[k..] {
+                            let window = tokenizer.snap_window(
+                                &line,
+                                start..end,
+                                into_word,
+                            );
+                            assert!(window.start <= start && end <= window.end);
+                            let expected: Vec<_> = tokens
+                                .iter()
+                                .copied()
+                                .filter(|t| {
+                                    window.start <= t.first_char()
+                                        && t.last_char1() <= window.end
+                                })
+                                .collect();
+                            assert_eq!(
+                                tokenizer.parse_str_window(
+                                    &line,
+                                    window.clone(),
+                                    into_word
+                                ),
+                                expected,
+                                "line={:?} window={:?} into_word={}",
+                                line,
+                                window,
+                                into_word,
+                            );
+                        }
+                    }
+                }
+            }
+        }
+    }
+
+    #[test]
+    fn test_split_windows() {
+        let tokenizer = Tokenizer::new(
+            KeywordCutter::new(["中国".into(), "你好".into()]),
+            "@,48-57,_,192-255",
+        );
+        let line: String = (0..50)
+            .map(|i| format!("你好{}，中国人 foo(bar{})。", i, i * 37))
+            .collect();
+        for into_word in [true, false] {
+            let windows = tokenizer.split_windows(&line, 64, into_word);
+            assert_eq!(windows.first().unwrap().start, 0);
+            assert_eq!(windows.last().unwrap().end, line.len());
+            for w in windows.windows(2) {
+                assert_eq!(w[0].end, w[1].start);
+                assert!(w[0].len() >= 64);
+            }
+            let tokens: Vec<_> = windows
+                .iter()
+                .flat_map(|w| {
+                    tokenizer.parse_str_window(&line, w.clone(), into_word)
+                })
+                .collect();
+            assert_eq!(tokens, tokenizer.parse_str(&line, into_word));
+        }
+
+        // An edit keeps the windows far from it.
+        let windows = tokenizer.split_windows(&line, 64, true);
+        let mut edited = line.clone();
+        edited.insert_str(line.find("你好25").unwrap(), "再见");
+        let edited_windows = tokenizer.split_windows(&edited, 64, true);
+        let texts = |line: &str, windows: &[std::ops::Range<usize>]| {
+            windows
+                .iter()
+                .map(|w| line[w.clone()].to_string())
+                .collect::<Vec<_>>()
+        };
+        let texts_before = texts(&line, &windows);
+        let texts_after = texts(&edited, &edited_windows);
+        assert_eq!(texts_before.first(), texts_after.first());
+        assert_eq!(texts_before.last(), texts_after.last());
+        let changed = texts_after
+            .iter()
+            .filter(|t| !texts_before.contains(t))
+            .count();
+        assert!(changed <= 2, "{} windows changed", changed);
+    }
+}
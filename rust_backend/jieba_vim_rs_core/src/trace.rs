@@ -0,0 +1,208 @@
+// Copyright 2026 Kaiwen Wu. All Rights Reserved.
+//
+// Licensed under the Apache License, Version 2.0 (the "License"); you may not
+// use this file except in compliance with the License. You may obtain a copy
+// of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+// WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+// License for the specific language governing permissions and limitations
+// under the License.
+
+//! Hooks to trace the phases of motions as nested spans.
+
+use std::cell::Cell;
+use std::sync::Arc;
+
+/// Receiver of the begin and end of spans, which nest within each thread.
+/// Spans may begin and end on several threads at the same time.
+pub trait Tracer: Send + Sync {
+    fn begin(&self, name: &'static str);
+
+    fn end(&self, name: &'static str);
+}
+
+thread_local! {
+    /// Whether a [`LeafSpan`] is open on the current thread.
+    static IN_LEAF: Cell<bool> = const { Cell::new(false) };
+}
+
+/// An optional [`Tracer`]. Spans cost a branch and nothing else if there is
+/// no tracer.
+#[derive(Clone, Default)]
+pub struct Tracing(Option<Arc<dyn Tracer>>);
+
+impl Tracing {
+    pub fn new(tracer: Option<Arc<dyn Tracer>>) -> Self {
+        Self(tracer)
+    }
+
+    pub fn is_enabled(&self) -> bool {
+        self.0.is_some()
+    }
+
+    /// Begin span `name`, which ends when the returned guard is dropped.
+    /// Spans within a [`LeafSpan`] are left out.
+    #[inline]
+    pub fn span(&self, name: &'static str) -> Span<'_> {
+        let tracer = self.0.as_deref().filter(|_| !IN_LEAF.get());
+        if let Some(tracer) = tracer {
+            tracer.begin(name);
+        }
+        Span { tracer, name }
+    }
+
+    /// Begin span `name` like [`span`](Tracing::span), but leave out the
+    /// spans begun within it on the current thread, so that e.g. a chunk of
+    /// lines is traced as one span rather than as a span per line.
+    pub fn leaf_span(&self, name: &'static str) -> LeafSpan<'_> {
+        let span = self.span(name);
+        LeafSpan {
+            _span: span,
+            was_in_leaf: IN_LEAF.replace(true),
+        }
+    }
+}
+
+/// A span that ends when dropped.
+#[must_use]
+pub struct Span<'t> {
+    tracer: Option<&'t dyn Tracer>,
+    name: &'static str,
+}
+
+impl Drop for Span<'_> {
+    #[inline]
+    fn drop(&mut self) {
+        if let Some(tracer) = self.tracer {
+            tracer.end(self.name);
+        }
+    }
+}
+
+/// A span within which no other span begins on the same thread, which ends
+/// when dropped.
+#[must_use]
+pub struct LeafSpan<'t> {
+    _span: Span<'t>,
+    was_in_leaf: bool,
+}
+
+impl Drop for LeafSpan<'_> {
+    fn drop(&mut self) {
+        // The span itself ends afterwards, when `_span` is dropped.
+        IN_LEAF.set(self.was_in_leaf);
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use std::sync::{Arc, Mutex};
+
+    use crate::motion::WordMotion;
+    use crate::token::Tokenizer;
+    use crate::token::jieba::KeywordCutter;
+
+    use super::{Tracer, Tracing};
+
+    /// A tracer that records the spans as `"+name"` and `"-name"`.
+    #[derive(Default)]
+    pub struct RecordingTracer(pub Mutex<Vec<String>>);
+
+    impl Tracer for RecordingTracer {
+        fn begin(&self, name: &'static str) {
+            self.0.lock().unwrap().push(format!("+{}", name));
+        }
+
+        fn end(&self, name: &'static str) {
+            self.0.lock().unwrap().push(format!("-{}", name));
+        }
+    }
+
+    #[test]
+    fn test_tracing() {
+        let tracer = Arc::new(RecordingTracer::default());
+        let tracing = Tracing::new(Some(tracer.clone()));
+        assert!(tracing.is_enabled());
+        {
+            let _outer = tracing.span("outer");
+            let _inner = tracing.span("inner");
+        }
+        assert_eq!(
+            *tracer.0.lock().unwrap(),
+            vec!["+outer", "+inner", "-inner", "-outer"]
+        );
+
+        tracer.0.lock().unwrap().clear();
+        {
+            let _leaf = tracing.leaf_span("leaf");
+            let _inner = tracing.span("inner");
+        }
+        let _after = tracing.span("after");
+        assert_eq!(*tracer.0.lock().unwrap(), vec!["+leaf", "-leaf", "+after"]);
+
+        let tracing = Tracing::default();
+        assert!(!tracing.is_enabled());
+        let _span = tracing.span("ignored");
+    }
+
+    #[test]
+    fn test_word_motion_spans() {
+        let mut wm = WordMotion::new(Tokenizer::new(
+            KeywordCutter::new(["你好".into()]),
+            "@,48-57,_,192-255",
+        ));
+        let tracer = Arc::new(RecordingTracer::default());
+        wm.set_tracer(Some(tracer.clone()));
+        let buffer: Vec<String> = vec!["你好".into()];
+        wm.nmap(&buffer, b"w", [0, 1, 1, 0, 1], 1).unwrap();
+        assert_eq!(
+            *tracer.0.lock().unwrap(),
+            vec![
+                "+nmap",
+                "+fetch_line",
+                "-fetch_line",
+                "+parse_str1",
+                "+jieba_cut",
+                "-jieba_cut",
+                "-parse_str1",
+                "-nmap",
+            ]
+        );
+
+        wm.set_tracer(None);
+        wm.nmap(&buffer, b"w", [0, 1, 1, 0, 1], 1).unwrap();
+        assert_eq!(tracer.0.lock().unwrap().len(), 8);
+    }
+
+    #[test]
+    fn test_fill_cache_spans() {
+        let mut wm = WordMotion::new(Tokenizer::new(
+            KeywordCutter::new(["你好".into()]),
+            "@,48-57,_,192-255",
+        ));
+        let tracer = Arc::new(RecordingTracer::default());
+        wm.set_tracer(Some(tracer.clone()));
+        let lines = vec!["你好"; 8];
+        wm.fill_cache(0, 1, &lines, true, 2);
+        let mut spans = tracer.0.lock().unwrap().clone();
+        assert_eq!(spans.first().unwrap(), "+fill_cache");
+        assert_eq!(spans.last().unwrap(), "-fill_cache");
+        // A span per chunk, and none per line.
+        spans.sort();
+        assert_eq!(
+            spans,
+            vec![
+                "+fill_cache",
+                "+fill_chunk",
+                "+fill_chunk",
+                "-fill_cache",
+                "-fill_chunk",
+                "-fill_chunk",
+            ]
+        );
+    }
+}
@@ -0,0 +1,98 @@
+// Copyright 2026 Kaiwen Wu. All Rights Reserved.
+//
+// Licensed under the Apache License, Version 2.0 (the "License"); you may not
+// use this file except in compliance with the License. You may obtain a copy
+// of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+// WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+// License for the specific language governing permissions and limitations
+// under the License.
+
+//! Count the allocations made by the tokenizer. This lives in a test binary
+//! of its own, since it replaces the global allocator.
+
+use std::alloc::{GlobalAlloc, Layout, System};
+use std::cell::Cell;
+
+use jieba_vim_rs_core::token::Tokenizer;
+
+mod keyword_cutter;
+use keyword_cutter::KeywordCutter;
+
+thread_local! {
+    /// Allocations made by current thread while counting, if counting.
+    static ALLOCATIONS: Cell<Option<usize>> = const { Cell::new(None) };
+}
+
+struct CountingAllocator;
+
+unsafe impl GlobalAlloc for CountingAllocator {
+    unsafe fn alloc(&self, layout: Layout) -> *mut u8 {
+        count_allocation();
+        unsafe { System.alloc(layout) }
+    }
+
+    unsafe fn dealloc(&self, ptr: *mut u8, layout: Layout) {
+        unsafe { System.dealloc(ptr, layout) }
+    }
+
+    unsafe fn realloc(
+        &self,
+        ptr: *mut u8,
+        layout: Layout,
+        new_size: usize,
+    ) -> *mut u8 {
+        count_allocation();
+        unsafe { System.realloc(ptr, layout, new_size) }
+    }
+}
+
+#[global_allocator]
+static GLOBAL: CountingAllocator = CountingAllocator;
+
+fn count_allocation() {
+    let _ = ALLOCATIONS.try_with(|n| n.set(n.get().map(|n| n + 1)));
+}
+
+/// Return the number of allocations made by `f` in current thread.
+fn count_allocations<R>(f: impl FnOnce() -> R) -> (usize, R) {
+    ALLOCATIONS.with(|n| n.set(Some(0)));
+    let r = f();
+    let n = ALLOCATIONS.with(|n| n.replace(None)).unwrap();
+    (n, r)
+}
+
+#[test]
+fn test_parse_str_allocates_output_only() {
+    let tokenizer = Tokenizer::try_new(
+        KeywordCutter::new(["你好".into(), "世界".into()]),
+        "@,48-57,_,192-255",
+    )
+    .unwrap();
+    let lines = [
+        "你好世界，foo_bar 中文abc  😀😀 (baz)",
+        "\u{301}你好\u{301}世界。再见 Àé",
+        "一二三四五六七八九十，一二三四五六七八九十。",
+    ];
+    for into_word in [true, false] {
+        // Warm up the scratch buffers and the memo of jieba cut results.
+        for line in lines {
+            tokenizer.parse_str(line, into_word);
+        }
+        for line in lines {
+            let (n, tokens) =
+                count_allocations(|| tokenizer.parse_str(line, into_word));
+            assert!(!tokens.is_empty());
+            // The returned vec of tokens.
+            assert_eq!(
+                n, 1,
+                "line={:?} into_word={}: {} allocations",
+                line, into_word, n
+            );
+        }
+    }
+}
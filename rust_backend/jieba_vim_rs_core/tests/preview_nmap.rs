@@ -0,0 +1,135 @@
+// Copyright 2026 Kaiwen Wu. All Rights Reserved.
+//
+// Licensed under the Apache License, Version 2.0 (the "License"); you may not
+// use this file except in compliance with the License. You may obtain a copy
+// of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+// WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+// License for the specific language governing permissions and limitations
+// under the License.
+
+use jieba_vim_rs_core::motion::WordMotion;
+use jieba_vim_rs_core::token::Tokenizer;
+
+mod keyword_cutter;
+use keyword_cutter::KeywordCutter;
+
+const MOTIONS: [&[u8]; 8] = [b"w", b"W", b"e", b"E", b"b", b"B", b"ge", b"gE"];
+
+fn new_word_motion() -> WordMotion<KeywordCutter> {
+    WordMotion::new(
+        Tokenizer::try_new(KeywordCutter::new([]), "@,48-57,_,192-255")
+            .unwrap(),
+    )
+}
+
+/// Preview by repeated `nmap` calls with count 1.
+fn preview_by_nmap(
+    wm: &mut WordMotion<KeywordCutter>,
+    buffer: &Vec<String>,
+    motion: &[u8],
+    (mut lnum, mut col): (usize, usize),
+    preview_limit: usize,
+) -> Vec<(usize, usize)> {
+    let mut positions = vec![];
+    while preview_limit == 0 || positions.len() < preview_limit {
+        let output =
+            wm.nmap(buffer, motion, [0, lnum, col, 0, col], 1).unwrap();
+        let [_, next_lnum, next_col, _] = output.cursor;
+        if (next_lnum, next_col) == (lnum, col) {
+            break;
+        }
+        if preview_limit == 0 && next_lnum != lnum {
+            break;
+        }
+        positions.push((next_lnum, next_col));
+        (lnum, col) = (next_lnum, next_col);
+    }
+    positions
+}
+
+#[test]
+fn test_preview_nmap_same_as_nmap() {
+    let mut wm = new_word_motion();
+    let buffer: Vec<String> = vec![
+        "foo, bar 你好世界".into(),
+        "".into(),
+        "  (baz)  中文abc  ".into(),
+        "x".into(),
+    ];
+    for motion in MOTIONS {
+        for (lnum, line) in buffer.iter().enumerate() {
+            let lnum = lnum + 1;
+            for col in 1..=line.len().max(1) {
+                if !line.is_char_boundary(col - 1) {
+                    continue;
+                }
+                for preview_limit in [0, 1, 3, 99999] {
+                    assert_eq!(
+                        wm.preview_nmap(
+                            &buffer,
+                            motion,
+                            [0, lnum, col, 0],
+                            preview_limit
+                        )
+                        .unwrap(),
+                        preview_by_nmap(
+                            &mut wm,
+                            &buffer,
+                            motion,
+                            (lnum, col),
+                            preview_limit
+                        ),
+                        "motion={:?} lnum={} col={} preview_limit={}",
+                        String::from_utf8_lossy(motion),
+                        lnum,
+                        col,
+                        preview_limit,
+                    );
+                }
+            }
+        }
+    }
+}
+
+#[test]
+fn test_preview_nmap_current_line() {
+    let mut wm = new_word_motion();
+    let buffer: Vec<String> = vec!["foo bar baz".into(), "qux".into()];
+    assert_eq!(
+        wm.preview_nmap(&buffer, b"w", [0, 1, 1, 0], 0).unwrap(),
+        vec![(1, 5), (1, 9)]
+    );
+    assert_eq!(
+        wm.preview_nmap(&buffer, b"w", [0, 1, 1, 0], 99999).unwrap(),
+        vec![(1, 5), (1, 9), (2, 1), (2, 3)]
+    );
+    assert_eq!(
+        wm.preview_nmap(&buffer, b"b", [0, 2, 1, 0], 2).unwrap(),
+        vec![(1, 9), (1, 5)]
+    );
+}
+
+#[test]
+fn test_preview_nmap_batched() {
+    let mut wm = new_word_motion();
+    let buffer: Vec<String> = vec!["a 你 b 好 c".into(), "".into()];
+    assert_eq!(
+        wm.preview_nmap_batched(&buffer, b"w", [0, 1, 1, 0], 99999, 2)
+            .unwrap(),
+        vec![
+            vec![[1, 3, 3], [1, 7, 1]],
+            vec![[1, 9, 3], [1, 13, 1]],
+            vec![[2, 1, 1]],
+        ]
+    );
+    assert!(
+        wm.preview_nmap_batched(&buffer, b"b", [0, 1, 1, 0], 99999, 8)
+            .unwrap()
+            .is_empty()
+    );
+}